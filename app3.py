@@ -1,7 +1,50 @@
+import cProfile
+import os
+import time
+
 import streamlit as st
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
+
+from yetitrader.breaks import BreakDetector
+from yetitrader.bus import open_bus
+from yetitrader.cache import cache_stats, clear_caches
+from yetitrader.chain import best_pairs, load_chain, score_chain
+from yetitrader.charts import pivot_chart_png, score_pie_png
+from yetitrader.ema import StreamingEMA, consume_bars
+from yetitrader.feeds import BarFileTail
+from yetitrader.journal import open_journal
+from yetitrader.levels import lookup_nearest_levels, pivot_levels_table
+from yetitrader.metrics import METRICS, profile_report
+from yetitrader.pivots import compute_pivots
+from yetitrader.scoring import (
+    LEVEL_NAMES,
+    determine_pivot_context,
+    determine_spy_trend,
+    score_snapshot,
+)
+from yetitrader.store import open_store
+
+# Start timing a full or fragment rerun, and profiling it if "Profile
+# next rerun" was clicked. Stage metrics are recorded for this session's
+# reruns while its "Record stage metrics" box is checked.
+def begin_rerun():
+    METRICS.record(st.session_state.get("metrics_enabled", METRICS.enabled))
+    profiler = None
+    if st.session_state.pop("profile_rerun", False):
+        profiler = cProfile.Profile()
+        profiler.enable()
+    return time.perf_counter(), profiler
+
+# Finish a rerun started with begin_rerun
+def end_rerun(stage, started, profiler):
+    if profiler is not None:
+        profiler.disable()
+        st.session_state.profile_report = profile_report(profiler)
+    if METRICS.active():
+        METRICS.observe(stage, time.perf_counter() - started)
+
+rerun_started, profiler = begin_rerun()
 
 # Set page configuration
 st.set_page_config(
@@ -26,15 +69,74 @@ if 'pivot_initialized' not in st.session_state:
     st.session_state.s3 = 527.00
     st.session_state.price = 530.00
     st.session_state.broken_levels = []
+    # The Tab 1 checkboxes; broken_levels adds the feed's detected breaks
+    st.session_state.manual_broken_levels = []
+
+    # Start from today's saved levels when there are any
+    stored = open_store().get("SPY")
+    if stored is not None:
+        stored_levels, stored_broken = stored
+        for name, value in stored_levels.items():
+            st.session_state[name.lower()] = value
+        st.session_state.broken_levels = [(name, stored_levels[name]) for name in stored_broken]
+        st.session_state.manual_broken_levels = list(st.session_state.broken_levels)
+        st.session_state.pivot_initialized = True
+
+# Saved pivot levels as a {name: value} dict
+def saved_pivot_levels():
+    return {
+        "R3": st.session_state.r3,
+        "R2": st.session_state.r2,
+        "R1": st.session_state.r1,
+        "Pivot": st.session_state.pivot,
+        "S1": st.session_state.s1,
+        "S2": st.session_state.s2,
+        "S3": st.session_state.s3
+    }
+
+# Callback: derive and save today's levels from the prior day's high/low/close
+def apply_prior_day_pivots():
+    levels = compute_pivots(
+        st.session_state.prior_high,
+        st.session_state.prior_low,
+        st.session_state.prior_close,
+        st.session_state.pivot_method.lower()
+    )
+    for name, value in zip(LEVEL_NAMES, np.round(levels, 2).tolist()):
+        st.session_state[name.lower()] = value
+        # Drop the widget state so the inputs below pick up the new values
+        st.session_state.pop(f"{name.lower()}_input", None)
+    st.session_state.pivot_initialized = True
+    open_store().save(
+        "SPY", None, saved_pivot_levels(), [level[0] for level in st.session_state.manual_broken_levels],
+        source=f"prior_day:{st.session_state.pivot_method.lower()}"
+    )
+
+# Callback: capture a cProfile of the next rerun
+def request_profile():
+    st.session_state.profile_rerun = True
 
 # Two-tab system: Setup and Analysis
 tab1, tab2 = st.tabs(["Setup Pivot Levels", "Trade Analysis"])
 
-# Tab 1: Setup Pivot Levels
-with tab1:
+# Tab 1: Setup Pivot Levels. A fragment, so editing levels reruns only
+# this tab; saving reruns the whole app.
+@st.fragment
+def pivot_setup():
+    started, profiler = begin_rerun()
     st.header("Daily Pivot Levels Setup")
     st.markdown("Enter pivot levels once for the trading day. These values will be saved for all your analysis.")
     
+    # Derive levels from the prior day instead of typing them in
+    with st.expander("Calculate from Prior Day"):
+        pcol1, pcol2, pcol3, pcol4 = st.columns(4)
+        pcol1.number_input("Prior High", value=533.00, format="%.2f", step=0.01, key="prior_high")
+        pcol2.number_input("Prior Low", value=527.50, format="%.2f", step=0.01, key="prior_low")
+        pcol3.number_input("Prior Close", value=530.00, format="%.2f", step=0.01, key="prior_close")
+        pcol4.selectbox("Method", ["Classic", "Fibonacci", "Woodie", "Camarilla"], key="pivot_method")
+        if st.button("Calculate Pivot Levels", on_click=apply_prior_day_pivots):
+            st.rerun()
+    
     col1, col2 = st.columns(2)
     
     with col1:
@@ -94,61 +196,34 @@ with tab1:
         if broken_s2: broken_levels.append(("S2", s2))
         if broken_s3: broken_levels.append(("S3", s3))
         st.session_state.broken_levels = broken_levels
+        st.session_state.manual_broken_levels = broken_levels
+        open_store().save("SPY", None, saved_pivot_levels(), [level[0] for level in broken_levels])
         
         st.session_state.pivot_initialized = True
+        st.session_state.pivot_saved = True
+        # Rerun the whole app so Trade Analysis picks up the new levels
+        st.rerun()
+    if st.session_state.pop("pivot_saved", False):
         st.success("Pivot levels and broken levels saved successfully! You can now switch to the Trade Analysis tab.")
     
     # Visualize pivot levels
     if st.checkbox("Show Pivot Levels Visualization", value=True):
-        # Create a figure
-        fig, ax = plt.subplots(figsize=(10, 6))
-        
-        # Price range
-        price_range = [s3, s2, s1, pivot, r1, r2, r3]
-        labels = ["S3", "S2", "S1", "Pivot", "R1", "R2", "R3"]
-        
-        # Create horizontal lines for each level with broken levels shown differently
-        for i, (price_level, label) in enumerate(zip(price_range, labels)):
-            # Check if this level is in broken_levels
-            is_broken = False
-            for blevel in st.session_state.broken_levels:
-                if blevel[0] == label:
-                    is_broken = True
-                    break
-            
-            if is_broken:
-                # Use dashed line for broken levels
-                ax.axhline(y=price_level, color='orange', linestyle='--', alpha=0.9, linewidth=2)
-                ax.text(0.02, price_level, f"{label}: {price_level:.2f} (BROKEN)", verticalalignment='center', fontweight='bold', color='orange')
-            else:
-                # Use normal colors
-                if label.startswith("R"):
-                    color = "green"
-                elif label.startswith("S"):
-                    color = "red"
-                else:
-                    color = "purple"
-                ax.axhline(y=price_level, color=color, linestyle='-', alpha=0.7, linewidth=2)
-                ax.text(0.02, price_level, f"{label}: {price_level:.2f}", verticalalignment='center', fontweight='bold', color=color)
-        
-        # Set the y-limits to be slightly outside the range of values
-        y_min = min(price_range) - 2
-        y_max = max(price_range) + 2
-        ax.set_ylim(y_min, y_max)
-        
-        # Remove x-axis ticks and labels
-        ax.set_xticks([])
-        ax.set_xticklabels([])
-        
-        # Set title and labels
-        ax.set_title("SPY Pivot Levels")
-        ax.set_ylabel("Price")
-        
-        # Display the plot
-        st.pyplot(fig)
+        # Display the (cached) chart of the levels being edited
+        st.image(pivot_chart_png(
+            {"R3": r3, "R2": r2, "R1": r1, "Pivot": pivot, "S1": s1, "S2": s2, "S3": s3},
+            broken_names=[level[0] for level in st.session_state.broken_levels]
+        ), width="stretch")
 
-# Tab 2: Trade Analysis
-with tab2:
+    end_rerun("fragment.pivot_setup", started, profiler)
+
+with tab1:
+    pivot_setup()
+
+# Tab 2: Trade Analysis. A fragment together with its sidebar inputs, so
+# EMA and price edits rerun only the scoring and its charts.
+@st.fragment
+def trade_analysis():
+    started, profiler = begin_rerun()
     # Create sidebar for inputs
     st.sidebar.header("Input Values")
 
@@ -161,307 +236,102 @@ with tab2:
         key="current_price_analysis"
     )
     
+    # Optional live feed: stream bars from a local file into the EMA inputs
+    with st.sidebar.expander("Live EMA Feed"):
+        bar_file = st.text_input("Bar file", value="", key="bar_file")
+        bus_name = st.text_input("Shared-memory bus (used without a bar file)",
+                                 value=os.environ.get("YETITRADER_BUS", ""), key="bus_name")
+        feed_spy = st.text_input("SPY symbol", value="SPY", key="feed_spy")
+        feed_call = st.text_input("CALL symbol", value="", key="feed_call")
+        feed_put = st.text_input("PUT symbol", value="", key="feed_put")
+        auto_broken = st.checkbox("Detect broken levels from the feed", key="auto_broken")
+        break_confirm_bars = st.number_input("Confirm bars", min_value=1, value=1, step=1, key="break_confirm_bars")
+        break_buffer = st.number_input("Break buffer (%)", min_value=0.0, value=0.0, format="%.3f", step=0.01,
+                                       key="break_buffer")
+    
+    ema_defaults = {
+        "spy_ema8": 530.87, "spy_ema21": 531.40,
+        "call_ema8": 6.27, "call_ema21": 6.97,
+        "put_ema8": 1.78, "put_ema21": 1.59
+    }
+    # The saved Tab 1 selection, plus detected breaks while detection is on
+    st.session_state.broken_levels = st.session_state.manual_broken_levels
+    if bar_file and os.path.exists(bar_file):
+        # Keep the engine across reruns so only newly appended bars are read
+        if st.session_state.get("ema_feed_path") != bar_file:
+            st.session_state.ema_feed_path = bar_file
+            st.session_state.ema_feed_tail = BarFileTail(bar_file)
+            st.session_state.ema_engine = StreamingEMA()
+        consume_bars(st.session_state.ema_engine, st.session_state.ema_feed_tail.read_new())
+        if auto_broken:
+            # Run the SPY closes through the broken-level state machine. A new
+            # detector (replaying the file from the start) is built whenever
+            # the file, the levels or the confirmation settings change.
+            detector_key = (bar_file, tuple(saved_pivot_levels().items()), break_confirm_bars, break_buffer)
+            if st.session_state.get("break_detector_key") != detector_key:
+                st.session_state.break_detector_key = detector_key
+                st.session_state.break_detector = BreakDetector.from_levels(
+                    saved_pivot_levels(), break_confirm_bars, break_buffer / 100)
+                st.session_state.break_tail = BarFileTail(bar_file)
+            detector = st.session_state.break_detector
+            for bar in st.session_state.break_tail.read_new():
+                if bar.symbol == feed_spy:
+                    detector.update(bar.close)
+            # A level counts as broken when it is ticked in Tab 1 or the
+            # detector has seen it break
+            broken = {level[0] for level in st.session_state.manual_broken_levels}
+            broken.update(level[0] for level in detector.broken_levels())
+            levels = saved_pivot_levels()
+            st.session_state.broken_levels = [(name, levels[name]) for name in LEVEL_NAMES if name in broken]
+        live_emas = st.session_state.ema_engine.framework_inputs(feed_spy, feed_call, feed_put)
+        ema_defaults.update({k: round(v, 2) for k, v in live_emas.items() if not np.isnan(v)})
+    elif bus_name and open_bus(bus_name) is not None:
+        # Read the EMAs an ingest process publishes (python -m yetitrader.bus
+        # ingest) straight from shared memory, shared by every session
+        live_emas = open_bus(bus_name).framework_inputs(feed_spy, feed_call, feed_put)
+        ema_defaults.update({k: round(v, 2) for k, v in live_emas.items() if not np.isnan(v)})
+    
     # SPY EMAs
     st.sidebar.header("SPY EMAs")
-    spy_ema8 = st.sidebar.number_input("SPY 8 EMA", value=530.87, format="%.2f", step=0.01)
-    spy_ema21 = st.sidebar.number_input("SPY 21 EMA", value=531.40, format="%.2f", step=0.01)
+    spy_ema8 = st.sidebar.number_input("SPY 8 EMA", value=ema_defaults["spy_ema8"], format="%.2f", step=0.01)
+    spy_ema21 = st.sidebar.number_input("SPY 21 EMA", value=ema_defaults["spy_ema21"], format="%.2f", step=0.01)
 
     # CALL EMAs
     st.sidebar.header("CALL EMAs")
-    call_ema8 = st.sidebar.number_input("CALL 8 EMA", value=6.27, format="%.2f", step=0.01)
-    call_ema21 = st.sidebar.number_input("CALL 21 EMA", value=6.97, format="%.2f", step=0.01)
+    call_ema8 = st.sidebar.number_input("CALL 8 EMA", value=ema_defaults["call_ema8"], format="%.2f", step=0.01)
+    call_ema21 = st.sidebar.number_input("CALL 21 EMA", value=ema_defaults["call_ema21"], format="%.2f", step=0.01)
 
     # PUT EMAs
     st.sidebar.header("PUT EMAs")
-    put_ema8 = st.sidebar.number_input("PUT 8 EMA", value=1.78, format="%.2f", step=0.01)
-    put_ema21 = st.sidebar.number_input("PUT 21 EMA", value=1.59, format="%.2f", step=0.01)
+    put_ema8 = st.sidebar.number_input("PUT 8 EMA", value=ema_defaults["put_ema8"], format="%.2f", step=0.01)
+    put_ema21 = st.sidebar.number_input("PUT 21 EMA", value=ema_defaults["put_ema21"], format="%.2f", step=0.01)
     
-    # Function to determine nearest support and resistance
-    def find_nearest_levels(price):
-        # Get all pivot levels
-        levels = {
-            "R3": st.session_state.r3,
-            "R2": st.session_state.r2,
-            "R1": st.session_state.r1,
-            "Pivot": st.session_state.pivot,
-            "S1": st.session_state.s1,
-            "S2": st.session_state.s2,
-            "S3": st.session_state.s3
-        }
-        
-        # Separate into resistance and support
-        resistance_levels = {k: v for k, v in levels.items() if v > price}
-        support_levels = {k: v for k, v in levels.items() if v < price}
-        
-        # Find nearest resistance
-        if resistance_levels:
-            nearest_resistance_name = min(resistance_levels, key=lambda k: abs(levels[k] - price))
-            nearest_resistance = levels[nearest_resistance_name]
-        else:
-            nearest_resistance_name = "None"
-            nearest_resistance = price + 5  # Default if no resistance found
-        
-        # Find nearest support
-        if support_levels:
-            nearest_support_name = min(support_levels, key=lambda k: abs(levels[k] - price))
-            nearest_support = levels[nearest_support_name]
-        else:
-            nearest_support_name = "None"
-            nearest_support = price - 5  # Default if no support found
-        
-        return {
-            "nearest_resistance": nearest_resistance,
-            "nearest_resistance_name": nearest_resistance_name,
-            "nearest_support": nearest_support,
-            "nearest_support_name": nearest_support_name
-        }
-
-    # Get nearest levels
-    nearest_levels = find_nearest_levels(current_price)
+    # Saved pivot levels for the charts
+    saved_levels = saved_pivot_levels()
+    broken_names = {level[0] for level in st.session_state.broken_levels}
+    
+    # Get nearest levels (shared by every session with the same levels)
+    nearest_levels = lookup_nearest_levels(tuple(saved_levels.items()), current_price)
     
     # Display nearest levels
     st.sidebar.markdown(f"**Nearest Resistance:** ${nearest_levels['nearest_resistance']:.2f} ({nearest_levels['nearest_resistance_name']})")
     st.sidebar.markdown(f"**Nearest Support:** ${nearest_levels['nearest_support']:.2f} ({nearest_levels['nearest_support_name']})")
     
-    # Function to automatically determine pivot zone context
-    def determine_pivot_context(price, resistance, resistance_name, support, support_name, trend, broken_levels):
-        # Calculate threshold for "near" (using 0.3% of price as threshold)
-        near_threshold = price * 0.003
-        
-        # Check if any levels have been broken
-        if broken_levels:
-            return "Broken support/resistance", f"Recently broken: {', '.join([level[0] for level in broken_levels])}"
-        
-        # Check distance to nearest levels
-        distance_to_resistance = resistance - price
-        distance_to_support = price - support
-        
-        if trend == "UPTREND":
-            if distance_to_resistance < near_threshold:
-                return "Near bounce zones or reversal levels", f"Price near resistance ({resistance_name}: ${resistance:.2f})"
-            elif distance_to_support < near_threshold:
-                return "PUTs near resistance or CALLs near support", f"CALLs near support ({support_name}: ${support:.2f})"
-            else:
-                return "Mid-range", f"Price in middle zone between {support_name} and {resistance_name}"
-        
-        elif trend == "DOWNTREND":
-            if distance_to_support < near_threshold:
-                return "Near bounce zones or reversal levels", f"Price near support ({support_name}: ${support:.2f})"
-            elif distance_to_resistance < near_threshold:
-                return "PUTs near resistance or CALLs near support", f"PUTs near resistance ({resistance_name}: ${resistance:.2f})"
-            else:
-                return "Mid-range", f"Price in middle zone between {support_name} and {resistance_name}"
-        
-        else:  # NEUTRAL
-            if distance_to_resistance < near_threshold or distance_to_support < near_threshold:
-                return "Near bounce zones or reversal levels", f"Price near pivot level in neutral trend"
-            else:
-                return "Mid-range", f"Price in middle zone in neutral trend"
-
     # Calculate results button
     calculate_button = st.sidebar.button("Calculate Score & Recommendation", type="primary")
 
-    # Function to determine SPY trend
-    def determine_spy_trend(ema8, ema21):
-        if ema8 > ema21:
-            return "UPTREND", 25, "Uptrend detected (8 EMA > 21 EMA)"
-        elif ema8 < ema21:
-            return "DOWNTREND", 25, "Downtrend detected (8 EMA < 21 EMA)"
-        else:
-            return "NEUTRAL", 0, "Neutral trend (8 EMA = 21 EMA)"
-
-    # Function to analyze option chart confirmation
-    def analyze_option_confirmation(trend, call_ema8, call_ema21, put_ema8, put_ema21):
-        if trend == "UPTREND":
-            call_aligned = call_ema8 > call_ema21
-            put_aligned = put_ema8 < put_ema21
-            call_message = "CALL chart aligned ✓" if call_aligned else "CALL chart not aligned ✗"
-            put_message = "PUT chart aligned ✓" if put_aligned else "PUT chart not aligned ✗"
-            
-            if call_aligned and put_aligned:
-                return 25, f"{call_message}, {put_message} - Perfect alignment for UPTREND"
-            elif call_aligned:
-                return 15, f"{call_message}, {put_message} - Partial alignment for UPTREND"
-            else:
-                return 0, f"{call_message}, {put_message} - Poor alignment for UPTREND"
-        
-        elif trend == "DOWNTREND":
-            call_aligned = call_ema8 < call_ema21
-            put_aligned = put_ema8 > put_ema21
-            call_message = "CALL chart aligned ✓" if call_aligned else "CALL chart not aligned ✗"
-            put_message = "PUT chart aligned ✓" if put_aligned else "PUT chart not aligned ✗"
-            
-            if call_aligned and put_aligned:
-                return 25, f"{call_message}, {put_message} - Perfect alignment for DOWNTREND"
-            elif put_aligned:
-                return 15, f"{put_message}, {call_message} - Partial alignment for DOWNTREND"
-            else:
-                return 0, f"{call_message}, {put_message} - Poor alignment for DOWNTREND"
-        
-        else:  # NEUTRAL
-            return 0, "Neutral SPY trend - Option chart alignment not applicable"
-
-    # Function to analyze opposing option divergence
-    def analyze_opposing_option(trend, call_ema8, call_ema21, put_ema8, put_ema21):
-        if trend == "UPTREND":
-            # In uptrend, PUT should be weak (8 EMA < 21 EMA)
-            if put_ema8 < put_ema21:
-                return 15, "PUT options weak as expected in uptrend ✓"
-            elif put_ema8 == put_ema21:
-                return 7.5, "PUT options neutral in uptrend (partial credit) ⚠️"
-            else:
-                return 0, "PUT options strong in uptrend (contradicting signal) ✗"
-        
-        elif trend == "DOWNTREND":
-            # In downtrend, CALL should be weak (8 EMA < 21 EMA)
-            if call_ema8 < call_ema21:
-                return 15, "CALL options weak as expected in downtrend ✓"
-            elif call_ema8 == call_ema21:
-                return 7.5, "CALL options neutral in downtrend (partial credit) ⚠️"
-            else:
-                return 0, "CALL options strong in downtrend (contradicting signal) ✗"
-        
-        else:  # NEUTRAL
-            return 0, "Neutral SPY trend - Opposing option analysis not applicable"
-
-    # Function to analyze EMA gap
-    def analyze_ema_gap(ema8, ema21):
-        gap = abs(ema8 - ema21)
-        
-        if 0.5 <= gap <= 1.0:
-            return 10, f"Ideal EMA gap: {gap:.2f} points ✓"
-        elif gap > 1.0:
-            return -10, f"Overextended EMA gap: {gap:.2f} points ✗"
-        else:  # gap < 0.5
-            return -5, f"Too tight EMA gap: {gap:.2f} points ⚠️"
-
-    # Function to analyze option trend alignment
-    def analyze_option_trend_alignment(trend, call_ema8, call_ema21, put_ema8, put_ema21):
-        call_trend = "UP" if call_ema8 > call_ema21 else "DOWN" if call_ema8 < call_ema21 else "NEUTRAL"
-        put_trend = "UP" if put_ema8 > put_ema21 else "DOWN" if put_ema8 < put_ema21 else "NEUTRAL"
-        
-        if trend == "UPTREND":
-            if call_trend == "UP" and put_trend == "DOWN":
-                return 10, "Both options perfectly aligned with SPY uptrend ✓"
-            elif call_trend == "UP" or put_trend == "DOWN":
-                return 5, "One option aligned with SPY uptrend, one diverging ⚠️"
-            else:
-                return 0, "Neither option aligned with SPY uptrend ✗"
-        
-        elif trend == "DOWNTREND":
-            if call_trend == "DOWN" and put_trend == "UP":
-                return 10, "Both options perfectly aligned with SPY downtrend ✓"
-            elif call_trend == "DOWN" or put_trend == "UP":
-                return 5, "One option aligned with SPY downtrend, one diverging ⚠️"
-            else:
-                return 0, "Neither option aligned with SPY downtrend ✗"
-        
-        else:  # NEUTRAL
-            return 0, "Neutral SPY trend - Option trend alignment not applicable"
-
-    # Function to analyze pivot zone context
-    def analyze_pivot_zone(trend, context, context_description):
-        if trend == "UPTREND":
-            if context == "PUTs near resistance or CALLs near support":
-                return 15, f"CALLs near support - favorable entry point ✓ ({context_description})"
-            elif context == "Broken support/resistance":
-                return 15, f"Broken resistance - favorable for continuation ✓ ({context_description})"
-            elif context == "Mid-range":
-                return 7.5, f"Price in mid-range - moderately favorable ⚠️ ({context_description})"
-            else:  # Near bounce zones
-                return -5, f"Price near potential reversal level - unfavorable ✗ ({context_description})"
-        
-        elif trend == "DOWNTREND":
-            if context == "PUTs near resistance or CALLs near support":
-                return 15, f"PUTs near resistance - favorable entry point ✓ ({context_description})"
-            elif context == "Broken support/resistance":
-                return 15, f"Broken support - favorable for continuation ✓ ({context_description})"
-            elif context == "Mid-range":
-                return 7.5, f"Price in mid-range - moderately favorable ⚠️ ({context_description})"
-            else:  # Near bounce zones
-                return -5, f"Price near potential reversal level - unfavorable ✗ ({context_description})"
-        
-        else:  # NEUTRAL
-            return 0, f"Neutral SPY trend - Pivot zone analysis not applicable ({context_description})"
-
-    # Main calculation function
-    def calculate_score_and_recommendation():
-        # Calculate trend first (needed for context detection)
-        trend, trend_score, trend_msg = determine_spy_trend(spy_ema8, spy_ema21)
-        
-        # Auto-detect pivot zone context
-        pivot_context, context_description = determine_pivot_context(
-            current_price,
-            nearest_levels['nearest_resistance'],
-            nearest_levels['nearest_resistance_name'],
-            nearest_levels['nearest_support'],
-            nearest_levels['nearest_support_name'],
-            trend,
-            st.session_state.broken_levels
-        )
-        
-        # Calculate scores for each pillar
-        option_confirm_score, option_confirm_msg = analyze_option_confirmation(
-            trend, call_ema8, call_ema21, put_ema8, put_ema21
-        )
-        
-        opposing_score, opposing_msg = analyze_opposing_option(
-            trend, call_ema8, call_ema21, put_ema8, put_ema21
-        )
-        
-        ema_gap_score, ema_gap_msg = analyze_ema_gap(spy_ema8, spy_ema21)
-        
-        option_alignment_score, option_alignment_msg = analyze_option_trend_alignment(
-            trend, call_ema8, call_ema21, put_ema8, put_ema21
-        )
-        
-        pivot_score, pivot_msg = analyze_pivot_zone(
-            trend, pivot_context, context_description
-        )
-        
-        # Calculate total score
-        total_score = trend_score + option_confirm_score + opposing_score + ema_gap_score + option_alignment_score + pivot_score
-        
-        # Cap total score at 100
-        total_score = min(100, max(0, total_score))
-        
-        # Determine recommendation
-        if total_score >= 90:
-            if trend == "UPTREND":
-                recommendation = "BUY CALLS"
-                color = "green"
-            elif trend == "DOWNTREND":
-                recommendation = "BUY PUTS"
-                color = "red"
-            else:
-                recommendation = "NO TRADE"
-                color = "orange"
-        elif total_score >= 70:
-            recommendation = "WAIT FOR CONFIRMATION"
-            color = "orange"
-        else:
-            recommendation = "NO TRADE"
-            color = "red"
-        
-        # Create results dictionary
-        results = {
-            "trend": trend,
-            "total_score": total_score,
-            "recommendation": recommendation,
-            "color": color,
-            "pivot_context": pivot_context,
-            "context_description": context_description,
-            "details": [
-                {"category": "1. SPY EMA Trend", "score": trend_score, "message": trend_msg, "weight": "25%"},
-                {"category": "2. Option Chart Confirmation", "score": option_confirm_score, "message": option_confirm_msg, "weight": "25%"},
-                {"category": "3. Opposing Option Divergence", "score": opposing_score, "message": opposing_msg, "weight": "15%"},
-                {"category": "4. EMA Gap Size", "score": ema_gap_score, "message": ema_gap_msg, "weight": "10%"},
-                {"category": "5. Option Trend Alignment", "score": option_alignment_score, "message": option_alignment_msg, "weight": "10%"},
-                {"category": "6. Pivot Zone Context", "score": pivot_score, "message": pivot_msg, "weight": "15%"}
-            ]
-        }
-        
-        return results
+    # Stage timings and a one-rerun profiler
+    with st.sidebar.expander("Diagnostics"):
+        st.checkbox("Record stage metrics", value=METRICS.enabled, key="metrics_enabled")
+        st.button("Profile next rerun", on_click=request_profile)
+        if METRICS.stages:
+            st.code(METRICS.prometheus_text(), language="text")
+        if "profile_report" in st.session_state:
+            st.code(st.session_state.profile_report, language="text")
+        # Hit/miss counts of the caches shared by every session
+        st.markdown("**Shared caches**")
+        st.dataframe(pd.DataFrame(cache_stats()), hide_index=True)
+        st.button("Clear shared caches", on_click=clear_caches)
 
     # Show information before calculation
     if not calculate_button:
@@ -507,104 +377,55 @@ with tab2:
         # Display current pivot levels
         st.subheader("Current Pivot Levels")
         
-        # Calculate trend for the visual (using the default values)
-        default_trend, _, _ = determine_spy_trend(spy_ema8, spy_ema21)
-        
-        # Auto-detect pivot zone context for visualization
-        default_context, default_context_desc = determine_pivot_context(
-            current_price,
-            nearest_levels['nearest_resistance'],
-            nearest_levels['nearest_resistance_name'],
-            nearest_levels['nearest_support'],
-            nearest_levels['nearest_support_name'],
-            default_trend,
-            st.session_state.broken_levels
-        )
-        
-        # Create a figure
-        fig, ax = plt.subplots(figsize=(10, 6))
-        
-        # Price range
-        price_range = [
-            st.session_state.s3,
-            st.session_state.s2,
-            st.session_state.s1,
-            st.session_state.pivot,
-            st.session_state.r1,
-            st.session_state.r2,
-            st.session_state.r3
-        ]
-        labels = ["S3", "S2", "S1", "Pivot", "R1", "R2", "R3"]
-        
-        # Create horizontal lines for each level
-        for i, (price_level, label) in enumerate(zip(price_range, labels)):
-            # Check if this level is in broken_levels
-            is_broken = False
-            for blevel in st.session_state.broken_levels:
-                if blevel[0] == label:
-                    is_broken = True
-                    break
-            
-            if is_broken:
-                # Use dashed line for broken levels
-                ax.axhline(y=price_level, color='orange', linestyle='--', alpha=0.9, linewidth=2)
-                ax.text(0.02, price_level, f"{label}: {price_level:.2f} (BROKEN)", verticalalignment='center', fontweight='bold', color='orange')
-            else:
-                # Use normal colors
-                if label.startswith("R"):
-                    color = "green"
-                elif label.startswith("S"):
-                    color = "red"
-                else:
-                    color = "purple"
-                ax.axhline(y=price_level, color=color, linestyle='-', alpha=0.7, linewidth=2)
-                ax.text(0.02, price_level, f"{label}: {price_level:.2f}", verticalalignment='center', fontweight='bold', color=color)
-        
-        # Highlight current price
-        ax.axhline(y=current_price, color='blue', linestyle='--', linewidth=2)
-        ax.text(0.02, current_price, f"Current: {current_price:.2f}", verticalalignment='center', fontweight='bold', color='blue')
-        
-        # Add context information
-        ax.text(0.5, 0.02, f"Context: {default_context} - {default_context_desc}",
-                transform=ax.transAxes, horizontalalignment='center',
-                fontweight='bold', fontsize=10, color='blue',
-                bbox=dict(facecolor='white', alpha=0.8, edgecolor='blue', boxstyle='round,pad=0.5'))
-        
-        # Set the y-limits to be slightly outside the range of values
-        y_min = min(price_range + [current_price]) - 2
-        y_max = max(price_range + [current_price]) + 2
-        ax.set_ylim(y_min, y_max)
-        
-        # Remove x-axis ticks and labels
-        ax.set_xticks([])
-        ax.set_xticklabels([])
-        
-        # Set title and labels
-        ax.set_title("SPY Pivot Levels with Current Price")
-        ax.set_ylabel("Price")
-        
-        # Display the plot
-        st.pyplot(fig)
+        with METRICS.stage("score.default_context"):
+            # Calculate trend for the visual (using the default values)
+            default_trend, _, _ = determine_spy_trend(spy_ema8, spy_ema21)
+
+            # Auto-detect pivot zone context for visualization
+            default_context, default_context_desc = determine_pivot_context(
+                current_price,
+                nearest_levels['nearest_resistance'],
+                nearest_levels['nearest_resistance_name'],
+                nearest_levels['nearest_support'],
+                nearest_levels['nearest_support_name'],
+                default_trend,
+                st.session_state.broken_levels
+            )
+        
+        # Display the (cached) chart with the current price and context
+        st.image(pivot_chart_png(
+            saved_levels,
+            broken_names=broken_names,
+            current_price=current_price,
+            context_text=f"Context: {default_context} - {default_context_desc}",
+            title="SPY Pivot Levels with Current Price"
+        ), width="stretch")
         
         # Display current pivot levels
-        pivot_data = pd.DataFrame([
-            {"Level": "R3", "Value": st.session_state.r3, "Status": "Broken" if any(x[0] == "R3" for x in st.session_state.broken_levels) else "Active"},
-            {"Level": "R2", "Value": st.session_state.r2, "Status": "Broken" if any(x[0] == "R2" for x in st.session_state.broken_levels) else "Active"},
-            {"Level": "R1", "Value": st.session_state.r1, "Status": "Broken" if any(x[0] == "R1" for x in st.session_state.broken_levels) else "Active"},
-            {"Level": "Pivot", "Value": st.session_state.pivot, "Status": "Broken" if any(x[0] == "Pivot" for x in st.session_state.broken_levels) else "Active"},
-            {"Level": "Current Price", "Value": current_price, "Status": ""},
-            {"Level": "S1", "Value": st.session_state.s1, "Status": "Broken" if any(x[0] == "S1" for x in st.session_state.broken_levels) else "Active"},
-            {"Level": "S2", "Value": st.session_state.s2, "Status": "Broken" if any(x[0] == "S2" for x in st.session_state.broken_levels) else "Active"},
-            {"Level": "S3", "Value": st.session_state.s3, "Status": "Broken" if any(x[0] == "S3" for x in st.session_state.broken_levels) else "Active"}
-        ])
-        st.table(pivot_data)
+        with METRICS.stage("table.pivot_levels"):
+            # Shared by every session with the same levels and price
+            pivot_data = pivot_levels_table(tuple(saved_levels.items()), frozenset(broken_names), current_price)
+            st.table(pivot_data)
         
         # Display detected context
         st.subheader("Auto-Detected Context")
         st.info(f"**{default_context}**: {default_context_desc}")
     else:
         # Calculate scores
-        results = calculate_score_and_recommendation()
+        with METRICS.stage("score.total"):
+            results = score_snapshot(
+                spy_ema8, spy_ema21, call_ema8, call_ema21, put_ema8, put_ema21,
+                current_price, nearest_levels, st.session_state.broken_levels
+            )
+
+        # Journal the evaluation when YETITRADER_JOURNAL names a directory
+        if os.environ.get("YETITRADER_JOURNAL"):
+            journal = open_journal(os.environ["YETITRADER_JOURNAL"])
+            journal.record(
+                results, spy_ema8, spy_ema21, call_ema8, call_ema21, put_ema8, put_ema21,
+                current_price, nearest_levels, st.session_state.broken_levels
+            )
+            journal.flush()
         
         # Display results in columns
         col1, col2 = st.columns([2, 1])
@@ -630,7 +451,8 @@ with tab2:
             st.subheader("Detailed Analysis")
             
             # Create a DataFrame for better display
-            details_df = pd.DataFrame(results['details'])
+            with METRICS.stage("table.details"):
+                details_df = pd.DataFrame(results['details'])
             
             # Format the DataFrame
             for i, row in details_df.iterrows():
@@ -663,10 +485,7 @@ with tab2:
             
             # Create pie chart if there are positive scores
             if sum(filtered_scores) > 0:
-                fig, ax = plt.subplots(figsize=(8, 8))
-                ax.pie(filtered_scores, labels=filtered_labels, autopct='%1.1f%%', startangle=90)
-                ax.axis('equal')
-                st.pyplot(fig)
+                st.image(score_pie_png(filtered_labels, filtered_scores), width="stretch")
             else:
                 st.write("No positive score contributions to display.")
             
@@ -677,74 +496,50 @@ with tab2:
                 "8 EMA": [spy_ema8, call_ema8, put_ema8],
                 "21 EMA": [spy_ema21, call_ema21, put_ema21]
             }
-            ema_df = pd.DataFrame(ema_data)
-            st.table(ema_df)
-            
-            # Create a figure for pivot visualization
-            fig, ax = plt.subplots(figsize=(10, 6))
-            
-            # Price range
-            price_range = [
-                st.session_state.s3,
-                st.session_state.s2,
-                st.session_state.s1,
-                st.session_state.pivot,
-                st.session_state.r1,
-                st.session_state.r2,
-                st.session_state.r3
-            ]
-            labels = ["S3", "S2", "S1", "Pivot", "R1", "R2", "R3"]
+            with METRICS.stage("table.ema_values"):
+                ema_df = pd.DataFrame(ema_data)
+                st.table(ema_df)
             
-            # Create horizontal lines for each level
-            for i, (price_level, label) in enumerate(zip(price_range, labels)):
-                # Check if this level is in broken_levels
-                is_broken = False
-                for blevel in st.session_state.broken_levels:
-                    if blevel[0] == label:
-                        is_broken = True
-                        break
-                
-                if is_broken:
-                    # Use dashed line for broken levels
-                    ax.axhline(y=price_level, color='orange', linestyle='--', alpha=0.9, linewidth=2)
-                    ax.text(0.02, price_level, f"{label}: {price_level:.2f} (BROKEN)", verticalalignment='center', fontweight='bold', color='orange')
-                else:
-                    # Use normal colors
-                    if label.startswith("R"):
-                        color = "green"
-                    elif label.startswith("S"):
-                        color = "red"
-                    else:
-                        color = "purple"
-                    ax.axhline(y=price_level, color=color, linestyle='-', alpha=0.7, linewidth=2)
-                    ax.text(0.02, price_level, f"{label}: {price_level:.2f}", verticalalignment='center', fontweight='bold', color=color)
-            
-            # Highlight current price
-            ax.axhline(y=current_price, color='blue', linestyle='--', linewidth=2)
-            ax.text(0.02, current_price, f"Current: {current_price:.2f}", verticalalignment='center', fontweight='bold', color='blue')
-            
-            # Add context information
-            ax.text(0.5, 0.02, f"Context: {results['pivot_context']}",
-                    transform=ax.transAxes, horizontalalignment='center',
-                    fontweight='bold', fontsize=10, color='blue',
-                    bbox=dict(facecolor='white', alpha=0.8, edgecolor='blue', boxstyle='round,pad=0.5'))
-            
-            # Set the y-limits to be slightly outside the range of values
-            y_min = min(price_range + [current_price]) - 2
-            y_max = max(price_range + [current_price]) + 2
-            ax.set_ylim(y_min, y_max)
-            
-            # Remove x-axis ticks and labels
-            ax.set_xticks([])
-            ax.set_xticklabels([])
-            
-            # Set title and labels
-            ax.set_title("SPY Pivot Levels with Current Price")
-            ax.set_ylabel("Price")
-            
-            # Display the plot
-            st.pyplot(fig)
+            # Display the (cached) pivot chart with the current price
+            st.image(pivot_chart_png(
+                saved_levels,
+                broken_names=broken_names,
+                current_price=current_price,
+                context_text=f"Context: {results['pivot_context']}",
+                title="SPY Pivot Levels with Current Price"
+            ), width="stretch")
+
+    # Score every CALL/PUT pair of an option chain against the SPY trend
+    with st.expander("Option Chain Alignment"):
+        chain_file = st.text_input("Chain file (symbol, expiry, strike, right, ema8, ema21)", value="", key="chain_file")
+        if chain_file and os.path.exists(chain_file):
+            # Reload only when the file changes
+            chain_key = (chain_file, os.path.getmtime(chain_file))
+            if st.session_state.get("option_chain_key") != chain_key:
+                st.session_state.option_chain_key = chain_key
+                try:
+                    st.session_state.option_chain = load_chain(chain_file)
+                except ValueError as e:
+                    st.session_state.option_chain = str(e)
+            chain = st.session_state.option_chain
+            if isinstance(chain, str):
+                st.error(f"Could not load the chain: {chain}")
+            else:
+                if st.session_state.get("ema_feed_path") == bar_file and bar_file:
+                    # Live contract EMAs from the bar feed
+                    chain.refresh(st.session_state.ema_engine)
+                chain_scores = score_chain(chain, spy_ema8, spy_ema21)
+                st.markdown(f"{len(chain)} contracts, {len(chain_scores['call'])} CALL/PUT pairs")
+                st.dataframe(pd.DataFrame(best_pairs(chain, chain_scores, current_price, top=20)))
+
+    end_rerun("fragment.trade_analysis", started, profiler)
+
+with tab2:
+    trade_analysis()
 
 # Footer
 st.markdown("---")
 st.markdown("*Yetitrader 4-Pillar Framework Analyzer - For educational purposes only*")
+
+# Finish the profiled rerun and record the whole rerun's time
+end_rerun("rerun.total", rerun_started, profiler)
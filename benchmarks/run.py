@@ -0,0 +1,380 @@
+# Benchmarks for the 4-pillar scoring pipeline and the Streamlit rerun.
+#
+#     python benchmarks/run.py                    # run all, compare to baseline.json
+#     python benchmarks/run.py --quick            # skip the 10M-row batch
+#     python benchmarks/run.py --only batch       # benchmarks whose name contains "batch"
+#     python benchmarks/run.py --update-baseline  # store these results as the baseline
+#
+# Results are printed (and optionally written with --output) as JSON: one
+# entry per benchmark with seconds per operation, operations per second and
+# peak traced memory. The exit status is 1 when any benchmark is slower or
+# uses more memory than its baseline by more than --tolerance, or has no
+# baseline entry.
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from unittest import mock
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from yetitrader.scoring import (  # noqa: E402
+    LEVEL_NAMES,
+    STATE_COUNT,
+    calculate_score_and_recommendation,
+    determine_pivot_context,
+    find_nearest_levels,
+    score_batch,
+    score_snapshot,
+    score_table,
+)
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+LEVELS = {"R3": 535.00, "R2": 533.50, "R1": 532.00, "Pivot": 530.50, "S1": 529.47, "S2": 528.38, "S3": 527.00}
+NEAREST = find_nearest_levels(530.00, LEVELS)
+
+BENCHMARKS = {}
+
+
+def benchmark(name, quick=True):
+    def register(fn):
+        BENCHMARKS[name] = (fn, quick)
+        return fn
+    return register
+
+
+# Time `fn` (which performs `ops` operations per call) and trace its peak
+# memory. Returns the best of `repeat` timings.
+def measure(fn, ops=1, repeat=5, number=1):
+    fn()
+    gc.collect()
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - started) / number)
+    return {
+        "seconds_per_op": best / ops,
+        "ops_per_s": ops / best,
+        "peak_mem_mb": peak / 1e6,
+    }
+
+
+@benchmark("scalar.calculate_score_and_recommendation")
+def bench_scalar_score():
+    return measure(lambda: calculate_score_and_recommendation(
+        530.87, 531.40, 6.27, 6.97, 1.78, 1.59, 530.00, NEAREST, []), number=2000)
+
+
+@benchmark("scalar.score_snapshot")
+def bench_score_snapshot():
+    return measure(lambda: score_snapshot(
+        530.87, 531.40, 6.27, 6.97, 1.78, 1.59, 530.00, NEAREST, []), number=2000)
+
+
+@benchmark("scalar.find_nearest_levels")
+def bench_find_nearest():
+    return measure(lambda: find_nearest_levels(530.00, LEVELS), number=5000)
+
+
+@benchmark("scalar.determine_pivot_context")
+def bench_pivot_context():
+    return measure(lambda: determine_pivot_context(
+        530.00, NEAREST["nearest_resistance"], NEAREST["nearest_resistance_name"],
+        NEAREST["nearest_support"], NEAREST["nearest_support_name"], "DOWNTREND", []), number=5000)
+
+
+@benchmark("chart.pivot_chart.render")
+def bench_chart_render():
+    from yetitrader.charts import _pivot_chart, pivot_chart_png
+
+    def render():
+        _pivot_chart.cache_clear()
+        pivot_chart_png(LEVELS, ["R1"], 530.00, "Context: Mid-range", "SPY Pivot Levels with Current Price")
+    return measure(render, repeat=3)
+
+
+@benchmark("chart.pivot_chart.cached")
+def bench_chart_cached():
+    from yetitrader.charts import pivot_chart_png
+    return measure(lambda: pivot_chart_png(
+        LEVELS, ["R1"], 530.00, "Context: Mid-range", "SPY Pivot Levels with Current Price"), number=5000)
+
+
+def batch_inputs(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return (
+        rng.normal(530, 1, n), rng.normal(530, 1, n),
+        rng.normal(5, 1, n), rng.normal(5, 1, n),
+        rng.normal(2, 1, n), rng.normal(2, 1, n),
+        rng.normal(530, 3, n), np.array([LEVELS[name] for name in LEVEL_NAMES]),
+    )
+
+
+def bench_batch(n, repeat):
+    inputs = batch_inputs(n)
+    return measure(lambda: score_batch(*inputs), ops=n, repeat=repeat)
+
+
+@benchmark("batch.score_batch.1k")
+def bench_batch_1k():
+    return bench_batch(1_000, 20)
+
+
+@benchmark("batch.score_batch.100k")
+def bench_batch_100k():
+    return bench_batch(100_000, 5)
+
+
+@benchmark("batch.score_batch.10M", quick=False)
+def bench_batch_10m():
+    return bench_batch(10_000_000, 1)
+
+
+# Score table lookups alone (states already packed)
+@benchmark("batch.score_table.lookup.100k")
+def bench_table_lookup():
+    states = np.random.default_rng(0).integers(0, STATE_COUNT, 100_000)
+    table = score_table()
+    return measure(lambda: table.lookup(states), ops=len(states), repeat=5)
+
+
+# One SPY tick stream (one tick a second) folded into 1m/5m/15m/1h bars
+@benchmark("stream.timeframes.update")
+def bench_timeframes():
+    from yetitrader.feeds import Bar
+    from yetitrader.timeframes import MultiTimeframe
+
+    rng = np.random.default_rng(0)
+    prices = 530 + np.cumsum(rng.normal(0, 0.02, 20_000))
+    bars = [Bar(float(t), "SPY", p, p, p, p, 1.0) for t, p in enumerate(prices.tolist())]
+
+    def run():
+        frames = MultiTimeframe()
+        for bar in bars:
+            frames.update(bar)
+    return measure(run, ops=len(bars), repeat=3)
+
+
+# 1,000 setups scored by a Scanner reading the shared-memory bus (a
+# seqlock-checked gather per cycle) while bars are published to it
+@benchmark("stream.bus.scan.1k")
+def bench_bus_scan():
+    from yetitrader.bus import BusReader, BusWriter
+    from yetitrader.scanner import Scanner
+
+    setups = [(f"U{i}", f"C{i}", f"P{i}") for i in range(1_000)]
+    writer = BusWriter("yetitrader-bench", capacity=3 * len(setups))
+    reader = BusReader("yetitrader-bench")
+    rng = np.random.default_rng(0)
+    for setup in setups:
+        for symbol, base in zip(setup, (530, 5, 2)):
+            for price in rng.normal(base, 0.5, 21).tolist():
+                writer.update(symbol, price)
+    scanner = Scanner(setups, [LEVELS[name] for name in LEVEL_NAMES], engine=reader)
+
+    def run():
+        writer.update_rows(scanner.rows[:, 0], rng.normal(530, 0.5, len(setups)))
+        scanner.score()
+    try:
+        return measure(run, ops=len(setups), repeat=5, number=20)
+    finally:
+        del scanner
+        reader.close()
+        writer.close()
+
+
+# One month (5 trading days a week, 390 bars a day) out of a year of minute
+# bars, read back through the memory-mapped column cache
+@benchmark("archive.cached_load.month")
+def bench_archive_load():
+    import shutil
+    import tempfile
+
+    from yetitrader.archive import ArchiveCache, ingest
+
+    rng = np.random.default_rng(0)
+    days = np.busday_offset("2024-01-02", np.arange(252), roll="forward").astype("datetime64[s]").astype(np.int64)
+    timestamps = (days[:, None] + 52_200 + 60 * np.arange(390)).ravel().astype(np.float64)
+    folder = tempfile.mkdtemp()
+    source = os.path.join(folder, "archive.csv")
+    with open(source, "w") as f:
+        f.write("timestamp,spy,call,put\n")
+        np.savetxt(f, np.column_stack([timestamps, 530 + np.cumsum(rng.normal(0, 0.05, len(timestamps))),
+                                       5 + rng.random(len(timestamps)), 2 + rng.random(len(timestamps))]),
+                   fmt="%.2f", delimiter=",")
+    ingest(source, os.path.join(folder, "cache"))
+
+    def run():
+        columns = ArchiveCache(os.path.join(folder, "cache")).load("2024-06-01", "2024-06-30")
+        return float(columns["spy"].sum())
+    try:
+        return measure(run, ops=1, repeat=5, number=20)
+    finally:
+        shutil.rmtree(folder)
+
+
+# Pivot store of 100 symbols x a year of days: a day read through the
+# shared cache (as the app does on every session start) and one symbol's
+# year as arrays (as backtests read it)
+def pivot_store(folder):
+    from yetitrader.store import PivotStore
+
+    store = PivotStore(os.path.join(folder, "pivots.db"))
+    days = np.busday_offset("2024-01-02", np.arange(252), roll="forward").astype(str)
+    values = [LEVELS[name] for name in LEVEL_NAMES]
+    store.save_many((f"S{i}", day, *values, 0, "bench") for i in range(100) for day in days)
+    return store
+
+
+@benchmark("store.get.cached")
+def bench_store_get():
+    import shutil
+    import tempfile
+
+    folder = tempfile.mkdtemp()
+    store = pivot_store(folder)
+    try:
+        return measure(lambda: store.get("S42", "2024-06-03"), number=5000)
+    finally:
+        store.close()
+        shutil.rmtree(folder)
+
+
+@benchmark("store.range.year")
+def bench_store_range():
+    import shutil
+    import tempfile
+
+    folder = tempfile.mkdtemp()
+    store = pivot_store(folder)
+    try:
+        return measure(lambda: store.range("S42", "2024-01-01", "2024-12-31"), number=50)
+    finally:
+        store.close()
+        shutil.rmtree(folder)
+
+
+# Full app3.py runs through Streamlit's AppTest: the first run, a rerun
+# after a sidebar price change, and a rerun that calculates the score
+@benchmark("ui.rerun")
+def bench_ui_rerun():
+    from streamlit.testing.v1 import AppTest
+
+    # Keep benchmark saves out of the real pivot store (for this run only)
+    with mock.patch.dict(os.environ, {"YETITRADER_PIVOT_DB": ":memory:"}):
+        results = {}
+        started = time.perf_counter()
+        app = AppTest.from_file(os.path.join(ROOT, "app3.py"), default_timeout=120).run()
+        results["first_run_s"] = time.perf_counter() - started
+
+        price = app.sidebar.number_input(key="current_price_analysis")
+        timings = []
+        for i in range(5):
+            price.set_value(530.00 + 0.01 * (i + 1))
+            started = time.perf_counter()
+            app.run()
+            timings.append(time.perf_counter() - started)
+        results["price_edit_rerun_s"] = min(timings)
+
+        timings = []
+        for _ in range(3):
+            next(b for b in app.sidebar.button if b.label == "Calculate Score & Recommendation").click()
+            started = time.perf_counter()
+            app.run()
+            timings.append(time.perf_counter() - started)
+        results["calculate_rerun_s"] = min(timings)
+
+        # One more traced rerun for peak memory
+        next(b for b in app.sidebar.button if b.label == "Calculate Score & Recommendation").click()
+        tracemalloc.start()
+        app.run()
+        results["peak_mem_mb"] = tracemalloc.get_traced_memory()[1] / 1e6
+        tracemalloc.stop()
+
+    results["seconds_per_op"] = results["price_edit_rerun_s"]
+    results["ops_per_s"] = 1 / results["price_edit_rerun_s"]
+    return results
+
+
+# Function to list regressions against a baseline (a benchmark without a
+# baseline entry is one too)
+def compare(results, baseline, tolerance):
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base:
+            regressions.append(f"{name}: no baseline entry (run with --update-baseline --only {name})")
+            continue
+        if result["ops_per_s"] < base["ops_per_s"] * (1 - tolerance):
+            regressions.append(f"{name}: {result['ops_per_s']:.4g} ops/s vs baseline {base['ops_per_s']:.4g}")
+        if "peak_mem_mb" in result and "peak_mem_mb" in base and \
+                result["peak_mem_mb"] > base["peak_mem_mb"] * (1 + tolerance) + 0.1:
+            regressions.append(f"{name}: {result['peak_mem_mb']:.4g} MB peak vs baseline {base['peak_mem_mb']:.4g}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the yetitrader benchmarks")
+    parser.add_argument("--quick", action="store_true", help="Skip the slow benchmarks")
+    parser.add_argument("--only", help="Run only benchmarks whose name contains this text")
+    parser.add_argument("--output", help="Also write the JSON results to this file")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name, (fn, quick) in BENCHMARKS.items():
+        if (args.quick and not quick) or (args.only and args.only not in name):
+            continue
+        print(f"running {name}...", file=sys.stderr)
+        results[name] = fn()
+
+    report = {
+        "machine": {"python": platform.python_version(), "numpy": np.__version__,
+                    "platform": platform.platform(), "cpus": os.cpu_count()},
+        "results": results,
+    }
+    text = json.dumps(report, indent=2, sort_keys=True)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+
+    if args.update_baseline:
+        stored = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                stored = json.load(f)
+        stored["machine"] = report["machine"]
+        stored["results"] = {**stored.get("results", {}), **results}
+        with open(args.baseline, "w") as f:
+            json.dump(stored, f, indent=2, sort_keys=True)
+            f.write("\n")
+        return 0
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f)["results"], args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+# Load test for the local scoring service (yetitrader.service).
+#
+#     python benchmarks/service_load.py                          # start a server, 10 s of batch load
+#     python benchmarks/service_load.py --mode single            # one snapshot per request
+#     python benchmarks/service_load.py --batch 5000 --clients 2
+#     python benchmarks/service_load.py --url http://127.0.0.1:8765 --no-server
+#
+# Each client holds one keep-alive connection and sends requests back to
+# back for --duration seconds. Prints request and per-snapshot latency
+# percentiles and throughput as JSON.
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from urllib.parse import urlparse
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LEVELS = {"R3": 535.00, "R2": 533.50, "R1": 532.00, "Pivot": 530.50, "S1": 529.47, "S2": 528.38, "S3": 527.00}
+
+
+# Function to build `count` random snapshots around the default levels
+def make_snapshots(count, seed=0):
+    rng = np.random.default_rng(seed)
+    values = np.round(np.column_stack([
+        rng.normal(530, 1, count), rng.normal(530, 1, count),
+        rng.normal(5, 1, count), rng.normal(5, 1, count),
+        rng.normal(2, 1, count), rng.normal(2, 1, count),
+        rng.normal(530, 3, count),
+    ]), 2)
+    fields = ("spy_ema8", "spy_ema21", "call_ema8", "call_ema21", "put_ema8", "put_ema21", "current_price")
+    return [dict(zip(fields, row)) for row in values.tolist()]
+
+
+async def client(host, port, path, body, deadline, latencies):
+    reader, writer = await asyncio.open_connection(host, port)
+    request = (f"POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+               f"Content-Length: {len(body)}\r\n\r\n").encode() + body
+    try:
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            writer.write(request)
+            status = await reader.readline()
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b""):
+                    break
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":")[1])
+            await reader.readexactly(length)
+            if b" 200 " not in status:
+                raise RuntimeError(f"server answered {status!r}")
+            latencies.append(time.perf_counter() - started)
+    finally:
+        writer.close()
+
+
+async def run_load(host, port, mode, batch, clients, duration, details):
+    if mode == "single":
+        snapshot = make_snapshots(1)[0]
+        path, body, per_request = "/score", json.dumps({**snapshot, "levels": LEVELS}).encode(), 1
+    else:
+        payload = {"snapshots": make_snapshots(batch), "levels": LEVELS, "details": details}
+        path, body, per_request = "/score/batch", json.dumps(payload).encode(), batch
+
+    latencies = []
+    started = time.perf_counter()
+    deadline = started + duration
+    await asyncio.gather(*(client(host, port, path, body, deadline, latencies) for _ in range(clients)))
+    elapsed = time.perf_counter() - started
+
+    latencies = np.array(latencies) * 1000
+    p50, p90, p99 = np.percentile(latencies, [50, 90, 99])
+    return {
+        "mode": mode,
+        "snapshots_per_request": per_request,
+        "clients": clients,
+        "requests": len(latencies),
+        "requests_per_s": len(latencies) / elapsed,
+        "snapshots_per_s": len(latencies) * per_request / elapsed,
+        "request_p50_ms": p50,
+        "request_p90_ms": p90,
+        "request_p99_ms": p99,
+        "snapshot_p50_ms": p50 / per_request,
+    }
+
+
+# Function to wait until the service accepts connections
+def wait_for_server(host, port, timeout=15.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection((host, port), timeout=1.0).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"scoring service did not start on {host}:{port}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the local scoring service")
+    parser.add_argument("--url", default="http://127.0.0.1:8765")
+    parser.add_argument("--no-server", action="store_true", help="Use an already running service")
+    parser.add_argument("--mode", choices=("batch", "single"), default="batch")
+    parser.add_argument("--batch", type=int, default=1000, help="Snapshots per batch request")
+    parser.add_argument("--clients", type=int, default=4, help="Concurrent keep-alive connections")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of load")
+    parser.add_argument("--no-details", action="store_true", help="Ask batch results without messages")
+    args = parser.parse_args(argv)
+
+    url = urlparse(args.url)
+    server = None
+    if not args.no_server:
+        server = subprocess.Popen([sys.executable, "-m", "yetitrader.service", "--host", url.hostname,
+                                   "--port", str(url.port)], cwd=ROOT, stdout=subprocess.DEVNULL)
+    try:
+        wait_for_server(url.hostname, url.port)
+        result = asyncio.run(run_load(url.hostname, url.port, args.mode, args.batch, args.clients,
+                                      args.duration, not args.no_details))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+import numpy as np
+
+from yetitrader.archive import ArchiveCache, ingest
+
+
+def write_csv(path, timestamps):
+    with open(path, "w") as f:
+        f.write("timestamp,spy\n")
+        for i, timestamp in enumerate(timestamps):
+            f.write(f"{timestamp},{530 + 0.01 * i:.2f}\n")
+
+
+def test_ingest_many_chunks_from_one_day(tmp_path):
+    # 30 quotes of 2024-01-02, then 15 of 2024-01-03, read 10 rows at a time
+    day = np.datetime64("2024-01-02", "s").astype(np.int64)
+    timestamps = [day + 52_200 + i for i in range(30)] + [day + 86_400 + 52_200 + i for i in range(15)]
+    source = tmp_path / "quotes.csv"
+    write_csv(source, timestamps)
+
+    ingest(str(source), str(tmp_path / "cache"), chunksize=10)
+    cache = ArchiveCache(str(tmp_path / "cache"))
+
+    assert cache.days().tolist() == np.array(["2024-01-02", "2024-01-03"], dtype="datetime64[D]").tolist()
+    assert cache.row_range("2024-01-02", "2024-01-02") == (0, 30)
+    assert cache.row_range("2024-01-03", "2024-01-03") == (30, 45)
+    assert len(cache.load("2024-01-03", "2024-01-03")["spy"]) == 15
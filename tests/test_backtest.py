@@ -0,0 +1,27 @@
+import numpy as np
+
+from yetitrader.backtest import ema_series
+from yetitrader.ema import StreamingEMA
+
+
+def streaming(values, period):
+    engine = StreamingEMA(periods=(period,))
+    return np.array([engine.update("X", value)[0] for value in values])
+
+
+def test_ema_series_matches_streaming():
+    values = 530 + np.cumsum(np.random.default_rng(0).normal(0, 0.1, 1000))
+    for period in (8, 21):
+        np.testing.assert_allclose(ema_series(values, period), streaming(values, period), rtol=1e-12)
+
+
+def test_ema_series_nan_in_block_does_not_leak_backwards():
+    values = 530 + np.cumsum(np.random.default_rng(1).normal(0, 0.1, 600))
+    values[300] = np.nan
+    ema = ema_series(values, 8)
+    clean = ema_series(values[:300], 8)
+
+    np.testing.assert_allclose(ema[:300], clean, rtol=1e-12)
+    assert np.isfinite(ema[:300]).all()
+    assert np.isnan(ema[300:]).all()
+    np.testing.assert_allclose(ema, streaming(values, 8), rtol=1e-12)
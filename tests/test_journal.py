@@ -0,0 +1,38 @@
+import numpy as np
+
+from yetitrader.journal import decode_record, encode_batch, encode_result
+from yetitrader.scoring import LEVEL_NAMES, calculate_score_and_recommendation, find_nearest_levels, score_batch
+
+LEVELS = {"R3": 535.00, "R2": 533.50, "R1": 532.00, "Pivot": 530.50, "S1": 529.47, "S2": 528.38, "S3": 527.00}
+
+# SPY downtrend with NaN EMAs on the CALL, the PUT or both
+SNAPSHOTS = [
+    (530.87, 531.40, np.nan, np.nan, 1.78, 1.59, 530.00),
+    (530.87, 531.40, 6.27, 6.97, np.nan, np.nan, 530.00),
+    (531.40, 530.87, np.nan, 6.97, 1.78, np.nan, 531.00),
+]
+
+
+def assert_same(decoded, expected):
+    assert decoded["trend"] == expected["trend"]
+    assert decoded["recommendation"] == expected["recommendation"]
+    assert decoded["total_score"] == expected["total_score"]
+    for got, want in zip(decoded["details"], expected["details"]):
+        assert (got["score"], got["message"]) == (want["score"], want["message"])
+
+
+def test_nan_emas_round_trip_through_a_record():
+    for *emas, price in SNAPSHOTS:
+        nearest = find_nearest_levels(price, LEVELS)
+        expected = calculate_score_and_recommendation(*emas, price, nearest, [])
+        record = encode_result(expected, *emas, price, nearest, [])
+        assert_same(decode_record(record[0]), expected)
+
+
+def test_nan_emas_round_trip_through_a_batch():
+    columns = np.array(SNAPSHOTS).T
+    scores = score_batch(*columns, np.array([LEVELS[name] for name in LEVEL_NAMES]))
+    records = encode_batch(scores, *columns, 0.0, "")
+    for record, (*emas, price) in zip(records, SNAPSHOTS):
+        expected = calculate_score_and_recommendation(*emas, price, find_nearest_levels(price, LEVELS), [])
+        assert_same(decode_record(record), expected)
@@ -0,0 +1,19 @@
+import pandas as pd
+
+from yetitrader.store import PivotStore, import_file
+
+
+def test_import_parquet_with_missing_broken(tmp_path):
+    levels = {"R3": 535.0, "R2": 533.5, "R1": 532.0, "Pivot": 530.5, "S1": 529.47, "S2": 528.38, "S3": 527.0}
+    frame = pd.DataFrame([
+        {"symbol": "SPY", "date": "2024-01-02", **levels, "broken": "R1;S2"},
+        {"symbol": "SPY", "date": "2024-01-03", **levels, "broken": None},
+    ])
+    path = str(tmp_path / "levels.parquet")
+    frame.to_parquet(path)
+
+    store = PivotStore(str(tmp_path / "pivots.db"))
+    assert import_file(store, path) == 2
+    assert store.get("SPY", "2024-01-02") == (levels, ["R1", "S2"])
+    assert store.get("SPY", "2024-01-03") == (levels, [])
+    store.close()
@@ -0,0 +1,6 @@
+# Yetitrader 4-Pillar Framework core (scoring, data and tooling behind app3.py)
+#
+# Submodules are not imported here: workers and CLIs import only what they
+# use, and the scoring core (scoring, levels, pivots, ema, backtest) needs
+# nothing heavier than NumPy. pandas and matplotlib are imported lazily by
+# the few functions that need them.
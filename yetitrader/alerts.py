@@ -0,0 +1,227 @@
+import json
+import queue
+import re
+import socket
+import threading
+import time
+import urllib.request
+from collections import namedtuple
+
+import numpy as np
+
+from yetitrader.scoring import CONTEXTS, RECOMMENDATIONS, TRENDS
+
+# Score fields rules can test, and the names behind the coded ones
+FIELDS = (
+    "total_score", "trend", "recommendation", "pivot_context", "price",
+    "trend_score", "option_confirm_score", "opposing_score", "ema_gap_score",
+    "option_alignment_score", "pivot_score",
+)
+CODED_FIELDS = {"trend": TRENDS, "recommendation": RECOMMENDATIONS, "pivot_context": CONTEXTS}
+
+OPERATORS = (">=", "<=", ">", "<", "==", "!=")
+GE, LE, GT, LT, EQ, NE = range(6)
+
+# One alert rule: every clause (field, operator, value) must hold. The
+# first clause is the trigger: after firing, a rule re-arms for a symbol
+# only once the trigger clears by `hysteresis`. `debounce` is the number of
+# consecutive updates the clauses must hold before firing, and `cooldown`
+# the minimum number of seconds between two alerts for one symbol.
+Rule = namedtuple("Rule", ["name", "clauses", "debounce", "hysteresis", "cooldown"],
+                  defaults=(1, 0.0, 0.0))
+
+Alert = namedtuple("Alert", ["timestamp", "rule", "symbol", "value", "total_score",
+                             "trend", "recommendation", "pivot_context"])
+
+_CLAUSE = re.compile(r"^\s*(\w+)\s*(>=|<=|==|!=|>|<)\s*(.+?)\s*$")
+
+
+# Function to parse a rule such as
+#   "calls: total_score >= 90 and trend == UPTREND"
+#   "broken: pivot_context == Broken support/resistance | cooldown=300"
+# Options after "|" set debounce, hysteresis and cooldown.
+def parse_rule(text):
+    text, _, options = text.partition("|")
+    name, _, body = text.partition(":")
+    if not body:
+        name, body = text.strip(), text
+    clauses = []
+    for part in re.split(r"\s+and\s+", body.strip()):
+        match = _CLAUSE.match(part)
+        if match is None:
+            raise ValueError(f"cannot parse rule clause {part!r}")
+        field, op, value = match.groups()
+        clauses.append((field, op, value.strip("'\"")))
+    settings = {}
+    for option in options.split():
+        key, _, value = option.partition("=")
+        settings[key] = int(value) if key == "debounce" else float(value)
+    return Rule(name.strip(), tuple(clauses), **settings)
+
+
+# Function to read one rule per line from a file ('#' starts a comment)
+def load_rules(path):
+    with open(path) as f:
+        return [parse_rule(line) for line in f if line.strip() and not line.lstrip().startswith("#")]
+
+
+# Rule engine over a fixed list of symbols. Rules are compiled into padded
+# (rules, clauses) arrays, so each update is a fixed number of array
+# operations over a (rules, clauses, symbols) block: adding rules makes the
+# arrays taller, not the Python loop longer. State (armed flag, debounce
+# streak, last fire time) is kept per rule and symbol.
+class AlertEngine:
+    def __init__(self, rules, symbols, sinks=()):
+        self.rules = list(rules)
+        self.symbols = list(symbols)
+        self.sinks = list(sinks)
+        self._compile()
+        shape = (len(self.rules), len(self.symbols))
+        self.armed = np.ones(shape, dtype=bool)
+        self.streak = np.zeros(shape, dtype=np.int32)
+        self.last_fired = np.full(shape, -np.inf)
+        self.fired = 0
+
+    def _compile(self):
+        width = max([len(rule.clauses) for rule in self.rules] or [1])
+        count = len(self.rules)
+        self.fields = sorted({field for rule in self.rules for field, _, _ in rule.clauses}, key=FIELDS.index)
+        self.field_idx = np.zeros((count, width), dtype=np.intp)
+        self.ops = np.full((count, width), -1, dtype=np.int8)  # -1 pads with "always true"
+        self.thresholds = np.zeros((count, width))
+        for r, rule in enumerate(self.rules):
+            for c, (field, op, value) in enumerate(rule.clauses):
+                if field not in FIELDS:
+                    raise ValueError(f"rule {rule.name!r}: unknown field {field!r}")
+                if op not in OPERATORS:
+                    raise ValueError(f"rule {rule.name!r}: unknown operator {op!r}")
+                names = CODED_FIELDS.get(field)
+                if names is not None:
+                    if value not in names:
+                        raise ValueError(f"rule {rule.name!r}: {field} must be one of {names}")
+                    value = names.index(value)
+                self.field_idx[r, c] = self.fields.index(field)
+                self.ops[r, c] = OPERATORS.index(op)
+                self.thresholds[r, c] = float(value)
+        # Comparisons become one signed difference test: sign * (value -
+        # threshold) >= 0 (or > 0 when strict); padding has sign 0 and so
+        # always holds. == and != test the difference for zero instead.
+        ops = self.ops
+        self.sign = np.select([(ops == GE) | (ops == GT), (ops == LE) | (ops == LT)], [1.0, -1.0], 0.0)[:, :, None]
+        self.strict = ((ops == GT) | (ops == LT))[:, :, None]
+        self.equality = ((ops == EQ) | (ops == NE))[:, :, None]
+        self.negate = (ops == NE)[:, :, None]
+        self.debounce = np.array([rule.debounce for rule in self.rules], dtype=np.int32)[:, None]
+        self.hysteresis = np.array([rule.hysteresis for rule in self.rules])[:, None]
+        self.cooldown = np.array([rule.cooldown for rule in self.rules])[:, None]
+
+    # Evaluate every rule for every symbol against one scoring update (a
+    # score_batch-style dict of (n,) arrays, optionally with a `valid`
+    # mask). Fires and returns the new alerts.
+    def update(self, scores, now=None):
+        now = time.time() if now is None else now
+        if not self.rules:
+            return []
+        values = np.stack([np.asarray(scores[field], dtype=np.float64) for field in self.fields])
+        block = values[self.field_idx]  # (rules, clauses, symbols)
+        difference = block - self.thresholds[:, :, None]
+        signed = difference * self.sign
+        holds = np.where(self.equality, (difference == 0) != self.negate,
+                         np.where(self.strict, signed > 0, signed >= 0)).all(axis=1)
+        if "valid" in scores:
+            holds &= scores["valid"]
+
+        # Re-arm once the trigger clause has cleared by the hysteresis band
+        trigger = block[:, 0]
+        cleared = np.where(self.equality[:, 0], (difference[:, 0] == 0) == self.negate[:, 0],
+                           signed[:, 0] < -self.hysteresis)
+        self.armed |= cleared & ~holds
+
+        self.streak = np.where(holds, self.streak + 1, 0)
+        fire = holds & self.armed & (self.streak >= self.debounce) & (now - self.last_fired >= self.cooldown)
+        if not fire.any():
+            return []
+        self.armed &= ~fire
+        self.last_fired[fire] = now
+
+        alerts = [self._alert(now, r, i, trigger[r, i], scores) for r, i in zip(*np.nonzero(fire))]
+        self.fired += len(alerts)
+        for sink in self.sinks:
+            sink.send(alerts)
+        return alerts
+
+    def _alert(self, now, r, i, value, scores):
+        return Alert(
+            now, self.rules[r].name, self.symbols[i], float(value), float(scores["total_score"][i]),
+            TRENDS[scores["trend"][i]], RECOMMENDATIONS[scores["recommendation"][i]],
+            CONTEXTS[scores["pivot_context"][i]],
+        )
+
+
+# Function to serialize an alert as one JSON line
+def alert_json(alert):
+    return json.dumps(alert._asdict(), separators=(",", ":"))
+
+
+# Appends alerts to a file as JSON lines
+class FileSink:
+    def __init__(self, path):
+        self.file = open(path, "a")
+
+    def send(self, alerts):
+        self.file.write("".join(alert_json(alert) + "\n" for alert in alerts))
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+# Sends each alert as one datagram to a Unix socket. Alerts are dropped
+# (and counted) while nothing is listening, so a tick never blocks.
+class UnixSocketSink:
+    def __init__(self, path):
+        self.path = path
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self.sock.setblocking(False)
+        self.dropped = 0
+
+    def send(self, alerts):
+        for alert in alerts:
+            try:
+                self.sock.sendto(alert_json(alert).encode(), self.path)
+            except OSError:
+                self.dropped += 1
+
+    def close(self):
+        self.sock.close()
+
+
+# POSTs alerts as a JSON list to a local URL from a background thread, so
+# a slow or missing receiver never delays scoring
+class WebhookSink:
+    def __init__(self, url, timeout=2.0):
+        self.url = url
+        self.timeout = timeout
+        self.queue = queue.Queue()
+        self.failed = 0
+        self.thread = threading.Thread(target=self._run, name="yetitrader-webhook", daemon=True)
+        self.thread.start()
+
+    def send(self, alerts):
+        self.queue.put([alert._asdict() for alert in alerts])
+
+    def _run(self):
+        while True:
+            payload = self.queue.get()
+            if payload is None:
+                return
+            request = urllib.request.Request(self.url, data=json.dumps(payload).encode(),
+                                             headers={"Content-Type": "application/json"})
+            try:
+                urllib.request.urlopen(request, timeout=self.timeout).close()
+            except OSError:
+                self.failed += 1
+
+    def close(self):
+        self.queue.put(None)
+        self.thread.join()
@@ -0,0 +1,295 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import struct
+
+import numpy as np
+
+# Default cache root, overridable with YETITRADER_ARCHIVE_CACHE
+DEFAULT_ROOT = os.path.join(os.path.expanduser("~"), ".yetitrader", "archives")
+
+MANIFEST = "manifest.json"
+VERSION = 1
+
+# Column files get a fixed-size .npy header, so it can be rewritten with
+# the final row count once every chunk has been appended
+HEADER_SIZE = 128
+
+
+# Function to build a .npy (version 1.0) header of exactly HEADER_SIZE bytes
+def _npy_header(dtype, rows):
+    header = repr({"descr": np.lib.format.dtype_to_descr(dtype), "fortran_order": False, "shape": (rows,)})
+    header = header.ljust(HEADER_SIZE - 11) + "\n"
+    return b"\x93NUMPY\x01\x00" + struct.pack("<H", len(header)) + header.encode("latin1")
+
+
+# Function to convert a timestamp column (epoch seconds or date/time
+# strings) to float64 epoch seconds. Naive date/times are taken as UTC.
+def epoch_seconds(values):
+    import pandas as pd
+
+    values = pd.Series(values)
+    if pd.api.types.is_numeric_dtype(values):
+        return values.to_numpy(dtype=np.float64)
+    times = pd.to_datetime(values)
+    if times.dt.tz is not None:
+        times = times.dt.tz_convert("UTC").dt.tz_localize(None)
+    return times.to_numpy().astype("datetime64[ns]").astype(np.int64) / 1e9
+
+
+# Function to get the UTC calendar day of epoch seconds
+def epoch_days(seconds):
+    return (np.asarray(seconds) // 86400).astype(np.int64).astype("datetime64[D]")
+
+
+# Appends chunks to one .npy column file; the header is finalized on close
+class _ColumnWriter:
+    def __init__(self, path, dtype):
+        self.dtype = np.dtype(dtype)
+        self.rows = 0
+        self.file = open(path, "wb")
+        self.file.write(_npy_header(self.dtype, 0))
+
+    def append(self, values):
+        np.ascontiguousarray(values, dtype=self.dtype).tofile(self.file)
+        self.rows += len(values)
+
+    def close(self):
+        self.file.seek(0)
+        self.file.write(_npy_header(self.dtype, self.rows))
+        self.file.close()
+
+
+# One partition (all rows, or one symbol's rows) of a cache being written:
+# a column file per field plus the day -> first row index
+class _PartitionWriter:
+    def __init__(self, directory, dtypes):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.writers = {name: _ColumnWriter(os.path.join(directory, f"{name}.npy"), dtype)
+                        for name, dtype in dtypes.items()}
+        self.rows = 0
+        self.days = []
+        self.offsets = []
+        self.last_day = None
+        self.last_timestamp = -np.inf
+
+    def append(self, columns):
+        timestamps = columns["timestamp"]
+        if not len(timestamps):
+            return
+        if timestamps[0] < self.last_timestamp or (np.diff(timestamps) < 0).any():
+            raise ValueError("archive rows must be in time order (per symbol when partitioned)")
+        days = epoch_days(timestamps)
+        starts = np.flatnonzero(np.r_[True, days[1:] != days[:-1]])
+        if days[0] == self.last_day:
+            starts = starts[1:]
+        self.days.append(days[starts])
+        self.offsets.append(starts + self.rows)
+        for name, writer in self.writers.items():
+            writer.append(columns[name])
+        self.rows += len(timestamps)
+        self.last_day = days[-1]
+        self.last_timestamp = timestamps[-1]
+
+    def close(self):
+        for writer in self.writers.values():
+            writer.close()
+        days = np.concatenate(self.days) if self.days else np.empty(0, dtype="datetime64[D]")
+        offsets = np.concatenate(self.offsets + [[self.rows]]).astype(np.int64)
+        np.save(os.path.join(self.directory, "_days.npy"), days)
+        np.save(os.path.join(self.directory, "_offsets.npy"), offsets)
+        return self.rows
+
+
+# Function to read a CSV or parquet file in chunks of DataFrames
+def _read_chunks(path, chunksize):
+    import pandas as pd
+
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunksize)
+
+
+# Function to describe a source file, to tell whether a cache is current
+def _source_stamp(path):
+    info = os.stat(path)
+    return {"source": os.path.abspath(path), "size": info.st_size, "mtime_ns": info.st_mtime_ns}
+
+
+# Function to build a column cache for a CSV/parquet history in one chunked
+# pass. Numeric columns are stored as float64 (bool stays bool) and the
+# timestamp column as float64 epoch seconds; other text columns are left
+# out. With `symbol_column`, every symbol gets its own partition, so one
+# symbol's date range is a contiguous slice. Rows must be in time order
+# (per symbol). The cache is written next to `directory` and swapped in
+# when complete.
+def ingest(source, directory, symbol_column=None, timestamp_column="timestamp", chunksize=1_000_000):
+    building = directory + ".building"
+    shutil.rmtree(building, ignore_errors=True)
+    os.makedirs(building)
+
+    dtypes = None
+    skipped = []
+    partitions = {}
+    for chunk in _read_chunks(source, chunksize):
+        if dtypes is None:
+            dtypes = {"timestamp": np.dtype(np.float64)}
+            for name in chunk.columns:
+                if name in (timestamp_column, symbol_column):
+                    continue
+                if chunk[name].dtype == bool:
+                    dtypes[name] = np.dtype(bool)
+                elif np.issubdtype(chunk[name].dtype, np.number):
+                    dtypes[name] = np.dtype(np.float64)
+                else:
+                    skipped.append(name)
+        columns = {name: chunk[name].to_numpy() for name in dtypes if name != "timestamp"}
+        columns["timestamp"] = epoch_seconds(chunk[timestamp_column])
+
+        if symbol_column is None:
+            groups = {"": slice(None)}
+        else:
+            groups = chunk.groupby(symbol_column, sort=False).indices
+        for symbol, rows in groups.items():
+            symbol = str(symbol)
+            if symbol not in partitions:
+                partitions[symbol] = _PartitionWriter(os.path.join(building, f"p{len(partitions):05d}"), dtypes)
+            partitions[symbol].append({name: values[rows] for name, values in columns.items()})
+
+    manifest = {
+        "version": VERSION,
+        **_source_stamp(source),
+        "symbol_column": symbol_column,
+        "timestamp_column": timestamp_column,
+        "columns": {name: dtype.str for name, dtype in (dtypes or {}).items()},
+        "skipped": skipped,
+        "partitions": {symbol: {"dir": os.path.basename(writer.directory), "rows": writer.close()}
+                       for symbol, writer in partitions.items()},
+    }
+    with open(os.path.join(building, MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=1)
+    shutil.rmtree(directory, ignore_errors=True)
+    os.replace(building, directory)
+    return manifest
+
+
+# A built column cache. Columns are memory-mapped on first use and every
+# slice is a view of the mapped file, so a date range or symbol goes to the
+# vectorized scorer without being copied or parsed.
+class ArchiveCache:
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, MANIFEST)) as f:
+            self.manifest = json.load(f)
+        self.columns = tuple(self.manifest["columns"])
+        self._arrays = {}
+
+    def symbols(self):
+        return [symbol for symbol in self.manifest["partitions"] if symbol]
+
+    def _partition(self, symbol):
+        partitions = self.manifest["partitions"]
+        if self.manifest["symbol_column"] is None:
+            symbol = ""
+        elif symbol is None:
+            raise KeyError(f"{self.directory} is partitioned by {self.manifest['symbol_column']}; pass a symbol")
+        if symbol not in partitions:
+            raise KeyError(f"no rows for symbol {symbol!r} in {self.directory}")
+        return partitions[symbol]
+
+    def _array(self, partition, name):
+        key = (partition["dir"], name)
+        if key not in self._arrays:
+            path = os.path.join(self.directory, partition["dir"], f"{name}.npy")
+            if name.startswith("_"):
+                self._arrays[key] = np.load(path)
+            elif partition["rows"]:
+                self._arrays[key] = np.load(path, mmap_mode="r")
+            else:
+                self._arrays[key] = np.empty(0, dtype=self.manifest["columns"][name])
+        return self._arrays[key]
+
+    # Days with rows (datetime64[D]) for the whole cache or one symbol
+    def days(self, symbol=None):
+        return self._array(self._partition(symbol), "_days")
+
+    # First and past-the-end row of the days between start and end
+    # (inclusive; either may be None)
+    def row_range(self, start=None, end=None, symbol=None):
+        partition = self._partition(symbol)
+        days, offsets = self._array(partition, "_days"), self._array(partition, "_offsets")
+        lo = 0 if start is None else int(offsets[np.searchsorted(days, np.datetime64(start, "D"), "left")])
+        hi = partition["rows"] if end is None else int(offsets[np.searchsorted(days, np.datetime64(end, "D"), "right")])
+        return lo, max(lo, hi)
+
+    # Columns (all, or the named ones) for a date range and symbol as
+    # {name: read-only array view}
+    def load(self, start=None, end=None, symbol=None, columns=None):
+        partition = self._partition(symbol)
+        lo, hi = self.row_range(start, end, symbol)
+        return {name: self._array(partition, name)[lo:hi] for name in (columns or self.columns)}
+
+
+# Function to get the default cache directory of a source file
+def cache_dir(source):
+    root = os.environ.get("YETITRADER_ARCHIVE_CACHE") or DEFAULT_ROOT
+    path = os.path.abspath(source)
+    digest = hashlib.sha1(path.encode()).hexdigest()[:12]
+    return os.path.join(root, f"{os.path.basename(path)}-{digest}")
+
+
+# Function to open the cache of a source file, building it first when it
+# is missing or the source has changed since (size or mtime)
+def open_archive(source, directory=None, symbol_column=None, timestamp_column="timestamp",
+                 chunksize=1_000_000, rebuild=False):
+    directory = directory or cache_dir(source)
+    manifest_path = os.path.join(directory, MANIFEST)
+    if not rebuild and os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        current = _source_stamp(source)
+        if (manifest.get("version") == VERSION and manifest["symbol_column"] == symbol_column
+                and manifest["timestamp_column"] == timestamp_column
+                and all(manifest[key] == current[key] for key in current)):
+            return ArchiveCache(directory)
+    ingest(source, directory, symbol_column, timestamp_column, chunksize)
+    return ArchiveCache(directory)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or inspect memory-mapped column caches of history files")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("ingest", help="Build (or rebuild) the cache of a CSV/parquet file")
+    build.add_argument("source")
+    build.add_argument("--cache-dir", help="Cache directory (default under $YETITRADER_ARCHIVE_CACHE)")
+    build.add_argument("--symbol-column", help="Partition rows by this column")
+    build.add_argument("--timestamp-column", default="timestamp")
+    build.add_argument("--chunksize", type=int, default=1_000_000, help="Rows parsed per chunk")
+    info = commands.add_parser("info", help="Describe the cache of a source file")
+    info.add_argument("source")
+    info.add_argument("--cache-dir")
+    args = parser.parse_args(argv)
+
+    directory = args.cache_dir or cache_dir(args.source)
+    if args.command == "ingest":
+        ingest(args.source, directory, args.symbol_column, args.timestamp_column, args.chunksize)
+    cache = ArchiveCache(directory)
+    manifest = cache.manifest
+    print(f"{manifest['source']} -> {directory}")
+    print(f"columns: {', '.join(cache.columns)}" + (f" (skipped {', '.join(manifest['skipped'])})"
+                                                     if manifest["skipped"] else ""))
+    for symbol, partition in manifest["partitions"].items():
+        days = cache.days(symbol or None)
+        span = f"{days[0]} .. {days[-1]}" if len(days) else "empty"
+        print(f"  {symbol or '(all rows)':<24} {partition['rows']:>12} rows  {len(days):>5} days  {span}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+import argparse
+
+import numpy as np
+
+from yetitrader.archive import epoch_days, open_archive
+from yetitrader.pivots import METHODS, period_ids, prior_period_pivots
+from yetitrader.scoring import (
+    BUY_CALLS,
+    BUY_PUTS,
+    DEFAULT_PARAMS,
+    LEVEL_NAMES,
+    NO_TRADE,
+    RECOMMENDATIONS,
+    nearest_levels_batch,
+    score_batch,
+)
+from yetitrader.store import PivotStore
+
+DEFAULT_HORIZONS = (5, 15, 30, 60)
+NEAREST_KEYS = ("nearest_resistance", "nearest_resistance_idx", "nearest_support", "nearest_support_idx")
+
+
+# EMA over a whole series without a per-bar Python loop. Bars are split into
+# fixed-size blocks: each block is one matrix product against a triangular
+# decay kernel, and only the block carries are chained sequentially. Seeded
+# with the first value, so it matches StreamingEMA fed bar by bar: from the
+# first missing (non-finite) bar on the EMA is NaN. Only the bars before it
+# enter the matrix product, so it cannot leak into earlier bars of its block.
+def ema_series(values, period, block=256):
+    x = np.asarray(values, dtype=np.float64)
+    missing = np.flatnonzero(~np.isfinite(x))
+    if len(missing):
+        out = np.full(len(x), np.nan)
+        out[:missing[0]] = ema_series(x[:missing[0]], period, block)
+        return out
+    n = len(x)
+    if n == 0:
+        return x.copy()
+
+    alpha = 2.0 / (period + 1.0)
+    decay = 1.0 - alpha
+    k = np.arange(block)
+    lag = k[:, None] - k[None, :]
+    kernel = np.where(lag >= 0, alpha * decay ** np.maximum(lag, 0), 0.0)
+    carry_decay = decay ** (k + 1)
+
+    blocks = -(-n // block)
+    padded = np.empty(blocks * block)
+    padded[:n] = x
+    padded[n:] = x[-1]
+    partial = padded.reshape(blocks, block) @ kernel.T
+
+    # Chain block carries: the EMA entering block b is the last value of b-1
+    carries = np.empty(blocks)
+    carry = x[0]
+    full_decay = decay ** block
+    for b in range(blocks):
+        carries[b] = carry
+        carry = partial[b, -1] + full_decay * carry
+
+    out = partial + carries[:, None] * carry_decay[None, :]
+    return out.ravel()[:n]
+
+
+# Indices where the recommendation switches into BUY CALLS or BUY PUTS
+def signal_entries(recommendation):
+    rec = np.asarray(recommendation)
+    previous = np.empty_like(rec)
+    previous[0] = NO_TRADE
+    previous[1:] = rec[:-1]
+    is_buy = (rec == BUY_CALLS) | (rec == BUY_PUTS)
+    return np.flatnonzero(is_buy & (rec != previous))
+
+
+# Forward returns of `prices` from each entry, NaN when the horizon runs off
+# the end of the data or (with `session`) into a different session
+def forward_returns(prices, entries, horizon, session=None):
+    prices = np.asarray(prices, dtype=np.float64)
+    exits = entries + horizon
+    valid = exits < len(prices)
+    safe_exits = np.where(valid, exits, entries)
+    if session is not None:
+        session = np.asarray(session)
+        valid &= session[safe_exits] == session[entries]
+    returns = prices[safe_exits] / prices[entries] - 1.0
+    return np.where(valid, returns, np.nan)
+
+
+# Everything in a backtest that does not depend on ScoringParams: EMAs,
+# nearest levels and forward returns of SPY/CALL/PUT from every bar.
+# `levels` is (7,) or (n, 7) in LEVEL_NAMES order; `session` (e.g.
+# trading-day ids) stops forward returns from crossing sessions.
+def prepare_backtest(spy_close, call_close, put_close, levels, broken=False,
+                     timestamps=None, session=None, horizons=DEFAULT_HORIZONS):
+    spy_close = np.asarray(spy_close, dtype=np.float64)
+    call_close = np.asarray(call_close, dtype=np.float64)
+    put_close = np.asarray(put_close, dtype=np.float64)
+    every_bar = np.arange(len(spy_close))
+
+    prepared = {
+        "spy_ema8": ema_series(spy_close, 8),
+        "spy_ema21": ema_series(spy_close, 21),
+        "call_ema8": ema_series(call_close, 8),
+        "call_ema21": ema_series(call_close, 21),
+        "put_ema8": ema_series(put_close, 8),
+        "put_ema21": ema_series(put_close, 21),
+        "price": spy_close,
+        "broken": np.broadcast_to(np.asarray(broken, dtype=bool), spy_close.shape),
+        "horizons": tuple(horizons),
+    }
+    if timestamps is not None:
+        prepared["timestamps"] = np.asarray(timestamps)
+    prepared.update(nearest_levels_batch(spy_close, levels))
+    for h in horizons:
+        prepared[f"spy_forward_{h}"] = forward_returns(spy_close, every_bar, h, session)
+        prepared[f"call_forward_{h}"] = forward_returns(call_close, every_bar, h, session)
+        prepared[f"put_forward_{h}"] = forward_returns(put_close, every_bar, h, session)
+    return prepared
+
+
+# Score a prepared backtest with one set of ScoringParams and evaluate
+# every new BUY CALLS / BUY PUTS signal
+def evaluate_backtest(prepared, params=DEFAULT_PARAMS):
+    nearest = {k: prepared[k] for k in NEAREST_KEYS}
+    scores = score_batch(
+        prepared["spy_ema8"], prepared["spy_ema21"],
+        prepared["call_ema8"], prepared["call_ema21"],
+        prepared["put_ema8"], prepared["put_ema21"],
+        prepared["price"], None, prepared["broken"], params=params, nearest=nearest,
+    )
+
+    entries = signal_entries(scores["recommendation"])
+    signal = scores["recommendation"][entries]
+    is_call = signal == BUY_CALLS
+    direction = np.where(is_call, 1.0, -1.0)
+
+    timestamps = prepared.get("timestamps")
+    signals = {
+        "index": entries,
+        "timestamp": None if timestamps is None else timestamps[entries],
+        "recommendation": signal,
+        "total_score": scores["total_score"][entries],
+        "price": prepared["price"][entries],
+    }
+
+    report = {}
+    for h in prepared["horizons"]:
+        spy_ret = prepared[f"spy_forward_{h}"][entries] * direction
+        option_ret = np.where(is_call, prepared[f"call_forward_{h}"][entries],
+                              prepared[f"put_forward_{h}"][entries])
+        signals[f"spy_return_{h}"] = spy_ret
+        signals[f"option_return_{h}"] = option_ret
+
+        done = ~np.isnan(option_ret)
+        report[h] = {
+            "signals": int(done.sum()),
+            "hit_rate": float(np.mean(option_ret[done] > 0)) if done.any() else np.nan,
+            "mean_option_return": float(np.mean(option_ret[done])) if done.any() else np.nan,
+            "mean_spy_return": float(np.mean(spy_ret[done])) if done.any() else np.nan,
+        }
+
+    return {"scores": scores, "signals": signals, "report": report}
+
+
+# Replay aligned SPY/CALL/PUT closes through the 4-pillar scoring and
+# evaluate every new BUY CALLS / BUY PUTS signal
+def run_backtest(spy_close, call_close, put_close, levels, broken=False,
+                 timestamps=None, session=None, horizons=DEFAULT_HORIZONS, params=DEFAULT_PARAMS):
+    prepared = prepare_backtest(spy_close, call_close, put_close, levels, broken,
+                                timestamps, session, horizons)
+    return evaluate_backtest(prepared, params)
+
+
+# Function to get the calendar day (datetime64[D]) of archive timestamps,
+# given as epoch seconds or date/time strings
+def archive_days(timestamps):
+    if isinstance(timestamps, np.ndarray) and np.issubdtype(timestamps.dtype, np.number):
+        return epoch_days(timestamps)
+    import pandas as pd
+
+    timestamps = pd.Series(timestamps)
+    unit = "s" if pd.api.types.is_numeric_dtype(timestamps) else None
+    return pd.to_datetime(timestamps, unit=unit).to_numpy().astype("datetime64[D]")
+
+
+# Function to load an aligned minute-bar archive. Expects columns
+# timestamp, spy, call, put and optionally R3..S3, session, spy_high and
+# spy_low. Without R3..S3 columns, `pivot_method` derives each bar's levels
+# from the previous session's SPY high/low/close. `start`/`end` keep only
+# the days between them. With `cache`, columns come from the archive's
+# memory-mapped column cache (built on first use) instead of the CSV, and
+# timestamps are epoch seconds.
+def load_archive(path, pivot_method=None, start=None, end=None, cache=False):
+    if cache:
+        columns = open_archive(path).load(start, end)
+    else:
+        import pandas as pd
+
+        df = pd.read_csv(path)
+        if start is not None or end is not None:
+            days = archive_days(df["timestamp"])
+            keep = np.ones(len(df), dtype=bool)
+            if start is not None:
+                keep &= days >= np.datetime64(start, "D")
+            if end is not None:
+                keep &= days <= np.datetime64(end, "D")
+            df = df[keep]
+        columns = {name: df[name].to_numpy() for name in df}
+
+    data = {
+        "timestamps": columns["timestamp"],
+        "spy_close": np.asarray(columns["spy"], dtype=np.float64),
+        "call_close": np.asarray(columns["call"], dtype=np.float64),
+        "put_close": np.asarray(columns["put"], dtype=np.float64),
+    }
+    if "session" in columns:
+        data["session"] = columns["session"]
+    else:
+        data["session"] = period_ids(archive_days(columns["timestamp"]), "D")
+
+    if all(name in columns for name in LEVEL_NAMES):
+        data["levels"] = np.column_stack([np.asarray(columns[name], dtype=np.float64) for name in LEVEL_NAMES])
+    elif pivot_method:
+        spy = data["spy_close"]
+        high = np.asarray(columns["spy_high"], dtype=np.float64) if "spy_high" in columns else spy
+        low = np.asarray(columns["spy_low"], dtype=np.float64) if "spy_low" in columns else spy
+        data["levels"] = prior_period_pivots(high, low, spy, data["session"], pivot_method)
+    return data
+
+
+# Function to print a backtest report
+def print_report(result):
+    signals = result["signals"]
+    for code in (BUY_CALLS, BUY_PUTS):
+        print(f"{RECOMMENDATIONS[code]}: {int(np.sum(signals['recommendation'] == code))} signals")
+    print(f"{'Horizon':>8} {'Signals':>8} {'Hit rate':>9} {'Option ret':>11} {'SPY ret':>9}")
+    for h, row in result["report"].items():
+        print(f"{h:>8} {row['signals']:>8} {row['hit_rate']:>9.1%} "
+              f"{row['mean_option_return']:>11.3%} {row['mean_spy_return']:>9.3%}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backtest the 4-pillar framework over minute bars")
+    parser.add_argument("archive", help="CSV with timestamp, spy, call, put (and optional R3..S3, session)")
+    parser.add_argument("--levels", type=float, nargs=7, metavar=LEVEL_NAMES,
+                        help="Fixed pivot levels when the archive has no R3..S3 columns")
+    parser.add_argument("--pivots", choices=METHODS,
+                        help="Derive levels from the prior session when the archive has no R3..S3 columns")
+    parser.add_argument("--pivot-db", help="Read each day's levels and broken state from this pivot store")
+    parser.add_argument("--symbol", default="SPY", help="Symbol to read from --pivot-db")
+    parser.add_argument("--horizons", type=int, nargs="+", default=list(DEFAULT_HORIZONS))
+    parser.add_argument("--start", help="First day to backtest (YYYY-MM-DD)")
+    parser.add_argument("--end", help="Last day to backtest (YYYY-MM-DD)")
+    parser.add_argument("--cache", action="store_true", help="Read through the memory-mapped column cache")
+    args = parser.parse_args(argv)
+
+    data = load_archive(args.archive, args.pivots, args.start, args.end, args.cache)
+    if args.levels:
+        data["levels"] = np.asarray(args.levels)
+    elif args.pivot_db:
+        levels, broken = PivotStore(args.pivot_db).levels_for_days(args.symbol, archive_days(data["timestamps"]))
+        data["levels"], data["broken"] = levels, broken > 0
+    if "levels" not in data:
+        parser.error("archive has no R3..S3 columns; pass --levels, --pivots or --pivot-db")
+
+    print_report(run_backtest(horizons=args.horizons, **data))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+import numpy as np
+
+from yetitrader.scoring import LEVEL_NAMES
+
+
+# Broken/reclaimed state for a set of levels, driven by the price stream.
+# The first price fixes each level's home side (levels above it act as
+# resistance, levels at or below it as support). A level breaks once
+# `confirm_bars` consecutive closes settle beyond it on the far side by more
+# than `buffer` (a fraction of the level), and is reclaimed the same way
+# back on its home side. Closes inside the buffer reset the count.
+#
+# State is a handful of arrays, one slot per level, so a tick costs the
+# same no matter how long the session runs. `values` may also be (n, k)
+# for n underlyings updated together with an (n,) price array.
+class BreakDetector:
+    def __init__(self, values, names=LEVEL_NAMES, confirm_bars=1, buffer=0.0):
+        self.values = np.asarray(values, dtype=np.float64)
+        self.names = tuple(names)
+        self.confirm_bars = max(1, int(confirm_bars))
+        self.buffer = float(buffer)
+        self.home = np.zeros(self.values.shape, dtype=np.int8)
+        self.streak = np.zeros(self.values.shape, dtype=np.int32)
+        self.broken = np.zeros(self.values.shape, dtype=bool)
+        self._bounds()
+
+    # Build a detector for a {name: value} dict of levels
+    @classmethod
+    def from_levels(cls, levels, confirm_bars=1, buffer=0.0):
+        return cls(list(levels.values()), levels.keys(), confirm_bars, buffer)
+
+    def _bounds(self):
+        self.upper = self.values * (1 + self.buffer)
+        self.lower = self.values * (1 - self.buffer)
+
+    # Forget all state; the next price sets the home sides again
+    def reset(self):
+        self.home[...] = 0
+        self.streak[...] = 0
+        self.broken[...] = False
+
+    # Fold one close (or one close per row) into the state. Returns boolean
+    # arrays of the levels that broke and that were reclaimed on this tick.
+    def update(self, price):
+        price = np.asarray(price, dtype=np.float64)[..., None]
+        unset = self.home == 0
+        if unset.any():
+            self.home = np.where(unset, np.where(price >= self.values, 1, -1), self.home).astype(np.int8)
+
+        support = self.home > 0
+        beyond = np.where(support, price < self.lower, price > self.upper)
+        back = np.where(support, price > self.upper, price < self.lower)
+        progress = np.where(self.broken, back, beyond)
+
+        self.streak = np.where(progress, self.streak + 1, 0)
+        flip = self.streak >= self.confirm_bars
+        self.streak[flip] = 0
+        self.broken ^= flip
+        return flip & self.broken, flip & ~self.broken
+
+    # Feed a sequence of closes; returns the broken bitmask after each one
+    def run(self, prices):
+        masks = np.empty(len(prices), dtype=np.int64)
+        for i, price in enumerate(prices):
+            self.update(price)
+            masks[i] = self.mask
+        return masks
+
+    # Broken levels as a bitmask in `names` order: an int for one level
+    # set, an (n,) array for n rows
+    @property
+    def mask(self):
+        masks = self.broken.astype(np.int64) @ (1 << np.arange(self.broken.shape[-1], dtype=np.int64))
+        return int(masks) if masks.ndim == 0 else masks
+
+    # Broken levels in the (name, value) tuple form kept in session state
+    def broken_levels(self):
+        return [(name, value) for name, value, broken in
+                zip(self.names, self.values.tolist(), self.broken.tolist()) if broken]
+
+    # Move the levels (e.g. new pivots were saved) and keep the state of any
+    # level whose name is unchanged (single level set)
+    def set_levels(self, levels):
+        names = tuple(levels.keys())
+        keep = [self.names.index(name) if name in self.names else -1 for name in names]
+        home, streak, broken = (np.array([a[i] if i >= 0 else 0 for i in keep], dtype=a.dtype)
+                                for a in (self.home, self.streak, self.broken))
+        self.values = np.asarray(list(levels.values()), dtype=np.float64)
+        self.names = names
+        self.home, self.streak, self.broken = home, streak, broken
+        self._bounds()
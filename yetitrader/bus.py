@@ -0,0 +1,453 @@
+import argparse
+import asyncio
+import os
+import signal
+import time
+import weakref
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from yetitrader.ema import StreamingEMA
+from yetitrader.scoring import LEVEL_NAMES
+
+# Default segment name, overridable per call (and with YETITRADER_BUS in the app)
+DEFAULT_NAME = "yetitrader-bus"
+
+MAGIC = 0x59455449425553  # "YETIBUS"
+VERSION = 2
+SYMBOL_WIDTH = 24
+
+# Header fields (int64 slots at the start of the segment)
+H_MAGIC, H_VERSION, H_CAPACITY, H_PERIODS, H_WIDTH, H_SEQ, H_SYMBOLS, H_BARS, H_WRITER = range(9)
+HEADER_SLOTS = 9
+
+# This process's live writer of each segment name
+_writers = weakref.WeakValueDictionary()
+
+
+# Function to lay out the segment: {name: (offset, dtype, shape)} and the
+# total size. Every array starts on an 8-byte boundary.
+def _layout(capacity, periods, width):
+    fields = (
+        ("header", np.int64, (HEADER_SLOTS,)),
+        ("periods", np.float64, (periods,)),
+        ("values", np.float64, (capacity, periods)),
+        ("last", np.float64, (capacity,)),
+        ("counts", np.int64, (capacity,)),
+        ("timestamps", np.float64, (capacity,)),
+        ("levels", np.float64, (capacity, len(LEVEL_NAMES))),
+        ("broken", np.int64, (capacity,)),
+        ("symbols", f"S{width}", (capacity,)),
+    )
+    layout, offset = {}, 0
+    for name, dtype, shape in fields:
+        layout[name] = (offset, np.dtype(dtype), shape)
+        offset += -(-np.dtype(dtype).itemsize * int(np.prod(shape)) // 8) * 8
+    return layout, offset
+
+
+def _arrays(shm, layout, writeable):
+    arrays = {}
+    for name, (offset, dtype, shape) in layout.items():
+        array = np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=offset)
+        array.flags.writeable = writeable
+        arrays[name] = array
+    return arrays
+
+
+# Function to attach to an existing segment without registering it with
+# the resource tracker, which would otherwise unlink it when a reader exits
+# (Python < 3.13 has no track=False). Registration is skipped rather than
+# undone, since forked workers share their parent's tracker.
+def _attach(name):
+    try:
+        return shared_memory.SharedMemory(name, track=False)
+    except TypeError:
+        register = resource_tracker.register
+        resource_tracker.register = lambda name, rtype: None
+        try:
+            return shared_memory.SharedMemory(name)
+        finally:
+            resource_tracker.register = register
+
+
+# Function to unlink a segment opened with _attach(), which the resource
+# tracker never registered (and would report unregistering)
+def _unlink(shm):
+    unregister = resource_tracker.unregister
+    resource_tracker.unregister = lambda name, rtype: None
+    try:
+        shm.unlink()
+    finally:
+        resource_tracker.unregister = unregister
+
+
+# Function to tell why an existing segment must not be replaced: it is not
+# a yetitrader bus, it is from another bus version, or its writer process
+# is still running. None means it was left behind by a writer that exited
+# without close() and can be unlinked.
+def _in_use(shm):
+    if shm.size < HEADER_SLOTS * 8:
+        return "is not a yetitrader bus"
+    magic, version, writer = np.ndarray((HEADER_SLOTS,), dtype=np.int64, buffer=shm.buf)[[H_MAGIC, H_VERSION, H_WRITER]].tolist()
+    if magic != MAGIC:
+        return "is not a yetitrader bus"
+    if version != VERSION:
+        return f"is a version {version} bus"
+    try:
+        os.kill(writer, 0)
+    except ProcessLookupError:
+        return None
+    except PermissionError:
+        pass
+    return f"is owned by a running writer (pid {writer})"
+
+
+# Function to mark a replaced segment closed, so its readers reattach and
+# its writer's close() leaves the replacement under the name alone
+def _retire(shm):
+    if shm.size >= HEADER_SLOTS * 8:
+        header = np.ndarray((HEADER_SLOTS,), dtype=np.int64, buffer=shm.buf)
+        if header[H_MAGIC] == MAGIC:
+            header[H_MAGIC] = 0
+        del header
+
+
+# The ingest side of the market data bus: a StreamingEMA whose arrays live
+# in a named shared-memory segment, plus each symbol's last bar time and
+# pivot level state. There is one writer per segment. Every change is
+# wrapped in a seqlock: the sequence counter is odd while a write is in
+# progress and moves on by two per write, so readers can tell a torn read
+# from a stable one without any lock. The segment has a fixed capacity
+# (symbols cannot be added once it is full) and is unlinked on close().
+# A segment left behind by a writer that died is replaced; one whose
+# writer is still running (or that is not a bus) raises FileExistsError
+# unless replace=True.
+class BusWriter(StreamingEMA):
+    def __init__(self, name=DEFAULT_NAME, capacity=1024, periods=(8, 21), width=SYMBOL_WIDTH, replace=False):
+        super().__init__(periods, capacity)
+        layout, size = _layout(capacity, len(self.periods), width)
+        try:
+            self.shm = shared_memory.SharedMemory(name, create=True, size=size)
+        except FileExistsError:
+            existing = _attach(name)
+            reason = _in_use(existing)
+            if reason and not replace:
+                existing.close()
+                raise FileExistsError(f"shared memory {name} {reason}; stop it first or replace it "
+                                      f"(replace=True, --force)") from None
+            _retire(existing)
+            existing.close()
+            _unlink(existing)
+            self.shm = shared_memory.SharedMemory(name, create=True, size=size)
+        self.name = name
+        self.width = width
+        _writers[name] = self
+        arrays = _arrays(self.shm, layout, True)
+        arrays["periods"][:] = self.periods
+        arrays["values"][:] = np.nan
+        arrays["last"][:] = np.nan
+        arrays["timestamps"][:] = np.nan
+        arrays["levels"][:] = np.nan
+        self.header = arrays["header"]
+        self.values, self.last, self.counts = arrays["values"], arrays["last"], arrays["counts"]
+        self.timestamps, self.levels, self.broken = arrays["timestamps"], arrays["levels"], arrays["broken"]
+        self.symbols = arrays["symbols"]
+        self.header[:] = (MAGIC, VERSION, capacity, len(self.periods), width, 0, 0, 0, os.getpid())
+
+    # Open and close a write section: readers that saw the counter odd, or
+    # changed, retry
+    def begin(self):
+        self.header[H_SEQ] += 1
+
+    def end(self):
+        self.header[H_SEQ] += 1
+
+    # Row for a symbol, publishing new symbols to readers
+    def slot(self, symbol):
+        i = self.index.get(symbol)
+        if i is None:
+            i = len(self.index)
+            if i == len(self.counts):
+                raise ValueError(f"bus {self.name} is full ({i} symbols)")
+            encoded = symbol.encode()
+            if len(encoded) > self.width:
+                raise ValueError(f"symbol {symbol!r} is longer than {self.width} bytes")
+            self.begin()
+            self.symbols[i] = encoded
+            self.index[symbol] = i
+            self.header[H_SYMBOLS] = i + 1
+            self.end()
+        return i
+
+    def update(self, symbol, price):
+        i = self.slot(symbol)
+        self.begin()
+        row = super().update(symbol, price)
+        self.end()
+        return row
+
+    def update_rows(self, rows, prices):
+        self.begin()
+        super().update_rows(rows, prices)
+        self.end()
+
+    # Fold one feeds.Bar in and record its time
+    def on_bar(self, bar):
+        i = self.slot(bar.symbol)
+        self.begin()
+        StreamingEMA.update(self, bar.symbol, bar.close)
+        self.timestamps[i] = bar.timestamp
+        self.header[H_BARS] += 1
+        self.end()
+
+    # Fold many bars in one write section (readers see all or none of them)
+    def on_bars(self, bars):
+        bars = list(bars)
+        for bar in bars:
+            self.slot(bar.symbol)
+        self.begin()
+        for bar in bars:
+            i = self.index[bar.symbol]
+            StreamingEMA.update(self, bar.symbol, bar.close)
+            self.timestamps[i] = bar.timestamp
+        self.header[H_BARS] += len(bars)
+        self.end()
+        return len(bars)
+
+    # Publish a symbol's pivot levels ({name: value} or R3..S3 values) and
+    # broken-level bitmask (see store.broken_mask)
+    def set_levels(self, symbol, levels, broken=0):
+        i = self.slot(symbol)
+        if isinstance(levels, dict):
+            levels = [levels[name] for name in LEVEL_NAMES]
+        self.begin()
+        self.levels[i] = levels
+        self.broken[i] = broken
+        self.end()
+
+    # Unlink the segment; readers still attached see MAGIC cleared and
+    # open_bus() attaches to the next writer's segment. A writer that was
+    # replaced (its MAGIC already cleared) does not unlink its successor.
+    def close(self, unlink=True):
+        replaced = self.header[H_MAGIC] != MAGIC
+        mine = _writers.get(self.name) is self
+        if mine:
+            del _writers[self.name]
+        if unlink and not replaced:
+            self.header[H_MAGIC] = 0
+        del self.header, self.values, self.last, self.counts, self.timestamps, self.levels, self.broken, self.symbols
+        self.shm.close()
+        if replaced:
+            if mine:
+                # Another process has the name now: forget it, or the
+                # resource tracker unlinks it when this process exits
+                resource_tracker.unregister(self.shm._name, "shared_memory")
+        elif unlink:
+            self.shm.unlink()
+
+
+# The scoring/UI side of the bus: read-only views of a writer's arrays,
+# with the same values/last/counts/slot/get interface as StreamingEMA, so a
+# Scanner or the app can read it in place of an engine of its own. Nothing
+# is copied on attach; consistent() gives the seqlock-checked reads.
+class BusReader:
+    def __init__(self, name=DEFAULT_NAME, timeout=5.0):
+        self.name = name
+        self.shm = _attach(name)
+        header = np.ndarray((HEADER_SLOTS,), dtype=np.int64, buffer=self.shm.buf)
+        if header[H_MAGIC] != MAGIC or header[H_VERSION] != VERSION:
+            raise ValueError(f"{name} is not a version {VERSION} yetitrader bus")
+        layout, _ = _layout(int(header[H_CAPACITY]), int(header[H_PERIODS]), int(header[H_WIDTH]))
+        arrays = _arrays(self.shm, layout, False)
+        self.header = arrays["header"]
+        self.periods = tuple(int(period) for period in arrays["periods"])
+        self.alpha = 2.0 / (arrays["periods"] + 1.0)
+        self.values, self.last, self.counts = arrays["values"], arrays["last"], arrays["counts"]
+        self.timestamps, self.levels, self.broken = arrays["timestamps"], arrays["levels"], arrays["broken"]
+        self.symbols = arrays["symbols"]
+        self.timeout = timeout
+        self.index = {}
+
+    # Completed writes so far; unchanged means nothing to re-score
+    @property
+    def version(self):
+        return int(self.header[H_SEQ]) // 2
+
+    # Run fn() against the live arrays until it ran without a write in
+    # between, and return its result. fn should copy or reduce what it
+    # reads (fancy indexing, score_batch), not return views.
+    def consistent(self, fn):
+        deadline = time.monotonic() + self.timeout
+        while True:
+            before = int(self.header[H_SEQ])
+            if not before & 1:
+                result = fn()
+                if int(self.header[H_SEQ]) == before:
+                    return result
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"no stable read of bus {self.name} in {self.timeout}s")
+            time.sleep(0)
+
+    # Row of a symbol the writer has published (KeyError otherwise)
+    def slot(self, symbol):
+        i = self.index.get(symbol)
+        if i is None:
+            count = int(self.header[H_SYMBOLS])
+            if count > len(self.index):
+                self.index = {name.decode(): row for row, name in enumerate(self.symbols[:count].tolist())}
+            i = self.index[symbol]
+        return i
+
+    def get(self, symbol):
+        try:
+            i = self.slot(symbol)
+        except KeyError:
+            return (np.nan,) * len(self.periods)
+        return self.consistent(lambda: tuple(self.values[i].tolist()))
+
+    # The six sidebar values for a SPY/CALL/PUT trio, read in one stable pass
+    def framework_inputs(self, spy_symbol, call_symbol, put_symbol):
+        return self.consistent(lambda: StreamingEMA.framework_inputs(self, spy_symbol, call_symbol, put_symbol))
+
+    # A symbol's published levels ({name: value}) and broken bitmask, or
+    # None when it has none
+    def get_levels(self, symbol):
+        try:
+            i = self.slot(symbol)
+        except KeyError:
+            return None
+        levels, broken = self.consistent(lambda: (self.levels[i].tolist(), int(self.broken[i])))
+        if np.isnan(levels).all():
+            return None
+        return dict(zip(LEVEL_NAMES, levels)), broken
+
+    def close(self):
+        del self.header, self.values, self.last, self.counts, self.timestamps, self.levels, self.broken, self.symbols
+        self.shm.close()
+
+
+_readers = {}
+
+
+# Function to get the process-wide reader of a bus (shared by every
+# Streamlit session), or None while no writer has created it. A reader
+# whose writer has closed is replaced.
+def open_bus(name=DEFAULT_NAME):
+    reader = _readers.get(name)
+    if reader is not None and reader.header[H_MAGIC] != MAGIC:
+        del _readers[name]
+        reader = None
+    if reader is None:
+        try:
+            reader = _readers[name] = BusReader(name)
+        except (FileNotFoundError, ValueError):
+            return None
+    return reader
+
+
+def main(argv=None):
+    from yetitrader.scanner import Scanner, load_universe, print_table, replay_source, socket_source
+
+    parser = argparse.ArgumentParser(description="Shared-memory market data bus between ingest and scoring workers")
+    parser.add_argument("--bus", default=DEFAULT_NAME, help="Shared-memory segment name")
+    commands = parser.add_subparsers(dest="command", required=True)
+    ingest = commands.add_parser("ingest", help="Feed bars into a new bus until the sources end or Ctrl-C")
+    ingest.add_argument("universe", help="CSV with underlying, call, put (and optional R3..S3) columns")
+    ingest.add_argument("--replay", nargs="*", default=[], help="Bar files to replay")
+    ingest.add_argument("--socket", nargs="*", default=[], metavar="HOST:PORT", help="Local bar sockets")
+    ingest.add_argument("--speed", type=float, default=0.0, help="Replay speed (0 = as fast as possible)")
+    ingest.add_argument("--levels", type=float, nargs=7, help="Pivot levels R3..S3 for every underlying")
+    ingest.add_argument("--capacity", type=int, default=1024, help="Most symbols the bus can hold")
+    ingest.add_argument("--hold", action="store_true", help="Keep the bus up after the sources end")
+    ingest.add_argument("--force", action="store_true", help="Replace a bus another running writer owns")
+    scan = commands.add_parser("scan", help="Score (a shard of) the universe from the bus")
+    scan.add_argument("universe")
+    scan.add_argument("--shard", default="0/1", help="This worker's share of the setups as I/N")
+    scan.add_argument("--interval", type=float, default=1.0)
+    scan.add_argument("--cycles", type=int, default=0, help="Stop after this many cycles (0 = run until Ctrl-C)")
+    scan.add_argument("--top", type=int, default=20)
+    commands.add_parser("info", help="Describe the bus")
+    args = parser.parse_args(argv)
+
+    if args.command == "ingest":
+        setups, levels = load_universe(args.universe)
+        if args.levels:
+            levels = np.broadcast_to(args.levels, (len(setups), len(LEVEL_NAMES)))
+        try:
+            writer = BusWriter(args.bus, args.capacity, replace=args.force)
+        except FileExistsError as e:
+            parser.error(str(e))
+        # Stop on SIGTERM as on Ctrl-C, so the segment is unlinked
+        signal.signal(signal.SIGTERM, signal.default_int_handler)
+        try:
+            for i, setup in enumerate(setups):
+                for symbol in setup:
+                    writer.slot(symbol)
+                if levels is not None:
+                    writer.set_levels(setup[0], levels[i])
+            sources = [replay_source(path, writer.on_bar, args.speed) for path in args.replay]
+            for address in args.socket:
+                host, port = address.rsplit(":", 1)
+                sources.append(socket_source(host, int(port), writer.on_bar))
+
+            async def run():
+                await asyncio.gather(*sources)
+                print(f"{int(writer.header[H_BARS])} bars published to {args.bus}")
+                while args.hold:
+                    await asyncio.sleep(3600)
+            asyncio.run(run())
+        except KeyboardInterrupt:
+            pass
+        finally:
+            writer.close()
+        return
+
+    reader = open_bus(args.bus)
+    if reader is None:
+        parser.error(f"no bus named {args.bus}; start `python -m yetitrader.bus ingest` first")
+    if args.command == "info":
+        # One stable snapshot of the header and every symbol's row
+        def snapshot():
+            count = int(reader.header[H_SYMBOLS])
+            return (count, int(reader.header[H_BARS]), reader.version, int(reader.header[H_WRITER]),
+                    [(name.decode(), int(reader.counts[row]), float(reader.last[row]))
+                     for row, name in enumerate(reader.symbols[:count].tolist())])
+        count, bars, version, writer_pid, rows = reader.consistent(snapshot)
+        print(f"{args.bus}: {count}/{len(reader.counts)} symbols, {bars} bars, "
+              f"version {version}, periods {reader.periods}, {reader.shm.size} bytes, "
+              f"writer pid {writer_pid}")
+        for symbol, bars, last in sorted(rows):
+            print(f"  {symbol:<{SYMBOL_WIDTH}} {bars:>8} bars  last {last:.2f}")
+        return
+
+    setups, levels = load_universe(args.universe)
+    shard, shards = (int(part) for part in args.shard.split("/"))
+    chosen = list(range(shard, len(setups), shards))
+    setups = [setups[i] for i in chosen]
+    if levels is not None:
+        levels = levels[chosen]
+    else:
+        published = [reader.get_levels(setup[0]) for setup in setups]
+        if any(entry is None for entry in published):
+            parser.error("universe has no R3..S3 columns and the bus has no levels for every underlying")
+        levels = [[entry[0][name] for name in LEVEL_NAMES] for entry in published]
+    scanner = Scanner(setups, levels, engine=reader)
+    scanner.broken[:] = reader.consistent(lambda: reader.broken[scanner.rows[:, 0]] > 0)
+
+    cycle, seen = 0, None
+    try:
+        while not args.cycles or cycle < args.cycles:
+            if reader.version != seen:
+                seen = reader.version
+                started = time.perf_counter()
+                print_table(scanner.ranked(args.top), time.perf_counter() - started)
+            cycle += 1
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+# Default time-to-live in seconds of shared cache entries, overridable with
+# YETITRADER_CACHE_TTL (0 keeps entries until they are evicted by size)
+DEFAULT_TTL = float(os.environ.get("YETITRADER_CACHE_TTL", 6 * 3600))
+
+# Every shared cache by name, for stats and clearing
+CACHES = {}
+
+
+# Bounded LRU of computed values with a time-to-live, shared by every
+# thread (so every Streamlit session) of the process. Keys are the call
+# arguments, so they must be hashable. Values are handed out as is, not
+# copied: cached functions return bytes, tuples or results callers do not
+# modify. Concurrent misses on the same key wait for the first caller's
+# result instead of computing it again.
+class SharedCache:
+    def __init__(self, name, maxsize=128, ttl=None):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = DEFAULT_TTL if ttl is None else ttl
+        self.entries = OrderedDict()  # key -> (expires, value)
+        self.pending = {}  # key -> Event set when its value is stored
+        self.lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def get(self, key, compute):
+        while True:
+            with self.lock:
+                entry = self.entries.get(key)
+                if entry is not None:
+                    if not entry[0] or entry[0] > time.monotonic():
+                        self.entries.move_to_end(key)
+                        self.hits += 1
+                        return entry[1]
+                    del self.entries[key]
+                    self.expirations += 1
+                waiting = self.pending.get(key)
+                if waiting is None:
+                    self.pending[key] = threading.Event()
+                    self.misses += 1
+                    break
+            # Another session is computing this key; take its result (or
+            # compute it here if it failed)
+            waiting.wait()
+
+        try:
+            value = compute()
+            with self.lock:
+                self._store(key, value)
+            return value
+        finally:
+            with self.lock:
+                self.pending.pop(key).set()
+
+    # Store a value the caller already has (e.g. one it just wrote)
+    def put(self, key, value):
+        with self.lock:
+            self._store(key, value)
+
+    def _store(self, key, value):
+        self.entries[key] = (time.monotonic() + self.ttl if self.ttl else 0, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "cache": self.name,
+            "entries": len(self.entries),
+            "maxsize": self.maxsize,
+            "ttl_s": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expired": self.expirations,
+        }
+
+
+# Function to create a SharedCache listed in the stats and emptied by
+# clear_caches()
+def named_cache(name, maxsize=128, ttl=None):
+    cache = CACHES[name] = SharedCache(name, maxsize, ttl)
+    return cache
+
+
+# Decorator: memoize a pure function in a process-wide SharedCache keyed by
+# its positional arguments. The wrapper keeps the cache as `.cache` and
+# gets a `cache_clear()` like functools.lru_cache.
+def shared_cache(name, maxsize=128, ttl=None):
+    def decorate(fn):
+        cache = named_cache(name, maxsize, ttl)
+
+        @wraps(fn)
+        def cached(*args):
+            return cache.get(args, lambda: fn(*args))
+        cached.cache = cache
+        cached.cache_clear = cache.clear
+        return cached
+    return decorate
+
+
+# Function to get the stats of every shared cache, sorted by name
+def cache_stats():
+    return [CACHES[name].stats() for name in sorted(CACHES)]
+
+
+# Function to empty every shared cache (e.g. after the day's levels change
+# outside the app); stats are kept
+def clear_caches():
+    for cache in CACHES.values():
+        cache.clear()
+
+
+# Prometheus text exposition of the cache counters
+def prometheus_text():
+    lines = []
+    for metric, field, kind, help_text in (
+        ("yetitrader_cache_hits_total", "hits", "counter", "Shared cache hits"),
+        ("yetitrader_cache_misses_total", "misses", "counter", "Shared cache misses (computations)"),
+        ("yetitrader_cache_evictions_total", "evictions", "counter", "Entries evicted by size"),
+        ("yetitrader_cache_expired_total", "expired", "counter", "Entries dropped after their TTL"),
+        ("yetitrader_cache_entries", "entries", "gauge", "Entries currently cached"),
+    ):
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} {kind}")
+        for stats in cache_stats():
+            lines.append(f'{metric}{{cache="{stats["cache"]}"}} {stats[field]}')
+    return "\n".join(lines) + "\n"
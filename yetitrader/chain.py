@@ -0,0 +1,161 @@
+import argparse
+import csv
+
+import numpy as np
+
+from yetitrader.ema import StreamingEMA, consume_bars
+from yetitrader.feeds import read_bars
+from yetitrader.scoring import DEFAULT_PARAMS, option_scores_batch
+
+
+# A whole option chain in struct-of-arrays form: one array per field and
+# one row per contract. CALLs and PUTs sharing an expiry and strike are
+# paired once up front, so scoring every pair is a handful of array
+# operations over the pair index arrays. A chain must have at most one
+# CALL and one PUT per expiry and strike (ValueError otherwise): rows carry
+# no quote time or bid/ask to pick between duplicates by.
+class OptionChain:
+    def __init__(self, symbols, expiries, strikes, is_call, ema8=None, ema21=None):
+        self.symbols = np.asarray(symbols, dtype=object)
+        self.expiries = np.asarray(expiries, dtype="datetime64[D]")
+        self.strikes = np.asarray(strikes, dtype=np.float64)
+        self.is_call = np.asarray(is_call, dtype=bool)
+        count = len(self.symbols)
+        self.ema8 = np.full(count, np.nan) if ema8 is None else np.asarray(ema8, dtype=np.float64).copy()
+        self.ema21 = np.full(count, np.nan) if ema21 is None else np.asarray(ema21, dtype=np.float64).copy()
+        self.index = {symbol: i for i, symbol in enumerate(self.symbols.tolist())}
+        self.engine_rows = None
+        self._pair()
+
+    def __len__(self):
+        return len(self.symbols)
+
+    # Match each CALL with the PUT of the same expiry and strike
+    def _pair(self):
+        keys = np.empty(len(self), dtype=[("expiry", "<i8"), ("strike", "<f8")])
+        keys["expiry"] = self.expiries.astype(np.int64)
+        keys["strike"] = self.strikes
+        unique, ids = np.unique(keys, return_inverse=True)
+        sides = np.bincount(ids * 2 + self.is_call, minlength=2 * len(unique))
+        duplicates = np.flatnonzero(sides > 1)
+        if len(duplicates):
+            first = unique[duplicates[0] // 2]
+            raise ValueError(
+                f"chain has {sides[duplicates[0]]} {'CALL' if duplicates[0] % 2 else 'PUT'}s at "
+                f"{np.datetime64(int(first['expiry']), 'D')} strike {first['strike']:g} "
+                f"({len(duplicates)} duplicated expiry/strike/right in all)")
+        call_of = np.full(len(unique), -1, dtype=np.intp)
+        put_of = np.full(len(unique), -1, dtype=np.intp)
+        call_of[ids[self.is_call]] = np.flatnonzero(self.is_call)
+        put_of[ids[~self.is_call]] = np.flatnonzero(~self.is_call)
+        both = (call_of >= 0) & (put_of >= 0)
+        self.pair_call = call_of[both]
+        self.pair_put = put_of[both]
+
+    # Set one contract's EMAs
+    def update(self, symbol, ema8, ema21):
+        i = self.index[symbol]
+        self.ema8[i] = ema8
+        self.ema21[i] = ema21
+
+    # Pull every contract's 8/21 EMAs from a StreamingEMA engine in one
+    # gather (rows are looked up once per engine)
+    def refresh(self, engine):
+        if self.engine_rows is None or self.engine_rows[0] is not engine:
+            self.engine_rows = (engine, np.array([engine.slot(s) for s in self.symbols], dtype=np.intp))
+        rows = self.engine_rows[1]
+        fast, slow = engine.periods.index(8), engine.periods.index(21)
+        self.ema8 = engine.values[rows, fast]
+        self.ema21 = engine.values[rows, slow]
+
+
+# Function to load a chain CSV with columns symbol, expiry (YYYY-MM-DD),
+# strike, right (C/P) and optionally ema8, ema21
+def load_chain(path):
+    with open(path, newline="") as f:
+        rows = list(csv.DictReader(f))
+    has_emas = bool(rows) and "ema8" in rows[0] and "ema21" in rows[0]
+    return OptionChain(
+        [row["symbol"] for row in rows],
+        [row["expiry"] for row in rows],
+        [float(row["strike"]) for row in rows],
+        [row["right"].strip().upper().startswith("C") for row in rows],
+        [float(row["ema8"]) for row in rows] if has_emas else None,
+        [float(row["ema21"]) for row in rows] if has_emas else None,
+    )
+
+
+# Option confirmation, opposing divergence and option trend alignment for
+# every CALL/PUT pair of the chain against one SPY trend, in one pass.
+# Pairs where either contract has no EMAs yet are marked invalid.
+def score_chain(chain, spy_ema8, spy_ema21, params=DEFAULT_PARAMS):
+    call, put = chain.pair_call, chain.pair_put
+    call_ema8, call_ema21 = chain.ema8[call], chain.ema21[call]
+    put_ema8, put_ema21 = chain.ema8[put], chain.ema21[put]
+    option_confirm_score, opposing_score, option_alignment_score = option_scores_batch(
+        spy_ema8 > spy_ema21, spy_ema8 < spy_ema21,
+        call_ema8, call_ema21, put_ema8, put_ema21, params)
+    return {
+        "call": call,
+        "put": put,
+        "expiry": chain.expiries[call],
+        "strike": chain.strikes[call],
+        "option_confirm_score": option_confirm_score,
+        "opposing_score": opposing_score,
+        "option_alignment_score": option_alignment_score,
+        "option_score": option_confirm_score + opposing_score + option_alignment_score,
+        "valid": np.isfinite(call_ema8) & np.isfinite(call_ema21) & np.isfinite(put_ema8) & np.isfinite(put_ema21),
+    }
+
+
+# Best-aligned valid pairs, highest option score first; ties go to the
+# strike closest to `price` (when given), then the nearest expiry
+def best_pairs(chain, scores, price=None, top=10):
+    valid = np.flatnonzero(scores["valid"])
+    distance = np.abs(scores["strike"][valid] - price) if price is not None else np.zeros(len(valid))
+    order = valid[np.lexsort((scores["expiry"][valid], distance, -scores["option_score"][valid]))][:top]
+    return [
+        {
+            "expiry": str(scores["expiry"][i]),
+            "strike": float(scores["strike"][i]),
+            "call": chain.symbols[scores["call"][i]],
+            "put": chain.symbols[scores["put"][i]],
+            "option_score": float(scores["option_score"][i]),
+            "option_confirm_score": float(scores["option_confirm_score"][i]),
+            "opposing_score": float(scores["opposing_score"][i]),
+            "option_alignment_score": float(scores["option_alignment_score"][i]),
+        }
+        for i in order
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score every CALL/PUT pair of an option chain")
+    parser.add_argument("chain", help="Chain CSV: symbol, expiry, strike, right (C/P), optional ema8, ema21")
+    parser.add_argument("--spy-ema8", type=float, required=True)
+    parser.add_argument("--spy-ema21", type=float, required=True)
+    parser.add_argument("--price", type=float, help="Underlying price, used to break ties by moneyness")
+    parser.add_argument("--bars", help="Bar file to build the contract EMAs from")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    try:
+        chain = load_chain(args.chain)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.bars:
+        engine = StreamingEMA(capacity=max(16, len(chain)))
+        consume_bars(engine, read_bars(args.bars))
+        chain.refresh(engine)
+
+    scores = score_chain(chain, args.spy_ema8, args.spy_ema21)
+    print(f"{len(chain)} contracts, {len(scores['call'])} pairs, {int(scores['valid'].sum())} with EMAs")
+    print(f"{'Expiry':<11} {'Strike':>8} {'CALL':<22} {'PUT':<22} {'Score':>6} {'Conf':>5} {'Opp':>5} {'Align':>5}")
+    for row in best_pairs(chain, scores, args.price, args.top):
+        print(f"{row['expiry']:<11} {row['strike']:>8.2f} {row['call']:<22} {row['put']:<22} "
+              f"{row['option_score']:>6.1f} {row['option_confirm_score']:>5.1f} "
+              f"{row['opposing_score']:>5.1f} {row['option_alignment_score']:>5.1f}")
+
+
+if __name__ == "__main__":
+    main()
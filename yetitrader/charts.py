@@ -0,0 +1,109 @@
+import io
+
+from yetitrader.cache import shared_cache
+from yetitrader.metrics import METRICS
+
+# matplotlib is imported inside the render functions, so importing this
+# module (or anything in yetitrader) does not pay its import cost until a
+# chart is actually drawn
+
+# Bottom-to-top drawing order of the pivot levels
+CHART_LEVELS = ("S3", "S2", "S1", "Pivot", "R1", "R2", "R3")
+
+# Same savefig options st.pyplot uses, so cached images look identical
+SAVEFIG_OPTIONS = {"bbox_inches": "tight", "dpi": 200, "format": "png"}
+
+
+# Function to render a figure to PNG bytes. Figures are created without
+# pyplot, so nothing keeps them alive once rendered; clearing them drops
+# the artists right away instead of waiting for garbage collection.
+def figure_to_png(fig):
+    buffer = io.BytesIO()
+    fig.savefig(buffer, **SAVEFIG_OPTIONS)
+    fig.clear()
+    return buffer.getvalue()
+
+
+@shared_cache("chart.pivot_levels", maxsize=64)
+def _pivot_chart(levels, broken, current_price, context_text, title):
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(10, 6))
+    ax = fig.subplots()
+
+    # Create horizontal lines for each level with broken levels shown differently
+    for label, price_level in levels:
+        if label in broken:
+            # Use dashed line for broken levels
+            ax.axhline(y=price_level, color='orange', linestyle='--', alpha=0.9, linewidth=2)
+            ax.text(0.02, price_level, f"{label}: {price_level:.2f} (BROKEN)", verticalalignment='center', fontweight='bold', color='orange')
+        else:
+            # Use normal colors
+            if label.startswith("R"):
+                color = "green"
+            elif label.startswith("S"):
+                color = "red"
+            else:
+                color = "purple"
+            ax.axhline(y=price_level, color=color, linestyle='-', alpha=0.7, linewidth=2)
+            ax.text(0.02, price_level, f"{label}: {price_level:.2f}", verticalalignment='center', fontweight='bold', color=color)
+
+    price_range = [price_level for _, price_level in levels]
+    if current_price is not None:
+        # Highlight current price
+        ax.axhline(y=current_price, color='blue', linestyle='--', linewidth=2)
+        ax.text(0.02, current_price, f"Current: {current_price:.2f}", verticalalignment='center', fontweight='bold', color='blue')
+        price_range.append(current_price)
+
+    if context_text is not None:
+        # Add context information
+        ax.text(0.5, 0.02, context_text,
+                transform=ax.transAxes, horizontalalignment='center',
+                fontweight='bold', fontsize=10, color='blue',
+                bbox=dict(facecolor='white', alpha=0.8, edgecolor='blue', boxstyle='round,pad=0.5'))
+
+    # Set the y-limits to be slightly outside the range of values
+    ax.set_ylim(min(price_range) - 2, max(price_range) + 2)
+
+    # Remove x-axis ticks and labels
+    ax.set_xticks([])
+    ax.set_xticklabels([])
+
+    # Set title and labels
+    ax.set_title(title)
+    ax.set_ylabel("Price")
+
+    return figure_to_png(fig)
+
+
+# Pivot level chart as PNG bytes. `levels` maps R3..S3 to values; renders
+# are cached process-wide (shared by every session) in a bounded LRU with a
+# TTL, keyed by every input that affects the image.
+def pivot_chart_png(levels, broken_names=(), current_price=None, context_text=None,
+                    title="SPY Pivot Levels"):
+    key = tuple((label, float(levels[label])) for label in CHART_LEVELS)
+    price = None if current_price is None else float(current_price)
+    with METRICS.stage("chart.pivot_levels"):
+        return _pivot_chart(key, frozenset(broken_names), price, context_text, title)
+
+
+@shared_cache("chart.score_pie", maxsize=32)
+def _score_pie(labels, scores):
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(8, 8))
+    ax = fig.subplots()
+    ax.pie(scores, labels=labels, autopct='%1.1f%%', startangle=90)
+    ax.axis('equal')
+    return figure_to_png(fig)
+
+
+# Score breakdown pie chart as PNG bytes (cached like the pivot chart)
+def score_pie_png(labels, scores):
+    with METRICS.stage("chart.score_pie"):
+        return _score_pie(tuple(labels), tuple(float(score) for score in scores))
+
+
+# Hit/miss counts of the render caches
+def cache_info():
+    return {"pivot_chart": _pivot_chart.cache.stats(), "score_pie": _score_pie.cache.stats()}
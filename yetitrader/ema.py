@@ -0,0 +1,73 @@
+import numpy as np
+
+
+# Streaming EMA state for many symbols. Each symbol owns one row of a
+# (capacity, len(periods)) float64 array, so an update touches a fixed
+# number of values no matter how many bars have been seen.
+class StreamingEMA:
+    def __init__(self, periods=(8, 21), capacity=16):
+        self.periods = tuple(periods)
+        self.alpha = 2.0 / (np.asarray(self.periods, dtype=np.float64) + 1.0)
+        self.values = np.full((capacity, len(self.periods)), np.nan)
+        self.last = np.full(capacity, np.nan)
+        self.counts = np.zeros(capacity, dtype=np.int64)
+        self.index = {}
+
+    # Row for a symbol, allocating (and growing the arrays) on first sight
+    def slot(self, symbol):
+        i = self.index.get(symbol)
+        if i is None:
+            i = len(self.index)
+            if i == len(self.counts):
+                self.values = np.vstack([self.values, np.full_like(self.values, np.nan)])
+                self.last = np.concatenate([self.last, np.full_like(self.last, np.nan)])
+                self.counts = np.concatenate([self.counts, np.zeros_like(self.counts)])
+            self.index[symbol] = i
+        return i
+
+    # Fold one close into a symbol's EMAs (the first close seeds them)
+    def update(self, symbol, price):
+        i = self.slot(symbol)
+        row = self.values[i]
+        if self.counts[i]:
+            row += self.alpha * (price - row)
+        else:
+            row[:] = price
+        self.last[i] = price
+        self.counts[i] += 1
+        return row
+
+    # Fold one close for each of several distinct symbol rows at once
+    def update_rows(self, rows, prices):
+        rows = np.asarray(rows, dtype=np.intp)
+        prices = np.asarray(prices, dtype=np.float64)[:, None]
+        current = self.values[rows]
+        seeded = (self.counts[rows] > 0)[:, None]
+        self.values[rows] = np.where(seeded, current + self.alpha * (prices - current), prices)
+        self.last[rows] = prices[:, 0]
+        self.counts[rows] += 1
+
+    def get(self, symbol):
+        i = self.index.get(symbol)
+        if i is None:
+            return (np.nan,) * len(self.periods)
+        return tuple(self.values[i].tolist())
+
+    # The six sidebar values for a SPY/CALL/PUT trio (8 and 21 periods)
+    def framework_inputs(self, spy_symbol, call_symbol, put_symbol):
+        fast, slow = self.periods.index(8), self.periods.index(21)
+        inputs = {}
+        for prefix, symbol in (("spy", spy_symbol), ("call", call_symbol), ("put", put_symbol)):
+            values = self.get(symbol)
+            inputs[f"{prefix}_ema8"] = values[fast]
+            inputs[f"{prefix}_ema21"] = values[slow]
+        return inputs
+
+
+# Function to feed a sequence of bars through an EMA engine
+def consume_bars(engine, bars):
+    count = 0
+    for bar in bars:
+        engine.update(bar.symbol, bar.close)
+        count += 1
+    return count
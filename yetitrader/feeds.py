@@ -0,0 +1,74 @@
+import socket
+from collections import namedtuple
+from datetime import datetime
+
+# One OHLCV bar. Feeds are line-delimited CSV, either
+#   timestamp,symbol,close
+# or
+#   timestamp,symbol,open,high,low,close,volume
+# Timestamps may be epoch seconds or ISO-8601; header lines are skipped.
+Bar = namedtuple("Bar", ["timestamp", "symbol", "open", "high", "low", "close", "volume"])
+
+
+# Function to parse a timestamp field into epoch seconds
+def parse_timestamp(value):
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+# Function to parse one feed line (returns None for headers/blank lines)
+def parse_bar(line):
+    fields = line.strip().split(",")
+    try:
+        if len(fields) == 3:
+            close = float(fields[2])
+            return Bar(parse_timestamp(fields[0]), fields[1], close, close, close, close, 0.0)
+        if len(fields) >= 6:
+            volume = float(fields[6]) if len(fields) > 6 and fields[6] else 0.0
+            return Bar(parse_timestamp(fields[0]), fields[1], float(fields[2]), float(fields[3]),
+                       float(fields[4]), float(fields[5]), volume)
+    except ValueError:
+        pass
+    return None
+
+
+# Function to read every bar from a local file
+def read_bars(path):
+    with open(path, "r") as f:
+        for line in f:
+            bar = parse_bar(line)
+            if bar is not None:
+                yield bar
+
+
+# Function to read bars from a local socket that streams feed lines
+def read_bars_socket(host="127.0.0.1", port=9009):
+    with socket.create_connection((host, port)) as sock, sock.makefile("r") as f:
+        for line in f:
+            bar = parse_bar(line)
+            if bar is not None:
+                yield bar
+
+
+# Tails a bar file, returning only the bars appended since the last read
+class BarFileTail:
+    def __init__(self, path):
+        self.path = path
+        self.offset = 0
+
+    def read_new(self):
+        bars = []
+        with open(self.path, "r") as f:
+            f.seek(self.offset)
+            while True:
+                line = f.readline()
+                # Leave a partially written last line for the next read
+                if not line.endswith("\n"):
+                    break
+                self.offset = f.tell()
+                bar = parse_bar(line)
+                if bar is not None:
+                    bars.append(bar)
+        return bars
@@ -0,0 +1,370 @@
+import argparse
+import itertools
+import os
+import threading
+import time
+from functools import lru_cache
+
+import numpy as np
+
+from yetitrader import scoring
+from yetitrader.scoring import (
+    CONTEXT_CODES, CONTEXT_MESSAGES, CONTEXTS, DEFAULT_PARAMS, DETAIL_CATEGORIES, DIR_UNKNOWN, GAP_MESSAGES,
+    LEVEL_NAMES, PIVOT_CODES, PIVOT_MESSAGES, RECOMMENDATIONS, TRENDS, ScoreResult, direction_codes, gap_codes,
+)
+
+# One journal record per evaluation: the inputs, the nearest levels, the
+# scores and integer codes for every message. Fixed width and packed, so a
+# day file is a plain array of records behind a short header.
+JOURNAL_DTYPE = np.dtype([
+    ("timestamp", "<f8"),
+    ("symbol", "S12"),
+    ("price", "<f8"),
+    ("spy_ema8", "<f8"), ("spy_ema21", "<f8"),
+    ("call_ema8", "<f8"), ("call_ema21", "<f8"),
+    ("put_ema8", "<f8"), ("put_ema21", "<f8"),
+    ("nearest_resistance", "<f8"), ("nearest_support", "<f8"),
+    ("nearest_resistance_idx", "i1"), ("nearest_support_idx", "i1"),
+    ("broken_mask", "u1"),
+    ("trend", "u1"), ("recommendation", "u1"), ("pivot_context", "u1"),
+    ("total_score", "<f4"),
+    ("trend_score", "<f4"), ("option_confirm_score", "<f4"), ("opposing_score", "<f4"),
+    ("ema_gap_score", "<f4"), ("option_alignment_score", "<f4"), ("pivot_score", "<f4"),
+    ("trend_msg", "u1"), ("option_confirm_msg", "u1"), ("opposing_msg", "u1"),
+    ("ema_gap_msg", "u1"), ("option_alignment_msg", "u1"), ("pivot_msg", "u1"),
+    ("context_msg", "u1"),
+])
+
+MAGIC = b"YTJRNL01"
+HEADER = np.dtype([("magic", "S8"), ("itemsize", "<u8")])
+
+# EMAs with each direction (DIR_UP, DIR_DOWN, DIR_FLAT, DIR_UNKNOWN)
+_DIRECTION_EMAS = ((1.0, 0.0), (0.0, 1.0), (0.0, 0.0), (np.nan, np.nan))
+
+
+# Function to tabulate a message function of (trend, call direction, put
+# direction): returns the distinct messages and a (3, 4, 4) code table.
+# Cases with an unknown (NaN) direction come last, so the known ones keep
+# the codes journals were written with.
+def _direction_messages(fn):
+    messages = []
+    codes = np.zeros((3, 4, 4), dtype=np.uint8)
+    cases = sorted(itertools.product(range(len(TRENDS)), range(4), range(4)),
+                   key=lambda case: DIR_UNKNOWN in case[1:])
+    for trend, call_dir, put_dir in cases:
+        call_ema8, call_ema21 = _DIRECTION_EMAS[call_dir]
+        put_ema8, put_ema21 = _DIRECTION_EMAS[put_dir]
+        message = fn(TRENDS[trend], call_ema8, call_ema21, put_ema8, put_ema21)[1]
+        if message not in messages:
+            messages.append(message)
+        codes[trend, call_dir, put_dir] = messages.index(message)
+    return tuple(messages), codes
+
+
+# Per-pillar message tables. The fixed messages are taken from the scoring
+# functions; the gap, context and pivot zone templates (and their code
+# tables) are scoring's own, filled from the record on decode.
+TREND_MESSAGES = tuple(scoring.determine_spy_trend(*emas)[2] for emas in _DIRECTION_EMAS[:len(TRENDS)])
+CONFIRM_MESSAGES, CONFIRM_CODES = _direction_messages(scoring.analyze_option_confirmation)
+OPPOSING_MESSAGES, OPPOSING_CODES = _direction_messages(scoring.analyze_opposing_option)
+ALIGNMENT_MESSAGES, ALIGNMENT_CODES = _direction_messages(scoring.analyze_option_trend_alignment)
+
+
+# Function to fill the message code columns of `records` from their inputs,
+# trend and pivot context
+def encode_messages(records, params=DEFAULT_PARAMS):
+    trend = records["trend"].astype(np.intp)
+    context = records["pivot_context"].astype(np.intp)
+    call_dir = direction_codes(records["call_ema8"], records["call_ema21"])
+    put_dir = direction_codes(records["put_ema8"], records["put_ema21"])
+
+    records["trend_msg"] = trend
+    records["option_confirm_msg"] = CONFIRM_CODES[trend, call_dir, put_dir]
+    records["opposing_msg"] = OPPOSING_CODES[trend, call_dir, put_dir]
+    records["option_alignment_msg"] = ALIGNMENT_CODES[trend, call_dir, put_dir]
+    records["ema_gap_msg"] = gap_codes(records["spy_ema8"], records["spy_ema21"], params)
+    records["context_msg"] = CONTEXT_CODES[trend, context]
+    records["pivot_msg"] = PIVOT_CODES[trend, context]
+    return records
+
+
+# Function to pack (name, value) broken levels into a LEVEL_NAMES bitmask
+def broken_mask(broken_levels):
+    mask = 0
+    for name, _ in broken_levels:
+        if name in LEVEL_NAMES:
+            mask |= 1 << LEVEL_NAMES.index(name)
+    return mask
+
+
+# Function to build one record from a calculate_score_and_recommendation
+# result (or a score_snapshot ScoreResult) and the inputs it was computed from
+def encode_result(results, spy_ema8, spy_ema21, call_ema8, call_ema21, put_ema8, put_ema21,
+                  current_price, nearest_levels, broken_levels, symbol="SPY", timestamp=None):
+    record = np.zeros(1, dtype=JOURNAL_DTYPE)
+    record["timestamp"] = time.time() if timestamp is None else timestamp
+    record["symbol"] = symbol.encode()
+    record["price"] = current_price
+    record["spy_ema8"], record["spy_ema21"] = spy_ema8, spy_ema21
+    record["call_ema8"], record["call_ema21"] = call_ema8, call_ema21
+    record["put_ema8"], record["put_ema21"] = put_ema8, put_ema21
+    record["nearest_resistance"] = nearest_levels["nearest_resistance"]
+    record["nearest_support"] = nearest_levels["nearest_support"]
+    for side in ("resistance", "support"):
+        name = nearest_levels[f"nearest_{side}_name"]
+        record[f"nearest_{side}_idx"] = LEVEL_NAMES.index(name) if name in LEVEL_NAMES else -1
+    record["broken_mask"] = broken_mask(broken_levels)
+    record["total_score"] = results["total_score"]
+    if isinstance(results, ScoreResult):
+        record["trend"] = results.trend_code
+        record["recommendation"] = results.recommendation_code
+        record["pivot_context"] = results.context_code
+        for _, field, _ in DETAIL_CATEGORIES:
+            record[field] = getattr(results, field)
+    else:
+        record["trend"] = TRENDS.index(results["trend"])
+        record["recommendation"] = RECOMMENDATIONS.index(results["recommendation"])
+        record["pivot_context"] = CONTEXTS.index(results["pivot_context"])
+        for detail, (_, field, _) in zip(results["details"], DETAIL_CATEGORIES):
+            record[field] = detail["score"]
+    return encode_messages(record)
+
+
+# Function to build records from a score_batch result and its inputs.
+# `broken` is a LEVEL_NAMES bitmask (scalar or per row).
+def encode_batch(scores, spy_ema8, spy_ema21, call_ema8, call_ema21, put_ema8, put_ema21,
+                 price, timestamps, symbols, broken=0, params=DEFAULT_PARAMS):
+    price = np.asarray(price, dtype=np.float64)
+    records = np.zeros(price.shape[0], dtype=JOURNAL_DTYPE)
+    records["timestamp"] = timestamps
+    records["symbol"] = np.asarray(symbols, dtype="S12")
+    records["price"] = price
+    for field, values in (("spy_ema8", spy_ema8), ("spy_ema21", spy_ema21),
+                          ("call_ema8", call_ema8), ("call_ema21", call_ema21),
+                          ("put_ema8", put_ema8), ("put_ema21", put_ema21)):
+        records[field] = values
+    records["broken_mask"] = broken
+    for field, _ in JOURNAL_DTYPE.fields.items():
+        if field in scores:
+            records[field] = scores[field]
+    return encode_messages(records, params)
+
+
+# Function to get the display color calculate_score_and_recommendation
+# gives a recommendation
+def result_color(recommendation, total_score):
+    if recommendation == "BUY CALLS":
+        return "green"
+    if recommendation == "BUY PUTS" or total_score < 70:
+        return "red"
+    return "orange"
+
+
+# Function to rebuild the results dict (as returned by
+# calculate_score_and_recommendation) from one journal record
+def decode_record(record):
+    trend = int(record["trend"])
+    total_score = float(record["total_score"])
+    recommendation = RECOMMENDATIONS[record["recommendation"]]
+    color = result_color(recommendation, total_score)
+
+    names = {}
+    for side in ("resistance", "support"):
+        idx = int(record[f"nearest_{side}_idx"])
+        names[f"{side}_name"] = LEVEL_NAMES[idx] if idx >= 0 else "None"
+    broken = ", ".join(name for bit, name in enumerate(LEVEL_NAMES) if record["broken_mask"] >> bit & 1)
+    description = CONTEXT_MESSAGES[record["context_msg"]].format(
+        broken=broken, resistance=float(record["nearest_resistance"]),
+        support=float(record["nearest_support"]), **names)
+
+    gap = abs(float(record["spy_ema8"]) - float(record["spy_ema21"]))
+    messages = (
+        TREND_MESSAGES[record["trend_msg"]],
+        CONFIRM_MESSAGES[record["option_confirm_msg"]],
+        OPPOSING_MESSAGES[record["opposing_msg"]],
+        GAP_MESSAGES[record["ema_gap_msg"]].format(gap=gap),
+        ALIGNMENT_MESSAGES[record["option_alignment_msg"]],
+        PIVOT_MESSAGES[record["pivot_msg"]].format(description=description),
+    )
+    return {
+        "trend": TRENDS[trend],
+        "total_score": total_score,
+        "recommendation": recommendation,
+        "color": color,
+        "pivot_context": CONTEXTS[record["pivot_context"]],
+        "context_description": description,
+        "details": [
+            {"category": category, "score": float(record[field]), "message": message, "weight": weight}
+            for (category, field, weight), message in zip(DETAIL_CATEGORIES, messages)
+        ],
+    }
+
+
+# Function to name the day file for an epoch timestamp (UTC days)
+def journal_path(directory, timestamp, prefix="decisions"):
+    day = np.datetime64(int(timestamp // 86400), "D")
+    return os.path.join(directory, f"{prefix}-{day}.bin")
+
+
+# Append-only decision journal, one file per UTC day. Records are written
+# as raw JOURNAL_DTYPE bytes after a 16-byte header, so readers can map a
+# file straight into a record array while it is still being appended to.
+class DecisionJournal:
+    def __init__(self, directory, prefix="decisions"):
+        self.directory = directory
+        self.prefix = prefix
+        self.path = None
+        self.file = None
+        self.records = 0
+        self.lock = threading.RLock()
+        os.makedirs(directory, exist_ok=True)
+
+    # Switch to the day file for `timestamp`, writing the header for a new
+    # file and dropping any torn trailing record left by a crash
+    def _open(self, timestamp):
+        path = journal_path(self.directory, timestamp, self.prefix)
+        if path == self.path:
+            return
+        self.close()
+        header_size = HEADER.itemsize
+        if os.path.exists(path) and os.path.getsize(path) >= header_size:
+            _check_header(path)
+            whole = (os.path.getsize(path) - header_size) // JOURNAL_DTYPE.itemsize
+            with open(path, "r+b") as f:
+                f.truncate(header_size + whole * JOURNAL_DTYPE.itemsize)
+            self.file = open(path, "ab")
+        else:
+            self.file = open(path, "wb")
+            self.file.write(np.array((MAGIC, JOURNAL_DTYPE.itemsize), dtype=HEADER).tobytes())
+        self.path = path
+
+    # Append encoded records, rotating to a new file at each UTC day boundary
+    def append(self, records):
+        records = np.asarray(records, dtype=JOURNAL_DTYPE)
+        if not len(records):
+            return 0
+        days = (records["timestamp"] // 86400).astype(np.int64)
+        boundaries = np.flatnonzero(np.diff(days)) + 1
+        with self.lock:
+            for chunk in np.split(records, boundaries):
+                self._open(chunk["timestamp"][0])
+                self.file.write(chunk.tobytes())
+            self.records += len(records)
+        return len(records)
+
+    # Journal one calculate_score_and_recommendation result
+    def record(self, results, spy_ema8, spy_ema21, call_ema8, call_ema21, put_ema8, put_ema21,
+               current_price, nearest_levels, broken_levels, symbol="SPY", timestamp=None):
+        return self.append(encode_result(
+            results, spy_ema8, spy_ema21, call_ema8, call_ema21, put_ema8, put_ema21,
+            current_price, nearest_levels, broken_levels, symbol, timestamp))
+
+    # Journal a score_batch result (see encode_batch)
+    def record_batch(self, scores, spy_ema8, spy_ema21, call_ema8, call_ema21, put_ema8, put_ema21,
+                     price, timestamps, symbols, broken=0, params=DEFAULT_PARAMS):
+        return self.append(encode_batch(
+            scores, spy_ema8, spy_ema21, call_ema8, call_ema21, put_ema8, put_ema21,
+            price, timestamps, symbols, broken, params))
+
+    def flush(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.flush()
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+            self.file = None
+            self.path = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# Function to get the process-wide journal for a directory (shared by every
+# Streamlit session)
+@lru_cache(maxsize=None)
+def open_journal(directory, prefix="decisions"):
+    return DecisionJournal(directory, prefix)
+
+
+def _check_header(path):
+    header = np.fromfile(path, dtype=HEADER, count=1)[0]
+    if header["magic"] != MAGIC or header["itemsize"] != JOURNAL_DTYPE.itemsize:
+        raise ValueError(f"{path} is not a decision journal with this record layout")
+
+
+# Function to memory-map a journal file as a read-only JOURNAL_DTYPE array
+# (a torn trailing record is left out)
+def read_journal(path):
+    _check_header(path)
+    count = (os.path.getsize(path) - HEADER.itemsize) // JOURNAL_DTYPE.itemsize
+    if not count:
+        return np.zeros(0, dtype=JOURNAL_DTYPE)
+    return np.memmap(path, dtype=JOURNAL_DTYPE, mode="r", offset=HEADER.itemsize, shape=(count,))
+
+
+# Function to memory-map the journal for one day ('YYYY-MM-DD')
+def read_day(directory, day, prefix="decisions"):
+    return read_journal(os.path.join(directory, f"{prefix}-{day}.bin"))
+
+
+# Function to list the journal days in a directory, oldest first
+def journal_days(directory, prefix="decisions"):
+    return sorted(name[len(prefix) + 1:-4] for name in os.listdir(directory)
+                  if name.startswith(prefix + "-") and name.endswith(".bin"))
+
+
+# Function to summarize a day's records: counts per recommendation and
+# pivot context, and mean score per symbol
+def summarize(records):
+    summary = {
+        "records": len(records),
+        "recommendations": dict(zip(RECOMMENDATIONS, np.bincount(records["recommendation"],
+                                                                 minlength=len(RECOMMENDATIONS)).tolist())),
+        "pivot_contexts": dict(zip(CONTEXTS, np.bincount(records["pivot_context"],
+                                                         minlength=len(CONTEXTS)).tolist())),
+    }
+    symbols, inverse = np.unique(records["symbol"], return_inverse=True)
+    totals = np.bincount(inverse, weights=records["total_score"], minlength=len(symbols))
+    counts = np.bincount(inverse, minlength=len(symbols))
+    summary["mean_score"] = {s.decode(): float(t / c) for s, t, c in zip(symbols, totals, counts)}
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarize a 4-pillar decision journal")
+    parser.add_argument("directory")
+    parser.add_argument("--day", help="Day to read (YYYY-MM-DD); default is the latest")
+    parser.add_argument("--prefix", default="decisions")
+    parser.add_argument("--tail", type=int, default=0, help="Also print the last N decisions in full")
+    args = parser.parse_args(argv)
+
+    days = journal_days(args.directory, args.prefix)
+    if not days:
+        parser.error(f"no journal files in {args.directory}")
+    day = args.day or days[-1]
+    records = read_day(args.directory, day, args.prefix)
+
+    summary = summarize(records)
+    print(f"{day}: {summary['records']} decisions")
+    for name, count in summary["recommendations"].items():
+        print(f"  {name:<22} {count}")
+    for name, count in summary["pivot_contexts"].items():
+        print(f"  {name:<44} {count}")
+    for symbol, score in summary["mean_score"].items():
+        print(f"  {symbol:<12} mean score {score:.1f}")
+    for record in records[len(records) - min(args.tail, len(records)):]:
+        results = decode_record(record)
+        print(f"{record['timestamp']:.3f} {record['symbol'].decode()} {results['recommendation']} "
+              f"{results['total_score']:.1f} {results['pivot_context']}")
+        for detail in results["details"]:
+            print(f"    {detail['category']}: {detail['score']} {detail['message']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+import numpy as np
+
+from yetitrader.cache import shared_cache
+
+
+# Support/resistance levels kept as parallel arrays sorted by value, so the
+# nearest level on either side of a price is a binary search. Levels may
+# come from any source (daily/weekly/monthly pivots, Camarilla, Fibonacci,
+# user-defined) and carry their own broken flag. Equal values keep their
+# insertion order, and lookups pick the first-inserted level on a tie,
+# like find_nearest_levels does with its dict.
+class LevelIndex:
+    def __init__(self):
+        self.values = np.empty(0, dtype=np.float64)
+        self.names = np.empty(0, dtype=object)
+        self.sources = np.empty(0, dtype=object)
+        self.broken = np.empty(0, dtype=bool)
+
+    # Build an index from a {name: value} dict (e.g. the R3..S3 pivots)
+    @classmethod
+    def from_levels(cls, levels, source="daily", broken_names=()):
+        index = cls()
+        index.extend(levels.items(), source)
+        for name in broken_names:
+            index.set_broken(name, True, source)
+        return index
+
+    def __len__(self):
+        return len(self.values)
+
+    def add(self, name, value, source="user", broken=False):
+        value = float(value)
+        if np.isnan(value):
+            return
+        i = np.searchsorted(self.values, value, side="right")
+        self.values = np.insert(self.values, i, value)
+        self.names = np.insert(self.names, i, name)
+        self.sources = np.insert(self.sources, i, source)
+        self.broken = np.insert(self.broken, i, broken)
+
+    # Add many (name, value) pairs with one sort instead of one insert each
+    def extend(self, items, source="user", broken=False):
+        items = [(name, float(value)) for name, value in items if not np.isnan(value)]
+        if not items:
+            return
+        names, values = zip(*items)
+        count = len(items)
+        values = np.concatenate([self.values, values])
+        order = np.argsort(values, kind="stable")
+        self.values = values[order]
+        self.names = np.concatenate([self.names, np.array(names, dtype=object)])[order]
+        self.sources = np.concatenate([self.sources, np.full(count, source, dtype=object)])[order]
+        self.broken = np.concatenate([self.broken, np.full(count, broken, dtype=bool)])[order]
+
+    def remove(self, name, source=None):
+        keep = ~self._match(name, source)
+        self.values = self.values[keep]
+        self.names = self.names[keep]
+        self.sources = self.sources[keep]
+        self.broken = self.broken[keep]
+
+    def set_broken(self, name, broken=True, source=None):
+        self.broken[self._match(name, source)] = broken
+
+    def _match(self, name, source):
+        match = self.names == name
+        if source is not None:
+            match &= self.sources == source
+        return match
+
+    # Broken levels in the (name, value) tuple form kept in session state
+    def broken_levels(self):
+        return [(name, value) for name, value in
+                zip(self.names[self.broken].tolist(), self.values[self.broken].tolist())]
+
+    # Positions of the nearest level strictly above / below each price
+    # (-1 when there is none on that side). One binary search per price:
+    # the level just below the insertion point is either strictly below or
+    # equal to the price, in which case we step over its run of equal values.
+    def nearest_positions(self, prices):
+        prices = np.asarray(prices, dtype=np.float64)
+        count = len(self.values)
+        if count == 0:
+            none = np.full(prices.shape, -1, dtype=np.intp)
+            return none, none.copy()
+
+        # First position of each run of equal values
+        run_start = np.searchsorted(self.values, self.values, side="left")
+
+        above = np.searchsorted(self.values, prices, side="right")
+        below = above - 1
+        valid = below >= 0
+        safe = np.where(valid, below, 0)
+        below = np.where(valid & (self.values[safe] == prices), run_start[safe] - 1, below)
+        below = np.where(below >= 0, run_start[np.maximum(below, 0)], -1)
+        return np.where(above < count, above, -1), below
+
+    # Vectorized nearest resistance/support with the ±5 fallback
+    def nearest_batch(self, prices):
+        prices = np.asarray(prices, dtype=np.float64)
+        above, below = self.nearest_positions(prices)
+        values = self.values if len(self.values) else np.zeros(1)
+        return {
+            "nearest_resistance": np.where(above >= 0, values[above], prices + 5),
+            "nearest_resistance_pos": above,
+            "nearest_support": np.where(below >= 0, values[below], prices - 5),
+            "nearest_support_pos": below,
+        }
+
+    # Scalar lookup, same result shape as find_nearest_levels
+    def nearest(self, price):
+        above, below = self.nearest_positions(price)
+        above, below = int(above), int(below)
+        return {
+            "nearest_resistance": self.values[above].item() if above >= 0 else price + 5,
+            "nearest_resistance_name": self.names[above] if above >= 0 else "None",
+            "nearest_support": self.values[below].item() if below >= 0 else price - 5,
+            "nearest_support_name": self.names[below] if below >= 0 else "None"
+        }
+
+
+# Sorted index over a tuple of (name, value) levels, shared by every
+# session. Read-only: flag broken levels on an index of your own.
+@shared_cache("levels.index", maxsize=64)
+def shared_level_index(levels):
+    return LevelIndex.from_levels(dict(levels))
+
+
+# Function to get the nearest levels of a price (find_nearest_levels
+# result shape) against a tuple of (name, value) levels, cached process-wide
+@shared_cache("levels.nearest", maxsize=4096)
+def lookup_nearest_levels(levels, price):
+    return shared_level_index(levels).nearest(price)
+
+
+# Function to build the pivot level table shown in the app: the levels
+# top to bottom with the current price between Pivot and S1, and each
+# level's Active/Broken status. `levels` is a tuple of (name, value) in
+# R3..S3 order and `broken_names` a frozenset. Cached process-wide; the
+# DataFrame is shared, so do not modify it.
+@shared_cache("levels.pivot_table", maxsize=256)
+def pivot_levels_table(levels, broken_names, current_price):
+    import pandas as pd
+
+    rows = [{"Level": name, "Value": value, "Status": "Broken" if name in broken_names else "Active"}
+            for name, value in levels]
+    rows.insert([row["Level"] for row in rows].index("Pivot") + 1,
+                {"Level": "Current Price", "Value": current_price, "Status": ""})
+    return pd.DataFrame(rows)
@@ -0,0 +1,207 @@
+import bisect
+import contextvars
+import io
+import logging
+import os
+import pstats
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from yetitrader import cache
+
+logger = logging.getLogger("yetitrader.metrics")
+
+# Latency histogram bucket upper bounds, in seconds
+BUCKETS = (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4,
+           1e-3, 2.5e-3, 5e-3, 1e-2, 2.5e-2, 5e-2, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+# Call count, total time and bucketed latencies for one stage
+class Histogram:
+    __slots__ = ("counts", "count", "total")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+
+
+class _Timer:
+    __slots__ = ("metrics", "name", "started")
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.name, time.perf_counter() - self.started)
+
+
+# Consecutive stages of one call: every lap() records the time since the
+# previous lap (or since the laps were started) under its stage name
+class _Laps:
+    __slots__ = ("metrics", "last")
+
+    def __init__(self, metrics):
+        self.metrics = metrics
+        self.last = time.perf_counter()
+
+    def lap(self, name):
+        self.metrics.observe(name, time.perf_counter() - self.last)
+        self.last = time.perf_counter()
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *exc):
+        pass
+
+
+_NULL_TIMER = _NullTimer()
+
+
+# Process-wide stage metrics. Recording is on for the whole process while
+# `enabled` (YETITRADER_METRICS=1, the service and scanner), or for one
+# thread/task after record(True) - e.g. one Streamlit session's reruns.
+# Scoring code times its own stages with laps(); while nothing records,
+# stage() hands out a shared no-op context manager and laps() None, so
+# the hot path pays one check.
+class Metrics:
+    def __init__(self):
+        self.enabled = False
+        self.stages = {}
+        self.lock = threading.Lock()
+        self._recording = contextvars.ContextVar("yetitrader_metrics_recording", default=False)
+
+    def observe(self, name, seconds):
+        with self.lock:
+            histogram = self.stages.get(name)
+            if histogram is None:
+                histogram = self.stages[name] = Histogram()
+            histogram.observe(seconds)
+
+    def active(self):
+        return self.enabled or self._recording.get()
+
+    def stage(self, name):
+        return _Timer(self, name) if self.active() else _NULL_TIMER
+
+    def laps(self):
+        return _Laps(self) if self.active() else None
+
+    # Record (or stop recording) in the current thread/task only
+    def record(self, on=True):
+        self._recording.set(on)
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        with self.lock:
+            self.stages = {}
+
+    # (name, bucket counts, count, total) per stage, copied under the lock
+    def _snapshot(self):
+        with self.lock:
+            return [(name, list(histogram.counts), histogram.count, histogram.total)
+                    for name, histogram in sorted(self.stages.items())]
+
+    # Prometheus text exposition format, followed by the shared cache
+    # counters
+    def prometheus_text(self):
+        lines = [
+            "# HELP yetitrader_stage_seconds Latency of 4-pillar pipeline stages",
+            "# TYPE yetitrader_stage_seconds histogram",
+        ]
+        for name, counts, count, total in self._snapshot():
+            cumulative = 0
+            for bound, bucket in zip(BUCKETS, counts):
+                cumulative += bucket
+                lines.append(f'yetitrader_stage_seconds_bucket{{stage="{name}",le="{bound:g}"}} {cumulative}')
+            lines.append(f'yetitrader_stage_seconds_bucket{{stage="{name}",le="+Inf"}} {count}')
+            lines.append(f'yetitrader_stage_seconds_sum{{stage="{name}"}} {total:.9f}')
+            lines.append(f'yetitrader_stage_seconds_count{{stage="{name}"}} {count}')
+        return "\n".join(lines) + "\n" + cache.prometheus_text()
+
+    # One-line summary: calls and mean latency per stage
+    def log_line(self):
+        parts = []
+        for name, _, count, total in self._snapshot():
+            mean_us = total / count * 1e6 if count else 0.0
+            parts.append(f"{name}={count}x{mean_us:.1f}us")
+        return "metrics " + " ".join(parts)
+
+
+METRICS = Metrics()
+
+_server = None
+
+
+# Serve METRICS.prometheus_text() on http://host:port/metrics from a daemon
+# thread (only one server per process)
+def start_http_server(port=9108, host="127.0.0.1"):
+    global _server
+    if _server is not None:
+        return _server
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = METRICS.prometheus_text().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    _server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=_server.serve_forever, name="yetitrader-metrics", daemon=True).start()
+    return _server
+
+
+# Log METRICS.log_line() every `interval` seconds from a daemon thread
+def start_log_thread(interval=60.0):
+    def run():
+        while True:
+            time.sleep(interval)
+            logger.info(METRICS.log_line())
+
+    thread = threading.Thread(target=run, name="yetitrader-metrics-log", daemon=True)
+    thread.start()
+    return thread
+
+
+# Function to format a finished cProfile run as the top `limit` entries
+def profile_report(profiler, limit=30, sort="cumulative"):
+    stream = io.StringIO()
+    pstats.Stats(profiler, stream=stream).sort_stats(sort).print_stats(limit)
+    return stream.getvalue()
+
+
+# Environment switches: YETITRADER_METRICS=1 enables timing at import,
+# YETITRADER_METRICS_PORT serves the Prometheus endpoint and
+# YETITRADER_METRICS_LOG_INTERVAL logs a summary line periodically
+if os.environ.get("YETITRADER_METRICS") == "1":
+    METRICS.enable()
+if os.environ.get("YETITRADER_METRICS_PORT"):
+    start_http_server(int(os.environ["YETITRADER_METRICS_PORT"]))
+if os.environ.get("YETITRADER_METRICS_LOG_INTERVAL"):
+    start_log_thread(float(os.environ["YETITRADER_METRICS_LOG_INTERVAL"]))
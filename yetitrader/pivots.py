@@ -0,0 +1,79 @@
+import numpy as np
+
+METHODS = ("classic", "fibonacci", "woodie", "camarilla")
+
+
+# Pivot levels from a period's high/low/close. Inputs are arrays of any
+# (matching) shape, e.g. (symbols, days); the result has one extra trailing
+# axis of 7 levels in LEVEL_NAMES order (R3, R2, R1, Pivot, S1, S2, S3).
+def compute_pivots(high, low, close, method="classic"):
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    close = np.asarray(close, dtype=np.float64)
+    span = high - low
+
+    if method == "classic":
+        pivot = (high + low + close) / 3
+        r1, s1 = 2 * pivot - low, 2 * pivot - high
+        r2, s2 = pivot + span, pivot - span
+        r3, s3 = high + 2 * (pivot - low), low - 2 * (high - pivot)
+    elif method == "fibonacci":
+        pivot = (high + low + close) / 3
+        r1, s1 = pivot + 0.382 * span, pivot - 0.382 * span
+        r2, s2 = pivot + 0.618 * span, pivot - 0.618 * span
+        r3, s3 = pivot + span, pivot - span
+    elif method == "woodie":
+        pivot = (high + low + 2 * close) / 4
+        r1, s1 = 2 * pivot - low, 2 * pivot - high
+        r2, s2 = pivot + span, pivot - span
+        r3, s3 = high + 2 * (pivot - low), low - 2 * (high - pivot)
+    elif method == "camarilla":
+        pivot = (high + low + close) / 3
+        r1, s1 = close + span * 1.1 / 12, close - span * 1.1 / 12
+        r2, s2 = close + span * 1.1 / 6, close - span * 1.1 / 6
+        r3, s3 = close + span * 1.1 / 4, close - span * 1.1 / 4
+    else:
+        raise ValueError(f"Unknown pivot method {method!r}, expected one of {METHODS}")
+
+    return np.stack([r3, r2, r1, pivot, s1, s2, s3], axis=-1)
+
+
+# Period ids ('D', 'W' or 'M') for an array of datetime64 timestamps.
+# Weeks start on Monday.
+def period_ids(timestamps, period="D"):
+    days = np.asarray(timestamps).astype("datetime64[D]")
+    if period == "D":
+        return days.astype(np.int64)
+    if period == "W":
+        # 1970-01-01 was a Thursday
+        return (days.astype(np.int64) + 3) // 7
+    if period == "M":
+        return days.astype("datetime64[M]").astype(np.int64)
+    raise ValueError(f"Unknown period {period!r}, expected 'D', 'W' or 'M'")
+
+
+# High/low/close per period along the last axis. `ids` must be sorted so
+# each period is one contiguous run; returns (high, low, close, starts).
+def aggregate_periods(high, low, close, ids):
+    ids = np.asarray(ids)
+    starts = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]])
+    ends = np.r_[starts[1:], len(ids)] - 1
+    period_high = np.maximum.reduceat(np.asarray(high, dtype=np.float64), starts, axis=-1)
+    period_low = np.minimum.reduceat(np.asarray(low, dtype=np.float64), starts, axis=-1)
+    period_close = np.asarray(close, dtype=np.float64)[..., ends]
+    return period_high, period_low, period_close, starts
+
+
+# Levels for every row (bar or day) computed from the previous period's
+# high/low/close, e.g. daily pivots for each minute bar or weekly pivots for
+# each day. Rows in the first period have no prior period and get NaN.
+def prior_period_pivots(high, low, close, ids, method="classic"):
+    period_high, period_low, period_close, starts = aggregate_periods(high, low, close, ids)
+    levels = compute_pivots(period_high, period_low, period_close, method)
+
+    # Shift by one period and expand back out to rows
+    shifted = np.full_like(levels, np.nan)
+    shifted[..., 1:, :] = levels[..., :-1, :]
+    lengths = np.diff(np.r_[starts, len(np.asarray(ids))])
+    return np.repeat(shifted, lengths, axis=-2)
+
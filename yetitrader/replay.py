@@ -0,0 +1,179 @@
+import argparse
+import os
+import time
+from unittest import mock
+
+import numpy as np
+
+from yetitrader.ema import StreamingEMA
+from yetitrader.feeds import read_bars
+from yetitrader.levels import LevelIndex
+from yetitrader.scoring import LEVEL_NAMES, score_snapshot
+
+UI_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app3.py")
+
+
+# Virtual clock driven by recorded timestamps. At speed 1 a recorded second
+# takes a real second, at speed 10 a tenth of one; speed 0 never sleeps.
+# Replays are deterministic: ticks are processed in recorded order and
+# results depend only on the recording, never on the speed.
+class VirtualClock:
+    def __init__(self, speed=1.0, sleep=time.sleep, perf_counter=time.perf_counter):
+        self.speed = speed
+        self.sleep = sleep
+        self.perf_counter = perf_counter
+        self.now = None
+        self.origin = None
+        self.real_origin = None
+
+    # Wait until the virtual clock reaches `timestamp` and make it current
+    def advance_to(self, timestamp):
+        if self.origin is None:
+            self.origin = timestamp
+            self.real_origin = self.perf_counter()
+        elif self.speed:
+            due = self.real_origin + (timestamp - self.origin) / self.speed
+            delay = due - self.perf_counter()
+            if delay > 0:
+                self.sleep(delay)
+        self.now = timestamp
+        return self.now
+
+
+# Function to summarize per-tick latencies (seconds) as milliseconds
+def latency_summary(latencies):
+    latencies = np.asarray(latencies, dtype=np.float64) * 1000
+    if not len(latencies):
+        return {"ticks": 0}
+    p50, p90, p99 = np.percentile(latencies, [50, 90, 99])
+    return {
+        "ticks": len(latencies),
+        "p50_ms": float(p50),
+        "p90_ms": float(p90),
+        "p99_ms": float(p99),
+        "max_ms": float(latencies.max()),
+    }
+
+
+# Replay a recorded SPY/CALL/PUT quote session through the headless
+# scoring path. Every quote updates the streaming EMAs; once all three
+# symbols have printed, each quote is scored with
+# score_snapshot and timed from arrival to
+# recommendation. Returns the latency report and every recommendation
+# change as (timestamp, recommendation, total_score, pivot_context).
+def replay_session(bars, levels, spy, call, put, speed=0.0, broken_levels=()):
+    clock = VirtualClock(speed)
+    engine = StreamingEMA()
+    index = LevelIndex.from_levels(levels, broken_names=[name for name, _ in broken_levels])
+    broken_levels = list(broken_levels)
+    symbols = (spy, call, put)
+
+    latencies = []
+    changes = []
+    last_recommendation = None
+    started = time.perf_counter()
+    for bar in bars:
+        clock.advance_to(bar.timestamp)
+        arrival = time.perf_counter()
+        engine.update(bar.symbol, bar.close)
+        if bar.symbol not in symbols or not all(s in engine.index for s in symbols):
+            continue
+
+        inputs = engine.framework_inputs(spy, call, put)
+        price = float(engine.last[engine.index[spy]])
+        results = score_snapshot(
+            inputs["spy_ema8"], inputs["spy_ema21"],
+            inputs["call_ema8"], inputs["call_ema21"],
+            inputs["put_ema8"], inputs["put_ema21"],
+            price, index.nearest(price), broken_levels,
+        )
+        latencies.append(time.perf_counter() - arrival)
+
+        if results["recommendation"] != last_recommendation:
+            last_recommendation = results["recommendation"]
+            changes.append((bar.timestamp, results["recommendation"], results["total_score"],
+                            results["pivot_context"]))
+
+    elapsed = time.perf_counter() - started
+    report = latency_summary(latencies)
+    report["elapsed_s"] = elapsed
+    report["ticks_per_s"] = len(latencies) / elapsed if elapsed else float("inf")
+    return {"report": report, "changes": changes}
+
+
+# Replay the same session through the Streamlit UI with AppTest (fully
+# offline). The levels are saved through Tab 1 first; then every `every`-th
+# scored quote sets the sidebar inputs, clicks "Calculate Score &
+# Recommendation" and times the rerun.
+def replay_into_app(bars, levels, spy, call, put, every=100, script=UI_SCRIPT, speed=0.0):
+    from streamlit.testing.v1 import AppTest
+
+    # Keep the replayed saves out of the real pivot store (for this run only)
+    memory = {"YETITRADER_PIVOT_DB": os.environ.get("YETITRADER_PIVOT_DB", ":memory:")}
+    with mock.patch.dict(os.environ, memory):
+        app = AppTest.from_file(script, default_timeout=60).run()
+        for name, value in levels.items():
+            app.number_input(key=f"{name.lower()}_input").set_value(value)
+        next(b for b in app.button if b.label == "Save Pivot Levels").click()
+        app.run()
+        clock = VirtualClock(speed)
+        engine = StreamingEMA()
+        symbols = (spy, call, put)
+        labels = {
+            "spy_ema8": "SPY 8 EMA", "spy_ema21": "SPY 21 EMA",
+            "call_ema8": "CALL 8 EMA", "call_ema21": "CALL 21 EMA",
+            "put_ema8": "PUT 8 EMA", "put_ema21": "PUT 21 EMA",
+        }
+
+        latencies = []
+        recommendations = []
+        scored = 0
+        for bar in bars:
+            clock.advance_to(bar.timestamp)
+            arrival = time.perf_counter()
+            engine.update(bar.symbol, bar.close)
+            if bar.symbol not in symbols or not all(s in engine.index for s in symbols):
+                continue
+            scored += 1
+            if scored % every:
+                continue
+
+            inputs = engine.framework_inputs(spy, call, put)
+            widgets = {widget.label: widget for widget in app.sidebar.number_input}
+            widgets["Current Price"].set_value(round(float(engine.last[engine.index[spy]]), 2))
+            for key, label in labels.items():
+                widgets[label].set_value(round(inputs[key], 2))
+            next(b for b in app.sidebar.button if b.label == "Calculate Score & Recommendation").click()
+            app.run()
+            latencies.append(time.perf_counter() - arrival)
+            recommendations.append(next((m.value for m in app.markdown if m.value.startswith("## Recommendation")), None))
+
+    return {"report": latency_summary(latencies), "recommendations": recommendations}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a recorded quote session through the 4-pillar analyzer")
+    parser.add_argument("session", help="Recorded bar/quote file (see yetitrader.feeds)")
+    parser.add_argument("--spy", default="SPY")
+    parser.add_argument("--call", required=True)
+    parser.add_argument("--put", required=True)
+    parser.add_argument("--levels", type=float, nargs=7, required=True, metavar=LEVEL_NAMES)
+    parser.add_argument("--speed", type=float, default=0.0, help="1 = real time, 10 = 10x, 0 = as fast as possible")
+    parser.add_argument("--ui", action="store_true", help="Also drive the Streamlit UI through AppTest")
+    parser.add_argument("--ui-every", type=int, default=100, help="Rerun the UI on every Nth scored quote")
+    args = parser.parse_args(argv)
+
+    bars = list(read_bars(args.session))
+    result = replay_session(bars, dict(zip(LEVEL_NAMES, args.levels)), args.spy, args.call, args.put, args.speed)
+    print("Headless:", result["report"])
+    for timestamp, recommendation, score, context in result["changes"]:
+        print(f"  {timestamp:>14} {recommendation:<22} {score:>6} {context}")
+
+    if args.ui:
+        ui = replay_into_app(bars, dict(zip(LEVEL_NAMES, args.levels)), args.spy, args.call, args.put,
+                             args.ui_every, speed=args.speed)
+        print("Streamlit UI:", ui["report"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+import argparse
+import asyncio
+import csv
+import time
+
+import numpy as np
+
+from yetitrader.alerts import AlertEngine, FileSink, UnixSocketSink, WebhookSink, load_rules
+from yetitrader.bus import BusReader
+from yetitrader.ema import StreamingEMA
+from yetitrader.feeds import parse_bar, read_bars
+from yetitrader.journal import DecisionJournal
+from yetitrader.scoring import CONTEXTS, DEFAULT_PARAMS, LEVEL_NAMES, RECOMMENDATIONS, TRENDS, score_batch
+
+
+# Live 4-pillar scores for many (underlying, CALL, PUT) setups. Bars update
+# the shared EMA engine in O(1) as they arrive; scoring every setup is one
+# score_batch call over arrays gathered from the engine. `engine` may be a
+# bus.BusReader, in which case bars come from the bus writer and every
+# gather is a seqlock-checked read of shared memory.
+class Scanner:
+    def __init__(self, setups, levels, broken=False, params=DEFAULT_PARAMS, engine=None):
+        self.setups = [tuple(setup) for setup in setups]
+        self.engine = engine if engine is not None else StreamingEMA(capacity=max(16, 3 * len(self.setups)))
+        # (n, 3) engine rows for each setup's underlying, CALL and PUT
+        self.rows = np.array([[self.engine.slot(symbol) for symbol in setup] for setup in self.setups],
+                             dtype=np.intp).reshape(-1, 3)
+        # One level set shared by every setup stays 1-D, so score_batch
+        # sorts it once and binary searches every price; per-setup levels
+        # are (n, 7)
+        levels = np.asarray(levels, dtype=np.float64)
+        if levels.ndim == 2 and len(levels) and (levels == levels[0]).all():
+            levels = levels[0]
+        self.levels = levels if levels.ndim == 1 else np.broadcast_to(levels, (len(self.setups), len(LEVEL_NAMES)))
+        self.broken = np.broadcast_to(np.asarray(broken, dtype=bool), (len(self.setups),)).copy()
+        self.params = params
+        self.bars = 0
+        self.cycles = 0
+        self.last_scores = None
+
+    def on_bar(self, bar):
+        self.engine.update(bar.symbol, bar.close)
+        self.bars += 1
+
+    # Score every setup in one vectorized pass. Setups whose underlying or
+    # contracts have not printed yet are marked invalid.
+    def score(self):
+        spy, call, put, price, valid = self.read(self._gather)
+        scores = score_batch(
+            spy[:, 0], spy[:, 1], call[:, 0], call[:, 1], put[:, 0], put[:, 1],
+            price, self.levels, self.broken, params=self.params,
+        )
+        scores["valid"] = valid
+        scores["price"] = price
+        self.cycles += 1
+        self.last_scores = scores
+        return scores
+
+    # fn() against the engine arrays; a seqlock-checked read on a bus
+    def read(self, fn):
+        if isinstance(self.engine, BusReader):
+            return self.engine.consistent(fn)
+        return fn()
+
+    # Copies of every setup's EMA rows, price and has-printed flag
+    def _gather(self):
+        values = self.engine.values
+        return (values[self.rows[:, 0]], values[self.rows[:, 1]], values[self.rows[:, 2]],
+                self.engine.last[self.rows[:, 0]], (self.engine.counts[self.rows] > 0).all(axis=1))
+
+    # Highest-scoring valid setups, best first
+    def ranked(self, top=20):
+        scores = self.score()
+        valid = np.flatnonzero(scores["valid"])
+        order = valid[np.argsort(-scores["total_score"][valid], kind="stable")][:top]
+        return [
+            {
+                "underlying": self.setups[i][0],
+                "call": self.setups[i][1],
+                "put": self.setups[i][2],
+                "price": float(scores["price"][i]),
+                "total_score": float(scores["total_score"][i]),
+                "trend": TRENDS[scores["trend"][i]],
+                "recommendation": RECOMMENDATIONS[scores["recommendation"][i]],
+                "pivot_context": CONTEXTS[scores["pivot_context"][i]],
+            }
+            for i in order
+        ]
+
+
+# Function to append the valid rows of one scoring cycle to a journal.
+# Setups only carry an any-level-broken flag, so broken_mask stays 0 and the
+# flag shows up as the pivot context.
+def journal_scores(journal, scanner, scores, timestamp=None):
+    valid = np.flatnonzero(scores["valid"])
+    spy, call, put = scanner.read(lambda: tuple(scanner.engine.values[scanner.rows[valid, i]] for i in range(3)))
+    symbols = [scanner.setups[i][0] for i in valid]
+    timestamps = time.time() if timestamp is None else timestamp
+    return journal.record_batch(
+        {key: value[valid] for key, value in scores.items()},
+        spy[:, 0], spy[:, 1], call[:, 0], call[:, 1], put[:, 0], put[:, 1],
+        scores["price"][valid], timestamps, symbols, params=scanner.params,
+    )
+
+
+# Function to load a universe CSV with columns underlying, call, put and
+# optionally R3..S3 per setup. Returns (setups, levels or None).
+def load_universe(path):
+    with open(path, newline="") as f:
+        rows = list(csv.DictReader(f))
+    setups = [(row["underlying"], row["call"], row["put"]) for row in rows]
+    if rows and all(name in rows[0] for name in LEVEL_NAMES):
+        levels = np.array([[float(row[name]) for name in LEVEL_NAMES] for row in rows])
+    else:
+        levels = None
+    return setups, levels
+
+
+# Replays a bar file. speed=1 follows the recorded timestamps in real time,
+# speed=10 is ten times faster and speed=0 replays as fast as possible.
+async def replay_source(path, on_bar, speed=0.0):
+    previous = None
+    for count, bar in enumerate(read_bars(path)):
+        if speed and previous is not None and bar.timestamp > previous:
+            await asyncio.sleep((bar.timestamp - previous) / speed)
+        elif count % 1000 == 0:
+            # Let the other sources and the scoring cycle run
+            await asyncio.sleep(0)
+        previous = bar.timestamp
+        on_bar(bar)
+
+
+# Reads line-delimited bars from a local socket until it closes
+async def socket_source(host, port, on_bar):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            bar = parse_bar(line.decode())
+            if bar is not None:
+                on_bar(bar)
+    finally:
+        writer.close()
+
+
+# Run the scanner: every source pulls bars concurrently while the ranked
+# table is rebuilt every `interval` seconds and handed to `on_cycle`. Ends
+# (after a final cycle) once every source is exhausted.
+async def run_scanner(scanner, sources, interval=1.0, top=20, on_cycle=None):
+    tasks = [asyncio.ensure_future(source) for source in sources]
+    done = asyncio.gather(*tasks)
+    while True:
+        finished = await asyncio.wait([done], timeout=interval)
+        started = time.perf_counter()
+        table = scanner.ranked(top)
+        if on_cycle is not None:
+            on_cycle(table, time.perf_counter() - started)
+        if finished[0]:
+            done.result()
+            return table
+
+
+# Function to print a ranked table
+def print_table(table, elapsed):
+    print(f"\n{'#':>3} {'Underlying':<10} {'Score':>6} {'Trend':<10} {'Recommendation':<22} Context"
+          f"   (scored in {elapsed * 1000:.2f} ms)")
+    for rank, row in enumerate(table, 1):
+        print(f"{rank:>3} {row['underlying']:<10} {row['total_score']:>6.1f} {row['trend']:<10} "
+              f"{row['recommendation']:<22} {row['pivot_context']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scan many underlyings with the 4-pillar framework")
+    parser.add_argument("universe", help="CSV with underlying, call, put (and optional R3..S3) columns")
+    parser.add_argument("--replay", nargs="*", default=[], help="Bar files to replay")
+    parser.add_argument("--socket", nargs="*", default=[], metavar="HOST:PORT", help="Local bar sockets")
+    parser.add_argument("--speed", type=float, default=0.0, help="Replay speed (0 = as fast as possible)")
+    parser.add_argument("--levels", type=float, nargs=7, help="Pivot levels R3..S3 shared by all setups")
+    parser.add_argument("--interval", type=float, default=1.0)
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--journal", help="Append every cycle's scores to a decision journal in this directory")
+    parser.add_argument("--rules", help="Alert rules file, one rule per line (see yetitrader.alerts.parse_rule)")
+    parser.add_argument("--alert-file", help="Append alerts to this file as JSON lines")
+    parser.add_argument("--alert-socket", help="Send alerts as datagrams to this Unix socket")
+    parser.add_argument("--alert-webhook", help="POST alerts to this local URL")
+    args = parser.parse_args(argv)
+
+    setups, levels = load_universe(args.universe)
+    if args.levels:
+        levels = args.levels
+    if levels is None:
+        parser.error("universe has no R3..S3 columns; pass --levels")
+
+    scanner = Scanner(setups, levels)
+    sources = [replay_source(path, scanner.on_bar, args.speed) for path in args.replay]
+    for address in args.socket:
+        host, port = address.rsplit(":", 1)
+        sources.append(socket_source(host, int(port), scanner.on_bar))
+    if not sources:
+        parser.error("pass at least one --replay file or --socket address")
+
+    journal = DecisionJournal(args.journal) if args.journal else None
+    alerts = None
+    if args.rules:
+        sinks = []
+        if args.alert_file:
+            sinks.append(FileSink(args.alert_file))
+        if args.alert_socket:
+            sinks.append(UnixSocketSink(args.alert_socket))
+        if args.alert_webhook:
+            sinks.append(WebhookSink(args.alert_webhook))
+        alerts = AlertEngine(load_rules(args.rules), [setup[0] for setup in setups], sinks)
+
+    def on_cycle(table, elapsed):
+        print_table(table, elapsed)
+        if journal is not None:
+            journal_scores(journal, scanner, scanner.last_scores)
+        if alerts is not None:
+            for alert in alerts.update(scanner.last_scores):
+                print(f"ALERT {alert.rule} {alert.symbol} {alert.value:g} "
+                      f"({alert.recommendation}, {alert.pivot_context})")
+
+    asyncio.run(run_scanner(scanner, sources, args.interval, args.top, on_cycle))
+    if journal is not None:
+        journal.close()
+    if alerts is not None:
+        for sink in alerts.sinks:
+            sink.close()
+
+
+if __name__ == "__main__":
+    main()
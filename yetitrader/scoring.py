@@ -0,0 +1,883 @@
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy as np
+
+from yetitrader.levels import LevelIndex
+from yetitrader.metrics import METRICS
+
+# Pivot level names, ordered the same way the UI lists them
+LEVEL_NAMES = ("R3", "R2", "R1", "Pivot", "S1", "S2", "S3")
+
+# Integer codes used by the batch scorer
+TRENDS = ("UPTREND", "DOWNTREND", "NEUTRAL")
+UPTREND, DOWNTREND, NEUTRAL = 0, 1, 2
+
+CONTEXTS = (
+    "Broken support/resistance",
+    "Near bounce zones or reversal levels",
+    "PUTs near resistance or CALLs near support",
+    "Mid-range",
+)
+CTX_BROKEN, CTX_REVERSAL, CTX_FAVORABLE, CTX_MID = 0, 1, 2, 3
+
+RECOMMENDATIONS = ("BUY CALLS", "BUY PUTS", "WAIT FOR CONFIRMATION", "NO TRADE")
+BUY_CALLS, BUY_PUTS, WAIT, NO_TRADE = 0, 1, 2, 3
+
+# EMA direction codes (8 EMA vs 21 EMA), in the same order as TRENDS.
+# DIR_UNKNOWN marks a NaN EMA, which no pillar treats as up, down or flat.
+DIR_UP, DIR_DOWN, DIR_FLAT, DIR_UNKNOWN = 0, 1, 2, 3
+
+# SPY 8/21 EMA gap buckets
+GAP_IDEAL, GAP_OVEREXTENDED, GAP_TIGHT = 0, 1, 2
+
+# Tunable thresholds and pillar weights for the batch scorer. Partial
+# credits scale with the full weight (e.g. opposing divergence gives half
+# its weight when the opposing option is flat), so the defaults reproduce
+# the scalar framework exactly.
+ScoringParams = namedtuple("ScoringParams", [
+    "gap_low", "gap_high", "near_threshold", "buy_cutoff", "wait_cutoff",
+    "trend_weight", "confirm_weight", "opposing_weight", "gap_weight",
+    "alignment_weight", "pivot_weight",
+])
+DEFAULT_PARAMS = ScoringParams(
+    gap_low=0.5, gap_high=1.0, near_threshold=0.003, buy_cutoff=90, wait_cutoff=70,
+    trend_weight=25, confirm_weight=25, opposing_weight=15, gap_weight=10,
+    alignment_weight=10, pivot_weight=15,
+)
+
+
+# ---------------------------------------------------------------------------
+# Scalar framework (one snapshot at a time, as shown in the UI)
+# ---------------------------------------------------------------------------
+
+# Function to determine nearest support and resistance
+def find_nearest_levels(price, levels):
+    # Separate into resistance and support
+    resistance_levels = {k: v for k, v in levels.items() if v > price}
+    support_levels = {k: v for k, v in levels.items() if v < price}
+
+    # Find nearest resistance
+    if resistance_levels:
+        nearest_resistance_name = min(resistance_levels, key=lambda k: abs(levels[k] - price))
+        nearest_resistance = levels[nearest_resistance_name]
+    else:
+        nearest_resistance_name = "None"
+        nearest_resistance = price + 5  # Default if no resistance found
+
+    # Find nearest support
+    if support_levels:
+        nearest_support_name = min(support_levels, key=lambda k: abs(levels[k] - price))
+        nearest_support = levels[nearest_support_name]
+    else:
+        nearest_support_name = "None"
+        nearest_support = price - 5  # Default if no support found
+
+    return {
+        "nearest_resistance": nearest_resistance,
+        "nearest_resistance_name": nearest_resistance_name,
+        "nearest_support": nearest_support,
+        "nearest_support_name": nearest_support_name
+    }
+
+
+# Pillar messages that carry values, as str.format templates. The scalar
+# functions below fill them in; the journal stores their index and fills
+# them in again on decode, so the order here is part of the journal format.
+
+# Pivot context descriptions
+CONTEXT_MESSAGES = (
+    "Recently broken: {broken}",
+    "Price near resistance ({resistance_name}: ${resistance:.2f})",
+    "CALLs near support ({support_name}: ${support:.2f})",
+    "Price in middle zone between {support_name} and {resistance_name}",
+    "Price near support ({support_name}: ${support:.2f})",
+    "PUTs near resistance ({resistance_name}: ${resistance:.2f})",
+    "Price near pivot level in neutral trend",
+    "Price in middle zone in neutral trend",
+)
+# Context message by [trend, pivot context]
+CONTEXT_CODES = np.array([
+    [0, 1, 2, 3],
+    [0, 4, 5, 3],
+    [0, 6, 7, 7],
+], dtype=np.uint8)
+
+# EMA gap, by gap bucket (GAP_IDEAL, GAP_OVEREXTENDED, GAP_TIGHT)
+GAP_MESSAGES = (
+    "Ideal EMA gap: {gap:.2f} points ✓",
+    "Overextended EMA gap: {gap:.2f} points ✗",
+    "Too tight EMA gap: {gap:.2f} points ⚠️",
+)
+
+# Pivot zone context
+PIVOT_MESSAGES = (
+    "CALLs near support - favorable entry point ✓ ({description})",
+    "Broken resistance - favorable for continuation ✓ ({description})",
+    "Price in mid-range - moderately favorable ⚠️ ({description})",
+    "Price near potential reversal level - unfavorable ✗ ({description})",
+    "PUTs near resistance - favorable entry point ✓ ({description})",
+    "Broken support - favorable for continuation ✓ ({description})",
+    "Neutral SPY trend - Pivot zone analysis not applicable ({description})",
+)
+# Pivot zone message by [trend, pivot context]
+PIVOT_CODES = np.array([
+    [1, 3, 0, 2],
+    [5, 3, 4, 2],
+    [6, 6, 6, 6],
+], dtype=np.uint8)
+
+
+# Function to automatically determine pivot zone context
+def determine_pivot_context(price, resistance, resistance_name, support, support_name, trend, broken_levels):
+    # Calculate threshold for "near" (using 0.3% of price as threshold)
+    near_threshold = price * 0.003
+
+    # Check if any levels have been broken
+    if broken_levels:
+        return "Broken support/resistance", CONTEXT_MESSAGES[0].format(
+            broken=', '.join([level[0] for level in broken_levels]))
+
+    # Check distance to nearest levels
+    distance_to_resistance = resistance - price
+    distance_to_support = price - support
+
+    if trend == "UPTREND":
+        if distance_to_resistance < near_threshold:
+            return "Near bounce zones or reversal levels", CONTEXT_MESSAGES[1].format(
+                resistance_name=resistance_name, resistance=resistance)
+        elif distance_to_support < near_threshold:
+            return "PUTs near resistance or CALLs near support", CONTEXT_MESSAGES[2].format(
+                support_name=support_name, support=support)
+        else:
+            return "Mid-range", CONTEXT_MESSAGES[3].format(support_name=support_name, resistance_name=resistance_name)
+
+    elif trend == "DOWNTREND":
+        if distance_to_support < near_threshold:
+            return "Near bounce zones or reversal levels", CONTEXT_MESSAGES[4].format(
+                support_name=support_name, support=support)
+        elif distance_to_resistance < near_threshold:
+            return "PUTs near resistance or CALLs near support", CONTEXT_MESSAGES[5].format(
+                resistance_name=resistance_name, resistance=resistance)
+        else:
+            return "Mid-range", CONTEXT_MESSAGES[3].format(support_name=support_name, resistance_name=resistance_name)
+
+    else:  # NEUTRAL
+        if distance_to_resistance < near_threshold or distance_to_support < near_threshold:
+            return "Near bounce zones or reversal levels", CONTEXT_MESSAGES[6]
+        else:
+            return "Mid-range", CONTEXT_MESSAGES[7]
+
+
+# Function to determine SPY trend
+def determine_spy_trend(ema8, ema21):
+    if ema8 > ema21:
+        return "UPTREND", 25, "Uptrend detected (8 EMA > 21 EMA)"
+    elif ema8 < ema21:
+        return "DOWNTREND", 25, "Downtrend detected (8 EMA < 21 EMA)"
+    else:
+        return "NEUTRAL", 0, "Neutral trend (8 EMA = 21 EMA)"
+
+
+# Function to analyze option chart confirmation
+def analyze_option_confirmation(trend, call_ema8, call_ema21, put_ema8, put_ema21):
+    if trend == "UPTREND":
+        call_aligned = call_ema8 > call_ema21
+        put_aligned = put_ema8 < put_ema21
+        call_message = "CALL chart aligned ✓" if call_aligned else "CALL chart not aligned ✗"
+        put_message = "PUT chart aligned ✓" if put_aligned else "PUT chart not aligned ✗"
+
+        if call_aligned and put_aligned:
+            return 25, f"{call_message}, {put_message} - Perfect alignment for UPTREND"
+        elif call_aligned:
+            return 15, f"{call_message}, {put_message} - Partial alignment for UPTREND"
+        else:
+            return 0, f"{call_message}, {put_message} - Poor alignment for UPTREND"
+
+    elif trend == "DOWNTREND":
+        call_aligned = call_ema8 < call_ema21
+        put_aligned = put_ema8 > put_ema21
+        call_message = "CALL chart aligned ✓" if call_aligned else "CALL chart not aligned ✗"
+        put_message = "PUT chart aligned ✓" if put_aligned else "PUT chart not aligned ✗"
+
+        if call_aligned and put_aligned:
+            return 25, f"{call_message}, {put_message} - Perfect alignment for DOWNTREND"
+        elif put_aligned:
+            return 15, f"{put_message}, {call_message} - Partial alignment for DOWNTREND"
+        else:
+            return 0, f"{call_message}, {put_message} - Poor alignment for DOWNTREND"
+
+    else:  # NEUTRAL
+        return 0, "Neutral SPY trend - Option chart alignment not applicable"
+
+
+# Function to analyze opposing option divergence
+def analyze_opposing_option(trend, call_ema8, call_ema21, put_ema8, put_ema21):
+    if trend == "UPTREND":
+        # In uptrend, PUT should be weak (8 EMA < 21 EMA)
+        if put_ema8 < put_ema21:
+            return 15, "PUT options weak as expected in uptrend ✓"
+        elif put_ema8 == put_ema21:
+            return 7.5, "PUT options neutral in uptrend (partial credit) ⚠️"
+        else:
+            return 0, "PUT options strong in uptrend (contradicting signal) ✗"
+
+    elif trend == "DOWNTREND":
+        # In downtrend, CALL should be weak (8 EMA < 21 EMA)
+        if call_ema8 < call_ema21:
+            return 15, "CALL options weak as expected in downtrend ✓"
+        elif call_ema8 == call_ema21:
+            return 7.5, "CALL options neutral in downtrend (partial credit) ⚠️"
+        else:
+            return 0, "CALL options strong in downtrend (contradicting signal) ✗"
+
+    else:  # NEUTRAL
+        return 0, "Neutral SPY trend - Opposing option analysis not applicable"
+
+
+# Function to analyze EMA gap
+def analyze_ema_gap(ema8, ema21):
+    gap = abs(ema8 - ema21)
+
+    if 0.5 <= gap <= 1.0:
+        return 10, GAP_MESSAGES[GAP_IDEAL].format(gap=gap)
+    elif gap > 1.0:
+        return -10, GAP_MESSAGES[GAP_OVEREXTENDED].format(gap=gap)
+    else:  # gap < 0.5
+        return -5, GAP_MESSAGES[GAP_TIGHT].format(gap=gap)
+
+
+# Function to analyze option trend alignment
+def analyze_option_trend_alignment(trend, call_ema8, call_ema21, put_ema8, put_ema21):
+    call_trend = "UP" if call_ema8 > call_ema21 else "DOWN" if call_ema8 < call_ema21 else "NEUTRAL"
+    put_trend = "UP" if put_ema8 > put_ema21 else "DOWN" if put_ema8 < put_ema21 else "NEUTRAL"
+
+    if trend == "UPTREND":
+        if call_trend == "UP" and put_trend == "DOWN":
+            return 10, "Both options perfectly aligned with SPY uptrend ✓"
+        elif call_trend == "UP" or put_trend == "DOWN":
+            return 5, "One option aligned with SPY uptrend, one diverging ⚠️"
+        else:
+            return 0, "Neither option aligned with SPY uptrend ✗"
+
+    elif trend == "DOWNTREND":
+        if call_trend == "DOWN" and put_trend == "UP":
+            return 10, "Both options perfectly aligned with SPY downtrend ✓"
+        elif call_trend == "DOWN" or put_trend == "UP":
+            return 5, "One option aligned with SPY downtrend, one diverging ⚠️"
+        else:
+            return 0, "Neither option aligned with SPY downtrend ✗"
+
+    else:  # NEUTRAL
+        return 0, "Neutral SPY trend - Option trend alignment not applicable"
+
+
+# Function to analyze pivot zone context
+def analyze_pivot_zone(trend, context, context_description):
+    if trend == "UPTREND":
+        if context == "PUTs near resistance or CALLs near support":
+            return 15, PIVOT_MESSAGES[0].format(description=context_description)
+        elif context == "Broken support/resistance":
+            return 15, PIVOT_MESSAGES[1].format(description=context_description)
+        elif context == "Mid-range":
+            return 7.5, PIVOT_MESSAGES[2].format(description=context_description)
+        else:  # Near bounce zones
+            return -5, PIVOT_MESSAGES[3].format(description=context_description)
+
+    elif trend == "DOWNTREND":
+        if context == "PUTs near resistance or CALLs near support":
+            return 15, PIVOT_MESSAGES[4].format(description=context_description)
+        elif context == "Broken support/resistance":
+            return 15, PIVOT_MESSAGES[5].format(description=context_description)
+        elif context == "Mid-range":
+            return 7.5, PIVOT_MESSAGES[2].format(description=context_description)
+        else:  # Near bounce zones
+            return -5, PIVOT_MESSAGES[3].format(description=context_description)
+
+    else:  # NEUTRAL
+        return 0, PIVOT_MESSAGES[6].format(description=context_description)
+
+
+# Main calculation function
+def calculate_score_and_recommendation(spy_ema8, spy_ema21, call_ema8, call_ema21, put_ema8, put_ema21,
+                                       current_price, nearest_levels, broken_levels):
+    # Stage timings (score.*) while metrics are recorded
+    laps = METRICS.laps()
+
+    # Calculate trend first (needed for context detection)
+    trend, trend_score, trend_msg = determine_spy_trend(spy_ema8, spy_ema21)
+    if laps:
+        laps.lap("score.trend")
+
+    # Auto-detect pivot zone context
+    pivot_context, context_description = determine_pivot_context(
+        current_price,
+        nearest_levels['nearest_resistance'],
+        nearest_levels['nearest_resistance_name'],
+        nearest_levels['nearest_support'],
+        nearest_levels['nearest_support_name'],
+        trend,
+        broken_levels
+    )
+    if laps:
+        laps.lap("score.pivot_context")
+
+    # Calculate scores for each pillar
+    option_confirm_score, option_confirm_msg = analyze_option_confirmation(
+        trend, call_ema8, call_ema21, put_ema8, put_ema21
+    )
+    if laps:
+        laps.lap("score.option_confirm")
+
+    opposing_score, opposing_msg = analyze_opposing_option(
+        trend, call_ema8, call_ema21, put_ema8, put_ema21
+    )
+    if laps:
+        laps.lap("score.opposing")
+
+    ema_gap_score, ema_gap_msg = analyze_ema_gap(spy_ema8, spy_ema21)
+    if laps:
+        laps.lap("score.ema_gap")
+
+    option_alignment_score, option_alignment_msg = analyze_option_trend_alignment(
+        trend, call_ema8, call_ema21, put_ema8, put_ema21
+    )
+    if laps:
+        laps.lap("score.option_alignment")
+
+    pivot_score, pivot_msg = analyze_pivot_zone(
+        trend, pivot_context, context_description
+    )
+    if laps:
+        laps.lap("score.pivot_zone")
+
+    # Calculate total score
+    total_score = trend_score + option_confirm_score + opposing_score + ema_gap_score + option_alignment_score + pivot_score
+
+    # Cap total score at 100
+    total_score = min(100, max(0, total_score))
+
+    # Determine recommendation
+    if total_score >= 90:
+        if trend == "UPTREND":
+            recommendation = "BUY CALLS"
+            color = "green"
+        elif trend == "DOWNTREND":
+            recommendation = "BUY PUTS"
+            color = "red"
+        else:
+            recommendation = "NO TRADE"
+            color = "orange"
+    elif total_score >= 70:
+        recommendation = "WAIT FOR CONFIRMATION"
+        color = "orange"
+    else:
+        recommendation = "NO TRADE"
+        color = "red"
+
+    # Create results dictionary
+    results = {
+        "trend": trend,
+        "total_score": total_score,
+        "recommendation": recommendation,
+        "color": color,
+        "pivot_context": pivot_context,
+        "context_description": context_description,
+        "details": [
+            {"category": "1. SPY EMA Trend", "score": trend_score, "message": trend_msg, "weight": "25%"},
+            {"category": "2. Option Chart Confirmation", "score": option_confirm_score, "message": option_confirm_msg, "weight": "25%"},
+            {"category": "3. Opposing Option Divergence", "score": opposing_score, "message": opposing_msg, "weight": "15%"},
+            {"category": "4. EMA Gap Size", "score": ema_gap_score, "message": ema_gap_msg, "weight": "10%"},
+            {"category": "5. Option Trend Alignment", "score": option_alignment_score, "message": option_alignment_msg, "weight": "10%"},
+            {"category": "6. Pivot Zone Context", "score": pivot_score, "message": pivot_msg, "weight": "15%"}
+        ]
+    }
+
+    return results
+
+
+# ---------------------------------------------------------------------------
+# Compact results (numbers and codes now, messages only when displayed)
+# ---------------------------------------------------------------------------
+
+DETAIL_CATEGORIES = (
+    ("1. SPY EMA Trend", "trend_score", "25%"),
+    ("2. Option Chart Confirmation", "option_confirm_score", "25%"),
+    ("3. Opposing Option Divergence", "opposing_score", "15%"),
+    ("4. EMA Gap Size", "ema_gap_score", "10%"),
+    ("5. Option Trend Alignment", "option_alignment_score", "10%"),
+    ("6. Pivot Zone Context", "pivot_score", "15%"),
+)
+
+RESULT_KEYS = ("trend", "total_score", "recommendation", "color", "pivot_context", "context_description", "details")
+
+
+# One evaluation as plain numbers: codes for trend, pivot context and
+# recommendation, the six pillar scores and references to the inputs. The
+# messages are built (by the scalar pillar functions, so they read exactly
+# as before) the first time `details` or `context_description` is read.
+# Indexing with the results-dict keys works too, so code written against
+# calculate_score_and_recommendation's dict can take one of these.
+class ScoreResult:
+    __slots__ = (
+        "trend_code", "context_code", "recommendation_code", "total_score",
+        "trend_score", "option_confirm_score", "opposing_score", "ema_gap_score",
+        "option_alignment_score", "pivot_score",
+        "spy_ema8", "spy_ema21", "call_ema8", "call_ema21", "put_ema8", "put_ema21",
+        "current_price", "nearest_levels", "broken_levels", "_context_description", "_details",
+    )
+
+    @property
+    def trend(self):
+        return TRENDS[self.trend_code]
+
+    @property
+    def pivot_context(self):
+        return CONTEXTS[self.context_code]
+
+    @property
+    def recommendation(self):
+        return RECOMMENDATIONS[self.recommendation_code]
+
+    @property
+    def color(self):
+        if self.recommendation_code == BUY_CALLS:
+            return "green"
+        if self.recommendation_code == BUY_PUTS or self.total_score < 70:
+            return "red"
+        return "orange"
+
+    @property
+    def pillar_scores(self):
+        return (self.trend_score, self.option_confirm_score, self.opposing_score,
+                self.ema_gap_score, self.option_alignment_score, self.pivot_score)
+
+    @property
+    def context_description(self):
+        if self._context_description is None:
+            nearest = self.nearest_levels
+            self._context_description = determine_pivot_context(
+                self.current_price,
+                nearest['nearest_resistance'], nearest['nearest_resistance_name'],
+                nearest['nearest_support'], nearest['nearest_support_name'],
+                self.trend, self.broken_levels
+            )[1]
+        return self._context_description
+
+    @property
+    def details(self):
+        if self._details is None:
+            trend = self.trend
+            options = (trend, self.call_ema8, self.call_ema21, self.put_ema8, self.put_ema21)
+            messages = (
+                determine_spy_trend(self.spy_ema8, self.spy_ema21)[2],
+                analyze_option_confirmation(*options)[1],
+                analyze_opposing_option(*options)[1],
+                analyze_ema_gap(self.spy_ema8, self.spy_ema21)[1],
+                analyze_option_trend_alignment(*options)[1],
+                analyze_pivot_zone(trend, self.pivot_context, self.context_description)[1],
+            )
+            self._details = [
+                {"category": category, "score": score, "message": message, "weight": weight}
+                for (category, _, weight), score, message in zip(DETAIL_CATEGORIES, self.pillar_scores, messages)
+            ]
+        return self._details
+
+    def __getitem__(self, key):
+        if key not in RESULT_KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def keys(self):
+        return RESULT_KEYS
+
+    # The full calculate_score_and_recommendation dict
+    def to_dict(self):
+        return {key: getattr(self, key) for key in RESULT_KEYS}
+
+
+# Same scores as calculate_score_and_recommendation (same branches, same
+# int/float score values), returned as a ScoreResult without building any
+# message strings. Records the same score.* stages.
+def score_snapshot(spy_ema8, spy_ema21, call_ema8, call_ema21, put_ema8, put_ema21,
+                   current_price, nearest_levels, broken_levels):
+    laps = METRICS.laps()
+    if spy_ema8 > spy_ema21:
+        trend, trend_score = UPTREND, 25
+    elif spy_ema8 < spy_ema21:
+        trend, trend_score = DOWNTREND, 25
+    else:
+        trend, trend_score = NEUTRAL, 0
+    if laps:
+        laps.lap("score.trend")
+
+    # Pivot context
+    if broken_levels:
+        context = CTX_BROKEN
+    else:
+        near_threshold = current_price * 0.003
+        near_resistance = nearest_levels['nearest_resistance'] - current_price < near_threshold
+        near_support = current_price - nearest_levels['nearest_support'] < near_threshold
+        if trend == UPTREND:
+            context = CTX_REVERSAL if near_resistance else CTX_FAVORABLE if near_support else CTX_MID
+        elif trend == DOWNTREND:
+            context = CTX_REVERSAL if near_support else CTX_FAVORABLE if near_resistance else CTX_MID
+        else:
+            context = CTX_REVERSAL if near_resistance or near_support else CTX_MID
+    if laps:
+        laps.lap("score.pivot_context")
+
+    call_up, call_down = call_ema8 > call_ema21, call_ema8 < call_ema21
+    put_up, put_down = put_ema8 > put_ema21, put_ema8 < put_ema21
+    if trend == UPTREND:
+        option_confirm_score = 25 if call_up and put_down else 15 if call_up else 0
+    elif trend == DOWNTREND:
+        option_confirm_score = 25 if call_down and put_up else 15 if put_up else 0
+    else:
+        option_confirm_score = 0
+    if laps:
+        laps.lap("score.option_confirm")
+
+    if trend == UPTREND:
+        opposing_score = 15 if put_down else 7.5 if put_ema8 == put_ema21 else 0
+    elif trend == DOWNTREND:
+        opposing_score = 15 if call_down else 7.5 if call_ema8 == call_ema21 else 0
+    else:
+        opposing_score = 0
+    if laps:
+        laps.lap("score.opposing")
+
+    gap = abs(spy_ema8 - spy_ema21)
+    ema_gap_score = 10 if 0.5 <= gap <= 1.0 else -10 if gap > 1.0 else -5
+    if laps:
+        laps.lap("score.ema_gap")
+
+    if trend == UPTREND:
+        option_alignment_score = 10 if call_up and put_down else 5 if call_up or put_down else 0
+    elif trend == DOWNTREND:
+        option_alignment_score = 10 if call_down and put_up else 5 if call_down or put_up else 0
+    else:
+        option_alignment_score = 0
+    if laps:
+        laps.lap("score.option_alignment")
+
+    if trend == NEUTRAL:
+        pivot_score = 0
+    elif context == CTX_FAVORABLE or context == CTX_BROKEN:
+        pivot_score = 15
+    elif context == CTX_MID:
+        pivot_score = 7.5
+    else:
+        pivot_score = -5
+    if laps:
+        laps.lap("score.pivot_zone")
+
+    total_score = trend_score + option_confirm_score + opposing_score + ema_gap_score + option_alignment_score + pivot_score
+    total_score = min(100, max(0, total_score))
+    if total_score >= 90:
+        recommendation = BUY_CALLS if trend == UPTREND else BUY_PUTS if trend == DOWNTREND else NO_TRADE
+    elif total_score >= 70:
+        recommendation = WAIT
+    else:
+        recommendation = NO_TRADE
+
+    result = ScoreResult()
+    result.trend_code, result.context_code, result.recommendation_code = trend, context, recommendation
+    result.total_score = total_score
+    result.trend_score, result.option_confirm_score, result.opposing_score = trend_score, option_confirm_score, opposing_score
+    result.ema_gap_score, result.option_alignment_score, result.pivot_score = ema_gap_score, option_alignment_score, pivot_score
+    result.spy_ema8, result.spy_ema21 = spy_ema8, spy_ema21
+    result.call_ema8, result.call_ema21, result.put_ema8, result.put_ema21 = call_ema8, call_ema21, put_ema8, put_ema21
+    result.current_price, result.nearest_levels, result.broken_levels = current_price, nearest_levels, broken_levels
+    result._context_description = result._details = None
+    return result
+
+
+# ---------------------------------------------------------------------------
+# Batch framework (one vectorized pass over many snapshots)
+# ---------------------------------------------------------------------------
+
+# Nearest resistance/support for an array of prices. `levels` is either one
+# set of levels shared by every row, shape (k,), or one set per row, shape
+# (n, k). Returns values plus the column index of the level (-1 = "None").
+def nearest_levels_batch(price, levels):
+    price = np.asarray(price, dtype=np.float64)
+    levels = np.asarray(levels, dtype=np.float64)
+
+    if levels.ndim == 1:
+        # One shared level set: sort once and binary search every price
+        index = LevelIndex()
+        index.extend(enumerate(levels))
+        nearest = index.nearest_batch(price)
+        columns = index.names.astype(np.intp) if len(index) else np.zeros(1, dtype=np.intp)
+        res, has_res = nearest["nearest_resistance"], nearest["nearest_resistance_pos"] >= 0
+        sup, has_sup = nearest["nearest_support"], nearest["nearest_support_pos"] >= 0
+        res_idx = columns[nearest["nearest_resistance_pos"]]
+        sup_idx = columns[nearest["nearest_support_pos"]]
+    else:
+        # One level set per row
+        p = price[:, None]
+        dist_res = np.where(levels > p, levels - p, np.inf)
+        dist_sup = np.where(levels < p, p - levels, np.inf)
+        res_idx = np.argmin(dist_res, axis=1)
+        sup_idx = np.argmin(dist_sup, axis=1)
+        rows = np.arange(len(price))
+        has_res = np.isfinite(dist_res[rows, res_idx])
+        has_sup = np.isfinite(dist_sup[rows, sup_idx])
+        res = levels[rows, res_idx]
+        sup = levels[rows, sup_idx]
+
+    return {
+        "nearest_resistance": np.where(has_res, res, price + 5),
+        "nearest_resistance_idx": np.where(has_res, res_idx, -1),
+        "nearest_support": np.where(has_sup, sup, price - 5),
+        "nearest_support_idx": np.where(has_sup, sup_idx, -1),
+    }
+
+
+# Vectorized pivot context (codes into CONTEXTS)
+def pivot_context_batch(price, resistance, support, trend, broken, near_threshold=0.003):
+    near_threshold = price * near_threshold
+    near_res = (resistance - price) < near_threshold
+    near_sup = (price - support) < near_threshold
+
+    up = trend == UPTREND
+    down = trend == DOWNTREND
+    reversal = np.where(up, near_res, np.where(down, near_sup, near_res | near_sup))
+    favorable = (up & near_sup) | (down & near_res)
+
+    context = np.where(reversal, CTX_REVERSAL, np.where(favorable, CTX_FAVORABLE, CTX_MID))
+    return np.where(broken, CTX_BROKEN, context).astype(np.int8)
+
+
+# Vectorized option chart confirmation, opposing divergence and option
+# trend alignment scores. `up`/`down` are the SPY trend masks; the EMA
+# arrays broadcast against them (e.g. every CALL/PUT pair of a chain
+# against one SPY trend).
+def option_scores_batch(up, down, call_ema8, call_ema21, put_ema8, put_ema21, params=DEFAULT_PARAMS):
+    call_up = call_ema8 > call_ema21
+    call_down = call_ema8 < call_ema21
+    put_up = put_ema8 > put_ema21
+    put_down = put_ema8 < put_ema21
+
+    w = params.confirm_weight
+    option_confirm_score = np.select(
+        [up & call_up & put_down, up & call_up,
+         down & call_down & put_up, down & put_up],
+        [w, w * 15 / 25, w, w * 15 / 25], 0.0)
+
+    w = params.opposing_weight
+    opposing_score = np.select(
+        [up & put_down, up & (put_ema8 == put_ema21),
+         down & call_down, down & (call_ema8 == call_ema21)],
+        [w, w / 2, w, w / 2], 0.0)
+
+    w = params.alignment_weight
+    option_alignment_score = np.select(
+        [up & call_up & put_down, up & (call_up | put_down),
+         down & call_down & put_up, down & (call_down | put_up)],
+        [w, w / 2, w, w / 2], 0.0)
+
+    return option_confirm_score, opposing_score, option_alignment_score
+
+
+# Vectorized version of calculate_score_and_recommendation. Every argument
+# is an array (or scalar) broadcastable to n rows; `levels` follows
+# nearest_levels_batch and `broken` flags rows with any broken level.
+# A precomputed nearest_levels_batch result can be passed as `nearest`.
+# Stages are recorded as batch.* (one observation per call).
+def score_batch(spy_ema8, spy_ema21, call_ema8, call_ema21, put_ema8, put_ema21,
+                price, levels, broken=False, params=DEFAULT_PARAMS, nearest=None):
+    spy_ema8, spy_ema21, call_ema8, call_ema21, put_ema8, put_ema21, price = np.broadcast_arrays(
+        *(np.asarray(a, dtype=np.float64) for a in
+          (spy_ema8, spy_ema21, call_ema8, call_ema21, put_ema8, put_ema21, price))
+    )
+    broken = np.broadcast_to(np.asarray(broken, dtype=bool), price.shape)
+    laps = METRICS.laps()
+
+    # SPY trend, the option EMA relations and the gap bucket as codes
+    trend = np.where(spy_ema8 > spy_ema21, UPTREND,
+                     np.where(spy_ema8 < spy_ema21, DOWNTREND, NEUTRAL)).astype(np.int8)
+    if laps:
+        laps.lap("batch.trend")
+    call_dir = direction_codes(call_ema8, call_ema21)
+    put_dir = direction_codes(put_ema8, put_ema21)
+    if laps:
+        laps.lap("batch.options")
+    gap = gap_codes(spy_ema8, spy_ema21, params)
+    if laps:
+        laps.lap("batch.ema_gap")
+
+    # Pivot context from the nearest levels
+    if nearest is None:
+        nearest = nearest_levels_batch(price.ravel(), levels)
+    context = pivot_context_batch(
+        price, nearest["nearest_resistance"].reshape(price.shape),
+        nearest["nearest_support"].reshape(price.shape), trend, broken, params.near_threshold)
+    if laps:
+        laps.lap("batch.pivot_context")
+
+    # Every score is then one lookup by packed state
+    scores = score_table(params).lookup(pack_states(trend, call_dir, put_dir, gap, context))
+    if laps:
+        laps.lap("batch.lookup")
+
+    return {
+        "trend": trend,
+        "total_score": scores["total_score"],
+        "recommendation": scores["recommendation"],
+        "pivot_context": context,
+        "trend_score": scores["trend_score"],
+        "option_confirm_score": scores["option_confirm_score"],
+        "opposing_score": scores["opposing_score"],
+        "ema_gap_score": scores["ema_gap_score"],
+        "option_alignment_score": scores["option_alignment_score"],
+        "pivot_score": scores["pivot_score"],
+        **nearest,
+    }
+
+
+# Batch scoring straight from a DataFrame. Expects the six EMA columns and
+# `price`; levels come from `levels` or from R3..S3 columns in the frame,
+# and an optional boolean `broken` column.
+def score_frame(df, levels=None):
+    import pandas as pd
+
+    if levels is None:
+        levels = df[list(LEVEL_NAMES)].to_numpy(dtype=np.float64)
+    broken = df["broken"].to_numpy(dtype=bool) if "broken" in df else False
+
+    out = score_batch(
+        df["spy_ema8"].to_numpy(), df["spy_ema21"].to_numpy(),
+        df["call_ema8"].to_numpy(), df["call_ema21"].to_numpy(),
+        df["put_ema8"].to_numpy(), df["put_ema21"].to_numpy(),
+        df["price"].to_numpy(), levels, broken,
+    )
+    frame = pd.DataFrame({k: v for k, v in out.items()
+                          if k not in ("trend", "recommendation", "pivot_context")}, index=df.index)
+    frame["trend"] = pd.Categorical.from_codes(out["trend"], TRENDS)
+    frame["recommendation"] = pd.Categorical.from_codes(out["recommendation"], RECOMMENDATIONS)
+    frame["pivot_context"] = pd.Categorical.from_codes(out["pivot_context"], CONTEXTS)
+    return frame
+
+
+# ---------------------------------------------------------------------------
+# Compiled score table (every pillar depends only on a few discrete states)
+# ---------------------------------------------------------------------------
+
+# State axes: SPY trend, CALL direction, PUT direction, gap bucket, pivot
+# context. A packed state is the row-major index into this shape.
+STATE_SHAPE = (len(TRENDS), 4, 4, 3, len(CONTEXTS))
+STATE_COUNT = int(np.prod(STATE_SHAPE))
+
+# One score table record
+TABLE_DTYPE = np.dtype([
+    ("trend_score", "<f8"), ("option_confirm_score", "<f8"), ("opposing_score", "<f8"),
+    ("ema_gap_score", "<f8"), ("option_alignment_score", "<f8"), ("pivot_score", "<f8"),
+    ("total_score", "<f8"), ("recommendation", "i1"),
+])
+
+
+# Function to compute EMA direction codes for arrays
+def direction_codes(ema8, ema21):
+    return np.select([ema8 > ema21, ema8 < ema21, ema8 == ema21],
+                     [DIR_UP, DIR_DOWN, DIR_FLAT], DIR_UNKNOWN).astype(np.int8)
+
+
+# Function to compute gap bucket codes for arrays of SPY EMAs
+def gap_codes(ema8, ema21, params=DEFAULT_PARAMS):
+    gap = np.abs(ema8 - ema21)
+    return np.where((gap >= params.gap_low) & (gap <= params.gap_high), GAP_IDEAL,
+                    np.where(gap > params.gap_high, GAP_OVEREXTENDED, GAP_TIGHT)).astype(np.int8)
+
+
+# Function to pack (trend, call direction, put direction, gap bucket,
+# pivot context) codes into states; scalars give one int
+def pack_states(trend, call_dir, put_dir, gap, context):
+    return np.ravel_multi_index((trend, call_dir, put_dir, gap, context), STATE_SHAPE)
+
+
+# Function to unpack states into their (trend, call, put, gap, context) codes
+def unpack_states(states):
+    return np.unravel_index(states, STATE_SHAPE)
+
+
+# Every pillar score, the total and the recommendation for each of the
+# STATE_COUNT states under one set of ScoringParams, as one record per
+# state. Built with the same array expressions the batch scorer used, so
+# lookups give bit-identical scores, and scoring any number of snapshots
+# is a single np.take of records.
+class ScoreTable:
+    def __init__(self, params=DEFAULT_PARAMS):
+        self.params = params
+        trend, call_dir, put_dir, gap, context = unpack_states(np.arange(STATE_COUNT))
+        up = trend == UPTREND
+        down = trend == DOWNTREND
+
+        # Pillar 1: SPY trend
+        trend_score = np.where(up | down, float(params.trend_weight), 0.0)
+
+        # Pillar 2: option pillars from EMAs that have each direction
+        ema8 = np.array([1.0, 0.0, 0.0, np.nan])
+        ema21 = np.array([0.0, 1.0, 0.0, 0.0])
+        option_confirm_score, opposing_score, option_alignment_score = option_scores_batch(
+            up, down, ema8[call_dir], ema21[call_dir], ema8[put_dir], ema21[put_dir], params)
+
+        # Pillar 3: EMA gap
+        w = params.gap_weight
+        ema_gap_score = np.where(gap == GAP_IDEAL, float(w), np.where(gap == GAP_OVEREXTENDED, -w, -w / 2))
+
+        # Pillar 4: pivot zone
+        w = params.pivot_weight
+        pivot_score = np.where(
+            trend == NEUTRAL, 0.0,
+            np.select([context == CTX_FAVORABLE, context == CTX_BROKEN, context == CTX_MID],
+                      [w, w, w / 2], -w / 3))
+
+        total_score = (trend_score + option_confirm_score + opposing_score + ema_gap_score
+                       + option_alignment_score + pivot_score)
+        total_score = np.clip(total_score, 0, 100)
+
+        recommendation = np.where(
+            total_score >= params.buy_cutoff,
+            np.where(up, BUY_CALLS, np.where(down, BUY_PUTS, NO_TRADE)),
+            np.where(total_score >= params.wait_cutoff, WAIT, NO_TRADE)).astype(np.int8)
+
+        self.records = np.zeros(STATE_COUNT, dtype=TABLE_DTYPE)
+        self.records["trend_score"] = trend_score
+        self.records["option_confirm_score"] = option_confirm_score
+        self.records["opposing_score"] = opposing_score
+        self.records["ema_gap_score"] = ema_gap_score
+        self.records["option_alignment_score"] = option_alignment_score
+        self.records["pivot_score"] = pivot_score
+        self.records["total_score"] = total_score
+        self.records["recommendation"] = recommendation
+
+    # Score records for a state (one record) or an array of states
+    def lookup(self, states):
+        return self.records.take(states)
+
+    # The whole table as a DataFrame, one row per state with named codes
+    def truth_table(self):
+        import pandas as pd
+
+        trend, call_dir, put_dir, gap, context = unpack_states(np.arange(STATE_COUNT))
+        directions = ("UP", "DOWN", "FLAT", "UNKNOWN")
+        frame = pd.DataFrame({
+            "trend": pd.Categorical.from_codes(trend, TRENDS),
+            "call": pd.Categorical.from_codes(call_dir, directions),
+            "put": pd.Categorical.from_codes(put_dir, directions),
+            "gap": pd.Categorical.from_codes(gap, ("IDEAL", "OVEREXTENDED", "TIGHT")),
+            "pivot_context": pd.Categorical.from_codes(context, CONTEXTS),
+        })
+        for field in TABLE_DTYPE.names:
+            frame[field] = self.records[field]
+        frame["recommendation"] = pd.Categorical.from_codes(self.records["recommendation"], RECOMMENDATIONS)
+        return frame
+
+
+# Function to get the score table for a set of params. Tables are cached by
+# params, so changing a weight or cut-off builds a new one on first use.
+@lru_cache(maxsize=32)
+def score_table(params=DEFAULT_PARAMS):
+    return ScoreTable(params)
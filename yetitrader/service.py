@@ -0,0 +1,237 @@
+import argparse
+import asyncio
+import json
+import logging
+
+import numpy as np
+
+from yetitrader.journal import decode_record, encode_batch, result_color
+from yetitrader.metrics import METRICS
+from yetitrader.scoring import (
+    CONTEXTS, LEVEL_NAMES, RECOMMENDATIONS, TRENDS, calculate_score_and_recommendation, find_nearest_levels,
+    score_batch,
+)
+from yetitrader.store import broken_mask, open_store
+
+logger = logging.getLogger("yetitrader.service")
+
+EMA_FIELDS = ("spy_ema8", "spy_ema21", "call_ema8", "call_ema21", "put_ema8", "put_ema21")
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large",
+           500: "Internal Server Error"}
+
+
+class RequestError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# Function to validate a snapshot's broken_levels (level names) and put
+# them in LEVEL_NAMES order, so single and batch results list them alike
+def _broken_names(snapshot):
+    names = snapshot.get("broken_levels") or ()
+    if not isinstance(names, (list, tuple)):
+        raise RequestError(400, "broken_levels must be a list of level names")
+    unknown = [name for name in names if name not in LEVEL_NAMES]
+    if unknown:
+        raise RequestError(400, f"unknown broken levels {unknown}; expected names from {list(LEVEL_NAMES)}")
+    return [name for name in LEVEL_NAMES if name in names]
+
+
+# Function to validate levels: exactly the R3..S3 keys with finite numbers,
+# returned as {name: float} in LEVEL_NAMES order
+def _levels(levels):
+    if not isinstance(levels, dict) or set(levels) != set(LEVEL_NAMES):
+        raise RequestError(400, f"levels must be an object with exactly the keys {list(LEVEL_NAMES)}")
+    values = [levels[name] for name in LEVEL_NAMES]
+    if not all(isinstance(value, (int, float)) and not isinstance(value, bool) and np.isfinite(value)
+               for value in values):
+        raise RequestError(400, "levels must be finite numbers")
+    return {name: float(value) for name, value in zip(LEVEL_NAMES, values)}
+
+
+# 4-pillar scoring over HTTP/JSON. `levels` ({name: value}) is used for
+# snapshots that do not carry their own.
+#
+#   POST /score        one snapshot -> calculate_score_and_recommendation results
+#   POST /score/batch  {"snapshots": [...], "levels": {...}} -> {"results": [...]}
+#   GET  /health       "ok"
+#   GET  /metrics      stage metrics in Prometheus text format
+#
+# A snapshot has the six EMA fields, current_price and optionally levels
+# ({R3..S3: number}) and broken_levels (R3..S3 names); anything else is a
+# 400. Both endpoints
+# give the same schema: scores as floats and broken levels listed in
+# R3..S3 order. Pass "details": false for the top-level batch fields only.
+class ScoringService:
+    def __init__(self, levels=None, max_body=64 * 1024 * 1024):
+        self.levels = dict(levels) if levels else None
+        self.max_body = max_body
+        self.requests = 0
+
+    def _snapshot_levels(self, snapshot, default=None):
+        levels = snapshot.get("levels")
+        if levels is None:
+            levels = default or self.levels
+        if levels is None:
+            raise RequestError(400, "snapshot has no levels and the service has no default levels")
+        return _levels(levels)
+
+    def score(self, snapshot):
+        if not isinstance(snapshot, dict):
+            raise RequestError(400, "a snapshot must be an object")
+        try:
+            emas = [float(snapshot[field]) for field in EMA_FIELDS]
+            price = float(snapshot["current_price"])
+        except (KeyError, TypeError, ValueError) as exc:
+            raise RequestError(400, f"bad snapshot: {exc!r}")
+        levels = self._snapshot_levels(snapshot)
+        broken = [(name, levels.get(name)) for name in _broken_names(snapshot)]
+        result = calculate_score_and_recommendation(*emas, price, find_nearest_levels(price, levels), broken)
+        result["total_score"] = float(result["total_score"])
+        for detail in result["details"]:
+            detail["score"] = float(detail["score"])
+        return result
+
+    # Score every snapshot in one score_batch call, then rebuild the
+    # results schema from the encoded records
+    def score_many(self, request):
+        snapshots = request.get("snapshots")
+        if not isinstance(snapshots, list):
+            raise RequestError(400, "expected {\"snapshots\": [...]}")
+        if not snapshots:
+            return {"results": []}
+        if not all(isinstance(s, dict) for s in snapshots):
+            raise RequestError(400, "a snapshot must be an object")
+        shared = request.get("levels")
+        if shared is not None:
+            shared = _levels(shared)
+        levels = np.array([list(self._snapshot_levels(s, shared).values()) for s in snapshots], dtype=np.float64)
+        try:
+            columns = np.array([[s[field] for field in EMA_FIELDS + ("current_price",)] for s in snapshots],
+                               dtype=np.float64)
+        except (KeyError, TypeError, ValueError) as exc:
+            raise RequestError(400, f"bad snapshot: {exc!r}")
+        if (levels == levels[0]).all():
+            levels = levels[0]
+        masks = np.array([broken_mask(_broken_names(s)) for s in snapshots], dtype=np.uint8)
+
+        scores = score_batch(*columns.T, levels, masks > 0)
+        if request.get("details", True):
+            records = encode_batch(scores, *columns.T, 0.0, "", masks)
+            return {"results": [decode_record(record) for record in records]}
+
+        results = []
+        for trend, total_score, recommendation, context in zip(
+                scores["trend"].tolist(), scores["total_score"].tolist(),
+                scores["recommendation"].tolist(), scores["pivot_context"].tolist()):
+            recommendation = RECOMMENDATIONS[recommendation]
+            results.append({"trend": TRENDS[trend], "total_score": total_score, "recommendation": recommendation,
+                            "color": result_color(recommendation, total_score), "pivot_context": CONTEXTS[context]})
+        return {"results": results}
+
+    def route(self, method, path, body):
+        if path == "/health":
+            return 200, "text/plain", b"ok\n"
+        if path == "/metrics":
+            return 200, "text/plain; version=0.0.4", METRICS.prometheus_text().encode()
+        if path not in ("/score", "/score/batch"):
+            raise RequestError(404, f"no route for {path}")
+        if method != "POST":
+            raise RequestError(405, f"{path} expects POST")
+        try:
+            request = json.loads(body)
+        except ValueError as exc:
+            raise RequestError(400, f"invalid JSON: {exc}")
+        if not isinstance(request, dict):
+            raise RequestError(400, "expected a JSON object")
+        with METRICS.stage(f"service{path.replace('/', '.')}"):
+            result = self.score(request) if path == "/score" else self.score_many(request)
+        return 200, "application/json", json.dumps(result).encode()
+
+    # One keep-alive connection: requests are served in order until the
+    # client closes or asks to
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, path, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                keep_alive = (headers.get("connection", "").lower() != "close"
+                              if version == "HTTP/1.1" else headers.get("connection", "").lower() == "keep-alive")
+
+                try:
+                    try:
+                        length = int(headers.get("content-length", 0))
+                    except ValueError:
+                        length = -1
+                    if length < 0:
+                        # The body cannot be delimited, so the connection ends here
+                        keep_alive = False
+                        raise RequestError(400, f"bad Content-Length {headers.get('content-length')!r}")
+                    if length > self.max_body:
+                        keep_alive = False
+                        raise RequestError(413, f"body over {self.max_body} bytes")
+                    body = await reader.readexactly(length) if length else b""
+                    status, content_type, payload = self.route(method, path.split("?", 1)[0], body)
+                except RequestError as exc:
+                    status, content_type = exc.status, "application/json"
+                    payload = json.dumps({"error": str(exc)}).encode()
+                except Exception as exc:
+                    logger.exception("error serving %s %s", method, path)
+                    status, content_type = 500, "application/json"
+                    payload = json.dumps({"error": repr(exc)}).encode()
+                self.requests += 1
+
+                writer.write(
+                    f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                    f"Content-Type: {content_type}\r\n"
+                    f"Content-Length: {len(payload)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + payload
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(service, host="127.0.0.1", port=8765):
+    server = await asyncio.start_server(service.handle, host, port)
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve 4-pillar scoring over local HTTP/JSON")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--levels", type=float, nargs=7, metavar=LEVEL_NAMES,
+                        help="Default pivot levels for snapshots without their own")
+    parser.add_argument("--symbol", help="Take the default levels from today's entry in the pivot store")
+    args = parser.parse_args(argv)
+
+    levels = dict(zip(LEVEL_NAMES, args.levels)) if args.levels else None
+    if levels is None and args.symbol:
+        stored = open_store().get(args.symbol)
+        levels = stored[0] if stored else None
+    print(f"Scoring service on http://{args.host}:{args.port}")
+    asyncio.run(serve(ScoringService(levels), args.host, args.port))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+import argparse
+import csv
+import os
+import sqlite3
+import threading
+from datetime import date
+from functools import lru_cache
+
+import numpy as np
+
+from yetitrader.cache import CACHES, named_cache
+from yetitrader.scoring import LEVEL_NAMES
+
+# Default database, overridable with YETITRADER_PIVOT_DB (":memory:" keeps
+# nothing between runs). The file and its folder are only created by the
+# first save; until then reads find nothing.
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".yetitrader", "pivots.db")
+
+COLUMNS = tuple(name.lower() for name in LEVEL_NAMES)
+
+# One row per symbol and day. The primary key is the clustered index
+# (WITHOUT ROWID), so a symbol's date range is one contiguous index scan.
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS pivots (
+    symbol TEXT NOT NULL,
+    day TEXT NOT NULL,
+    {", ".join(f"{column} REAL" for column in COLUMNS)},
+    broken INTEGER NOT NULL DEFAULT 0,
+    source TEXT,
+    PRIMARY KEY (symbol, day)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS pivots_day ON pivots (day);
+"""
+
+_UPSERT = (f"INSERT OR REPLACE INTO pivots (symbol, day, {', '.join(COLUMNS)}, broken, source) "
+           f"VALUES (?, ?, {', '.join('?' * len(COLUMNS))}, ?, ?)")
+
+
+# Function to pack broken level names into a LEVEL_NAMES bitmask
+def broken_mask(names):
+    mask = 0
+    for name in names:
+        if name in LEVEL_NAMES:
+            mask |= 1 << LEVEL_NAMES.index(name)
+    return mask
+
+
+# Function to unpack a LEVEL_NAMES bitmask into level names
+def broken_names(mask):
+    return [name for bit, name in enumerate(LEVEL_NAMES) if int(mask) >> bit & 1]
+
+
+# Function to normalize a day (date, datetime64 or 'YYYY-MM-DD') to text
+def day_key(day):
+    if day is None:
+        return date.today().isoformat()
+    return str(np.datetime64(day, "D"))
+
+
+# Pivot levels and broken-level state per symbol and day in SQLite. Reads
+# of single days go through a shared cache (see yetitrader.cache: bounded,
+# with a TTL, emptied by clear_caches()) that saves keep current, so the
+# store can be shared by every session of one process. Days with nothing
+# saved are not cached, so levels saved by another process show up.
+class PivotStore:
+    def __init__(self, path=None, maxsize=4096):
+        self.path = path or os.environ.get("YETITRADER_PIVOT_DB") or DEFAULT_PATH
+        self.conn = None
+        self.lock = threading.Lock()
+        # Stores of one database share its cache, so saves through one are
+        # seen by the others
+        name = f"store.days:{self.path}"
+        self.cache = CACHES.get(name) or named_cache(name, maxsize)
+        self._connect(create=False)
+
+    # Open the database, creating it only when create is set (or in memory)
+    def _connect(self, create=True):
+        if self.conn is None:
+            if self.path != ":memory:":
+                if not create and not os.path.exists(self.path):
+                    return None
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self.conn = sqlite3.connect(self.path, check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.executescript(SCHEMA)
+        return self.conn
+
+    def _query(self, sql, params=()):
+        with self.lock:
+            if self._connect(create=False) is None:
+                return []
+            return self.conn.execute(sql, params).fetchall()
+
+    def _read_day(self, key):
+        rows = self._query(f"SELECT {', '.join(COLUMNS)}, broken FROM pivots WHERE symbol = ? AND day = ?", key)
+        if not rows:
+            raise KeyError(key)
+        return dict(zip(LEVEL_NAMES, rows[0][:-1])), broken_names(rows[0][-1])
+
+    # Levels for one symbol and day as ({name: value}, [broken names]), or
+    # None when nothing was saved for that day
+    def get(self, symbol, day=None):
+        key = (symbol, day_key(day))
+        try:
+            return self.cache.get(key, lambda: self._read_day(key))
+        except KeyError:
+            return None
+
+    def save(self, symbol, day, levels, broken=(), source="manual"):
+        key = (symbol, day_key(day))
+        values = [levels[name] for name in LEVEL_NAMES]
+        with self.lock, self._connect():
+            self.conn.execute(_UPSERT, (*key, *values, broken_mask(broken), source))
+        self.cache.put(key, (dict(zip(LEVEL_NAMES, values)), list(broken)))
+
+    # Bulk upsert of (symbol, day, r3, r2, r1, pivot, s1, s2, s3, broken
+    # mask, source) tuples in one transaction
+    def save_many(self, rows):
+        rows = [(symbol, day_key(day), *values) for symbol, day, *values in rows]
+        with self.lock, self._connect():
+            self.conn.executemany(_UPSERT, rows)
+        self.cache.clear()
+        return len(rows)
+
+    # Levels for a symbol between two days (inclusive) as arrays: days
+    # (datetime64[D]), levels (n, 7) in LEVEL_NAMES order and broken masks
+    def range(self, symbol, start, end):
+        rows = self._query(
+            f"SELECT day, {', '.join(COLUMNS)}, broken FROM pivots "
+            f"WHERE symbol = ? AND day BETWEEN ? AND ? ORDER BY day",
+            (symbol, day_key(start), day_key(end)),
+        )
+        if not rows:
+            return {"days": np.empty(0, dtype="datetime64[D]"), "levels": np.empty((0, len(LEVEL_NAMES))),
+                    "broken": np.empty(0, dtype=np.int64)}
+        days, *columns = zip(*rows)
+        return {
+            "days": np.array(days, dtype="datetime64[D]"),
+            "levels": np.array(columns[:-1], dtype=np.float64).T,
+            "broken": np.array(columns[-1], dtype=np.int64),
+        }
+
+    # Per-bar levels for an array of bar days: (n, 7) levels (NaN where
+    # the day has none stored) and (n,) broken masks. One range query
+    # covers the whole span.
+    def levels_for_days(self, symbol, days):
+        days = np.asarray(days, dtype="datetime64[D]")
+        levels = np.full((len(days), len(LEVEL_NAMES)), np.nan)
+        broken = np.zeros(len(days), dtype=np.int64)
+        if not len(days):
+            return levels, broken
+        stored = self.range(symbol, days.min(), days.max())
+        if len(stored["days"]):
+            pos = np.minimum(np.searchsorted(stored["days"], days), len(stored["days"]) - 1)
+            found = stored["days"][pos] == days
+            levels[found] = stored["levels"][pos[found]]
+            broken[found] = stored["broken"][pos[found]]
+        return levels, broken
+
+    def symbols(self):
+        return [row[0] for row in self._query("SELECT DISTINCT symbol FROM pivots ORDER BY symbol")]
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+
+
+# Function to get the process-wide store for a path (shared by every
+# Streamlit session, so today's levels are read from disk once). The
+# default path is looked up on every call, so a changed
+# YETITRADER_PIVOT_DB gets its own store.
+def open_store(path=None):
+    return _open_store(path or os.environ.get("YETITRADER_PIVOT_DB") or DEFAULT_PATH)
+
+
+@lru_cache(maxsize=None)
+def _open_store(path):
+    return PivotStore(path)
+
+
+# Function to turn a bulk import row ({symbol, date or day, R3..S3,
+# optional broken as 'R1;S2' or a mask}) into a save_many tuple
+def _import_row(row, source):
+    broken = row.get("broken") or 0
+    if isinstance(broken, str) and not broken.isdigit():
+        broken = broken_mask(name.strip() for name in broken.split(";"))
+    day = row.get("day") or row.get("date")
+    return (row["symbol"], day, *(float(row[name]) for name in LEVEL_NAMES), int(broken), source)
+
+
+# Function to bulk import a CSV or parquet file of symbol-days
+def import_file(store, path, source="import"):
+    if path.endswith(".parquet"):
+        import pandas as pd
+
+        frame = pd.read_parquet(path)
+        if "broken" in frame:
+            # A missing broken value (NaN/NA) means no level is broken
+            frame["broken"] = frame["broken"].astype(object).where(frame["broken"].notna(), 0)
+        records = frame.to_dict("records")
+    else:
+        with open(path, newline="") as f:
+            records = list(csv.DictReader(f))
+    return store.save_many(_import_row(record, source) for record in records)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the persistent pivot level store")
+    parser.add_argument("--db", help=f"Database path (default $YETITRADER_PIVOT_DB or {DEFAULT_PATH}, "
+                                     f"created on the first import)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    load = commands.add_parser("import", help="Bulk import CSV/parquet files (symbol, date, R3..S3, broken)")
+    load.add_argument("files", nargs="+")
+    show = commands.add_parser("show", help="Print a symbol's levels for a date range")
+    show.add_argument("symbol")
+    show.add_argument("--start", default="1970-01-01")
+    show.add_argument("--end", default="9999-12-31")
+    args = parser.parse_args(argv)
+
+    store = PivotStore(args.db)
+    if args.command == "import":
+        for path in args.files:
+            print(f"{path}: {import_file(store, path)} symbol-days")
+    else:
+        stored = store.range(args.symbol, args.start, args.end)
+        print(f"{'Day':<11} " + " ".join(f"{name:>8}" for name in LEVEL_NAMES) + "  Broken")
+        for day, levels, mask in zip(stored["days"], stored["levels"], stored["broken"]):
+            print(f"{str(day):<11} " + " ".join(f"{value:>8.2f}" for value in levels)
+                  + "  " + ",".join(broken_names(mask)))
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+import argparse
+import itertools
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from yetitrader.backtest import evaluate_backtest, load_archive, prepare_backtest
+from yetitrader.pivots import METHODS
+from yetitrader.scoring import DEFAULT_PARAMS, ScoringParams
+
+RESULT_FIELDS = ("signals", "hit_rate", "mean_option_return", "mean_spy_return")
+RESULT_DTYPE = np.dtype(
+    [(name, np.float64) for name in ScoringParams._fields]
+    + [("signals", np.int64), ("hit_rate", np.float64),
+       ("mean_option_return", np.float64), ("mean_spy_return", np.float64)]
+)
+
+# Prepared backtest arrays, memory-mapped once per worker process
+_shared = None
+
+
+# Function to build the cartesian product of parameter values. Fields that
+# are not given keep their DEFAULT_PARAMS value.
+def param_grid(**values):
+    names = list(values)
+    return [DEFAULT_PARAMS._replace(**dict(zip(names, combo)))
+            for combo in itertools.product(*values.values())]
+
+
+# Function to write prepared backtest arrays as .npy files that every
+# worker can memory-map instead of receiving a pickled copy per task
+def save_shared(prepared, directory):
+    for name, value in prepared.items():
+        if name in ("timestamps", "horizons"):
+            continue
+        np.save(os.path.join(directory, f"{name}.npy"), np.ascontiguousarray(value))
+    np.save(os.path.join(directory, "horizons.npy"), np.asarray(prepared["horizons"]))
+
+
+def load_shared(directory):
+    shared = {}
+    for filename in os.listdir(directory):
+        name = filename[:-len(".npy")]
+        shared[name] = np.load(os.path.join(directory, filename), mmap_mode="r")
+    shared["horizons"] = tuple(int(h) for h in shared["horizons"])
+    return shared
+
+
+def _init_worker(directory):
+    global _shared
+    _shared = load_shared(directory)
+
+
+def _evaluate_chunk(chunk, horizon):
+    rows = []
+    for params in chunk:
+        row = evaluate_backtest(_shared, params)["report"][horizon]
+        rows.append(tuple(params) + tuple(row[name] for name in RESULT_FIELDS))
+    return rows
+
+
+# Function to rank a results table: combinations with at least
+# `min_signals` signals first, then by `rank_by` descending
+def rank_results(table, rank_by="hit_rate", min_signals=1):
+    value = np.nan_to_num(table[rank_by], nan=-np.inf)
+    enough = table["signals"] >= min_signals
+    return table[np.lexsort((-value, ~enough))]
+
+
+# Evaluate every parameter combination against one prepared backtest across
+# a process pool and return a ranked structured array (one row per combo)
+def run_sweep(prepared, grid, horizon=None, workers=None, chunk_size=64,
+              rank_by="hit_rate", min_signals=1):
+    horizon = prepared["horizons"][0] if horizon is None else horizon
+    workers = workers or os.cpu_count() or 1
+    chunks = [grid[i:i + chunk_size] for i in range(0, len(grid), chunk_size)]
+
+    with tempfile.TemporaryDirectory(prefix="yetitrader-sweep-") as directory:
+        save_shared(prepared, directory)
+        if workers == 1:
+            _init_worker(directory)
+            rows = [row for chunk in chunks for row in _evaluate_chunk(chunk, horizon)]
+        else:
+            with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(directory,)) as pool:
+                rows = [row for result in pool.map(_evaluate_chunk, chunks, itertools.repeat(horizon))
+                        for row in result]
+
+    return rank_results(np.array(rows, dtype=RESULT_DTYPE), rank_by, min_signals)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sweep 4-pillar thresholds and weights over a minute-bar archive")
+    parser.add_argument("archive", help="CSV with timestamp, spy, call, put (and optional R3..S3, session)")
+    parser.add_argument("--levels", type=float, nargs=7, help="Fixed pivot levels R3..S3")
+    parser.add_argument("--pivots", choices=METHODS, help="Derive levels from the prior session")
+    parser.add_argument("--horizon", type=int, default=15, help="Forward-return horizon in bars to rank on")
+    parser.add_argument("--rank-by", default="hit_rate", choices=RESULT_FIELDS[1:])
+    parser.add_argument("--min-signals", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--out", help="Write the full ranked table to this CSV file")
+    parser.add_argument("--start", help="First day of the archive to use (YYYY-MM-DD)")
+    parser.add_argument("--end", help="Last day of the archive to use (YYYY-MM-DD)")
+    parser.add_argument("--cache", action="store_true", help="Read through the memory-mapped column cache")
+    for field in ScoringParams._fields:
+        parser.add_argument(f"--{field.replace('_', '-')}", type=float, nargs="+",
+                            default=[getattr(DEFAULT_PARAMS, field)])
+    args = parser.parse_args(argv)
+
+    data = load_archive(args.archive, args.pivots, args.start, args.end, args.cache)
+    data.pop("timestamps")
+    if args.levels:
+        data["levels"] = np.asarray(args.levels)
+    if "levels" not in data:
+        parser.error("archive has no R3..S3 columns; pass --levels or --pivots")
+
+    prepared = prepare_backtest(horizons=(args.horizon,), **data)
+    grid = param_grid(**{field: getattr(args, field) for field in ScoringParams._fields})
+    table = run_sweep(prepared, grid, args.horizon, args.workers,
+                      rank_by=args.rank_by, min_signals=args.min_signals)
+
+    if args.out:
+        np.savetxt(args.out, table, delimiter=",", header=",".join(table.dtype.names),
+                   comments="", fmt="%.10g")
+    names = table.dtype.names
+    print(" ".join(f"{name:>12.12}" for name in names))
+    for row in table[:args.top]:
+        print(" ".join(f"{value:>12.6g}" for value in row))
+
+
+if __name__ == "__main__":
+    main()
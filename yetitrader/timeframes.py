@@ -0,0 +1,209 @@
+import argparse
+
+import numpy as np
+
+from yetitrader.ema import StreamingEMA
+from yetitrader.feeds import read_bars
+from yetitrader.scoring import CONTEXTS, DEFAULT_PARAMS, LEVEL_NAMES, RECOMMENDATIONS, TRENDS, WAIT, score_batch
+
+# Default timeframes, finest first
+TIMEFRAMES = ("1m", "5m", "15m", "1h")
+
+# One completed bar in a timeframe's ring buffer
+BAR_DTYPE = np.dtype([
+    ("timestamp", "<f8"), ("open", "<f8"), ("high", "<f8"), ("low", "<f8"), ("close", "<f8"), ("volume", "<f8"),
+])
+
+_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+# Function to turn a timeframe name such as "30s", "5m", "1h" into seconds
+def timeframe_seconds(name):
+    if name[-1:] not in _UNITS:
+        raise ValueError(f"unknown timeframe {name!r} (expected e.g. 30s, 5m, 1h, 1d)")
+    return float(name[:-1]) * _UNITS[name[-1]]
+
+
+# Bars of one timeframe, built incrementally from a finer stream (ticks or
+# 1-minute bars). Each symbol has one forming bar, kept as plain floats and
+# updated in place per tick; the last `history` completed bars live in a
+# ring buffer, and the streaming EMAs are folded once per completed bar.
+# Bar boundaries are origin + k * seconds.
+class TimeframeBars:
+    def __init__(self, name, history=256, periods=(8, 21), origin=0.0):
+        self.name = name
+        self.seconds = timeframe_seconds(name)
+        self.history = history
+        self.origin = origin
+        self.ema = StreamingEMA(periods)
+        self.ring = np.zeros((len(self.ema.counts), history), dtype=BAR_DTYPE)
+        self.forming = {}  # row -> [start, open, high, low, close, volume]
+
+    # Fold one tick or finer bar in. Returns True when it completed a bar.
+    # Late ticks (older than the forming bar) are folded into the forming bar.
+    def update(self, symbol, timestamp, open, high, low, close, volume=0.0):
+        row = self.ema.slot(symbol)
+        start = timestamp - (timestamp - self.origin) % self.seconds
+        bar = self.forming.get(row)
+        if bar is None:
+            self.forming[row] = [start, open, high, low, close, volume]
+            return False
+        if start > bar[0]:
+            self._complete(symbol, row, bar)
+            self.forming[row] = [start, open, high, low, close, volume]
+            return True
+        if high > bar[2]:
+            bar[2] = high
+        if low < bar[3]:
+            bar[3] = low
+        bar[4] = close
+        bar[5] += volume
+        return False
+
+    def _complete(self, symbol, row, bar):
+        while row >= len(self.ring):
+            self.ring = np.concatenate([self.ring, np.zeros_like(self.ring)])
+        self.ring[row, self.ema.counts[row] % self.history] = tuple(bar)
+        self.ema.update(symbol, bar[4])
+
+    # Completed bars of a symbol, oldest first (at most `history`)
+    def bars(self, symbol):
+        row = self.ema.index.get(symbol)
+        if row is None:
+            return np.zeros(0, dtype=BAR_DTYPE)
+        count = int(self.ema.counts[row])
+        if count <= self.history:
+            return self.ring[row, :count].copy()
+        return np.roll(self.ring[row], -(count % self.history))
+
+    # A symbol's EMAs (one per period). With `live`, the forming bar's close
+    # is folded in provisionally, the way a chart shows the current bar.
+    def emas(self, symbol, live=True):
+        row = self.ema.index.get(symbol)
+        if row is None:
+            return np.full(len(self.ema.periods), np.nan)
+        values = self.ema.values[row]
+        bar = self.forming.get(row)
+        if not live or bar is None:
+            return values.copy()
+        if not self.ema.counts[row]:
+            return np.full_like(values, bar[4])
+        return values + self.ema.alpha * (bar[4] - values)
+
+    # Number of completed bars seen for a symbol
+    def count(self, symbol):
+        row = self.ema.index.get(symbol)
+        return 0 if row is None else int(self.ema.counts[row])
+
+
+# Several timeframes fed from one stream in a single pass. Every incoming
+# bar costs a fixed amount of work per timeframe, and memory per symbol and
+# timeframe is bounded by the ring buffer.
+class MultiTimeframe:
+    def __init__(self, timeframes=TIMEFRAMES, history=256, periods=(8, 21), origin=0.0):
+        self.frames = [TimeframeBars(name, history, periods, origin) for name in timeframes]
+        self.names = tuple(frame.name for frame in self.frames)
+        self.last = {}
+
+    # Fold one feeds.Bar into every timeframe; returns the number of bars
+    # it completed
+    def update(self, bar):
+        self.last[bar.symbol] = bar.close
+        completed = 0
+        for frame in self.frames:
+            completed += frame.update(bar.symbol, bar.timestamp, bar.open, bar.high, bar.low, bar.close, bar.volume)
+        return completed
+
+    def frame(self, name):
+        return self.frames[self.names.index(name)]
+
+    # The six framework EMAs for a SPY/CALL/PUT trio as (timeframes,) arrays
+    def framework_inputs(self, spy_symbol, call_symbol, put_symbol, live=True):
+        fast, slow = self.frames[0].ema.periods.index(8), self.frames[0].ema.periods.index(21)
+        inputs = {}
+        for prefix, symbol in (("spy", spy_symbol), ("call", call_symbol), ("put", put_symbol)):
+            values = np.array([frame.emas(symbol, live) for frame in self.frames])
+            inputs[f"{prefix}_ema8"] = values[:, fast]
+            inputs[f"{prefix}_ema21"] = values[:, slow]
+        return inputs
+
+    # 4-pillar scores for every timeframe in one score_batch call, against
+    # the last SPY price. `valid` marks timeframes with all six EMAs.
+    def scores(self, spy_symbol, call_symbol, put_symbol, levels, broken=False, live=True, params=DEFAULT_PARAMS):
+        inputs = self.framework_inputs(spy_symbol, call_symbol, put_symbol, live)
+        if isinstance(levels, dict):
+            levels = [levels[name] for name in LEVEL_NAMES]
+        price = self.last.get(spy_symbol, np.nan)
+        scores = score_batch(
+            inputs["spy_ema8"], inputs["spy_ema21"], inputs["call_ema8"], inputs["call_ema21"],
+            inputs["put_ema8"], inputs["put_ema21"], np.full(len(self.frames), price),
+            np.asarray(levels, dtype=np.float64), broken, params)
+        scores["valid"] = np.isfinite(np.column_stack(list(inputs.values()))).all(axis=1) & np.isfinite(price)
+        scores.update(inputs)
+        return scores
+
+
+# Function to summarize per-timeframe scores across the valid timeframes:
+# how many hold each trend, the trend they all agree on (None if they
+# differ or any is neutral), mean and lowest total score, and the
+# recommendation, which stands only when every timeframe gives it (WAIT FOR
+# CONFIRMATION otherwise)
+def confluence(scores):
+    valid = scores["valid"]
+    trend = scores["trend"][valid]
+    recommendation = scores["recommendation"][valid]
+    total = scores["total_score"][valid]
+    if not len(trend):
+        return {"timeframes": 0, "trend_counts": dict.fromkeys(TRENDS, 0), "aligned_trend": None,
+                "mean_score": float("nan"), "min_score": float("nan"), "recommendation": None}
+    counts = np.bincount(trend, minlength=len(TRENDS))
+    aligned = TRENDS[trend[0]] if counts[trend[0]] == len(trend) and TRENDS[trend[0]] != "NEUTRAL" else None
+    agreed = (recommendation == recommendation[0]).all()
+    return {
+        "timeframes": len(trend),
+        "trend_counts": dict(zip(TRENDS, counts.tolist())),
+        "aligned_trend": aligned,
+        "mean_score": float(total.mean()),
+        "min_score": float(total.min()),
+        "recommendation": RECOMMENDATIONS[recommendation[0] if agreed else WAIT],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a recorded session on several timeframes at once")
+    parser.add_argument("session", help="Tick or 1-minute bar file (see yetitrader.feeds)")
+    parser.add_argument("--spy", default="SPY")
+    parser.add_argument("--call", required=True)
+    parser.add_argument("--put", required=True)
+    parser.add_argument("--levels", type=float, nargs=7, required=True, metavar=LEVEL_NAMES)
+    parser.add_argument("--timeframes", nargs="+", default=TIMEFRAMES)
+    parser.add_argument("--history", type=int, default=256, help="Completed bars kept per symbol and timeframe")
+    parser.add_argument("--origin", type=float, default=0.0,
+                        help="Bar boundary offset in seconds (e.g. 34200 aligns hourly bars to 9:30 UTC)")
+    parser.add_argument("--closed", action="store_true", help="Use completed bars only (no forming bar)")
+    args = parser.parse_args(argv)
+
+    frames = MultiTimeframe(args.timeframes, args.history, origin=args.origin)
+    count = 0
+    for bar in read_bars(args.session):
+        frames.update(bar)
+        count += 1
+    scores = frames.scores(args.spy, args.call, args.put, args.levels, live=not args.closed)
+
+    print(f"{count} ticks/bars read")
+    print(f"{'TF':<5} {'Bars':>6} {'SPY 8':>9} {'SPY 21':>9} {'Trend':<10} {'Score':>6} {'Recommendation':<22} Context")
+    for i, frame in enumerate(frames.frames):
+        if not scores["valid"][i]:
+            print(f"{frame.name:<5} {frame.count(args.spy):>6}  (no EMAs yet)")
+            continue
+        print(f"{frame.name:<5} {frame.count(args.spy):>6} {scores['spy_ema8'][i]:>9.2f} {scores['spy_ema21'][i]:>9.2f} "
+              f"{TRENDS[scores['trend'][i]]:<10} {scores['total_score'][i]:>6.1f} "
+              f"{RECOMMENDATIONS[scores['recommendation'][i]]:<22} {CONTEXTS[scores['pivot_context'][i]]}")
+    summary = confluence(scores)
+    counts = ", ".join(f"{name} {count}" for name, count in summary["trend_counts"].items())
+    print(f"Confluence: {summary['aligned_trend'] or 'mixed'} ({counts}), mean score {summary['mean_score']:.1f}, "
+          f"min {summary['min_score']:.1f} -> {summary['recommendation']}")
+
+
+if __name__ == "__main__":
+    main()